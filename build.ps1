@@ -66,7 +66,7 @@ $verifyScript = @"
 import importlib, sys
 mods = [
   "PyQt6", "PyQt6.QtCore", "PyQt6.QtGui", "PyQt6.QtWidgets",
-  "xlwings", "pynput", "requests", "bs4"
+  "xlwings", "pynput", "requests"
 ]
 failed = []
 for m in mods:
@@ -13,6 +13,7 @@ from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QPixmap
 from PyQt6.QtWidgets import QApplication, QMessageBox, QSplashScreen
 
+from pubxel_core import http_session, providers, pubmed
 from pubxel_core import runtime as rt
 from pubxel_core.paths import appdatadir, assets_dir, os_name, settings_path
 from pubxel_core.settings import load_settings, save_settings, save_settings_key
@@ -106,6 +107,9 @@ def bootstrap():
 
     _merge_default_settings(rt.settingsdefault_path, settings_path)
     rt.settings = load_settings()
+    http_session.configure_from_settings(rt.settings)
+    providers.configure_from_settings(rt.settings)
+    pubmed.configure_from_settings(rt.settings)
 
     if os_name == "Windows":
         documents_path = os.path.join(os.environ["USERPROFILE"], "Documents")
@@ -0,0 +1,166 @@
+# Pub-Xel - A Biomedical Reference Management Tool
+# Copyright (C) 2024  Jongyeob Kim <info@pubxel.org>
+#
+# asyncio counterpart of pubmed.resolve_metadata_for_pmids. All windows and
+# hotkeys share one event loop running on a single daemon thread. Blocking
+# SQLite reads run on the loop's default executor and PubMed fetches on a
+# separate bounded one, so slow downloads never hold up cache lookups.
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, AsyncIterator, Callable, Coroutine, Iterable, List, Optional, TypeVar, Union
+
+from pubxel_core.metadata_store import MetadataDict
+from pubxel_core.pubmed import (
+    load_cached_metadata,
+    normalize_pmid_list,
+    obtain_pubmed_data,
+    schedule_stale_refresh,
+)
+from pubxel_core.pubmed_fetch import pubmed_circuit
+
+T = TypeVar("T")
+
+RESOLVER_MAX_WORKERS = 4
+# Concurrent obtain_pubmed_data calls; their batches share pubmed_fetch's pool.
+RESOLVER_FETCH_MAX_WORKERS = 2
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_thread: Optional[threading.Thread] = None
+_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_fetch_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_loop_lock = threading.Lock()
+
+_DONE = object()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Return the app-wide resolver loop, starting its thread on first use."""
+    global _loop, _loop_thread, _executor, _fetch_executor
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            loop = asyncio.new_event_loop()
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=RESOLVER_MAX_WORKERS,
+                thread_name_prefix="pubxel-resolver",
+            )
+            _fetch_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=RESOLVER_FETCH_MAX_WORKERS,
+                thread_name_prefix="pubxel-resolver-fetch",
+            )
+            loop.set_default_executor(_executor)
+            ready = threading.Event()
+
+            def run() -> None:
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            _loop_thread = threading.Thread(target=run, name="pubxel-asyncio", daemon=True)
+            _loop_thread.start()
+            ready.wait()
+            _loop = loop
+        return _loop
+
+
+def submit(coro: Coroutine[Any, Any, T]) -> "concurrent.futures.Future[T]":
+    """Schedule ``coro`` on the shared loop from any thread; ``cancel()`` the result to stop it."""
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop())
+
+
+def shutdown_event_loop(timeout: float = 2.0) -> None:
+    global _loop, _loop_thread, _executor, _fetch_executor
+    with _loop_lock:
+        loop, thread, executors = _loop, _loop_thread, (_executor, _fetch_executor)
+        _loop = _loop_thread = _executor = _fetch_executor = None
+    if loop is None:
+        return
+    loop.call_soon_threadsafe(loop.stop)
+    if thread is not None:
+        thread.join(timeout)
+    for executor in executors:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def iter_metadata_for_pmids(
+    PMID_list: Union[str, List[str]],
+    timeout: Optional[float] = None,
+    on_fetch_start: Optional[Callable[[], None]] = None,
+    fields: Optional[Iterable[str]] = None,
+) -> AsyncIterator[MetadataDict]:
+    """
+    Resolve PMIDs cache-first, yielding metadata as it becomes available.
+
+    The first item holds every PMID already in SQLite; later items hold only the
+    PMIDs newly fetched from PubMed since the previous item. Cancelling the
+    consuming task (or exceeding ``timeout`` seconds, which raises
+    ``asyncio.TimeoutError``) stops the remaining downloads. ``on_fetch_start``
+    is called on the loop thread just before a PubMed fetch begins. Cached rows
+    past their TTL are refreshed in the background, as in the sync resolver.
+    ``fields`` limits what is read for cached PMIDs (see ``load_cached_metadata``).
+    """
+    pmids = normalize_pmid_list(PMID_list)
+    if not pmids:
+        return
+
+    loop = asyncio.get_running_loop()
+    deadline = None if timeout is None else loop.time() + timeout
+
+    def remaining() -> Optional[float]:
+        return None if deadline is None else max(0.0, deadline - loop.time())
+
+    cached, missing = await asyncio.wait_for(
+        loop.run_in_executor(None, load_cached_metadata, pmids, fields), remaining()
+    )
+    if cached:
+        schedule_stale_refresh(cached)
+        yield cached
+    if not missing:
+        return
+    if pubmed_circuit.is_open:
+        print(f"PubMed circuit open; returning {len(cached)} cached article(s) only")
+        return
+
+    if on_fetch_start:
+        on_fetch_start()
+    queue: asyncio.Queue = asyncio.Queue()
+    cancel_event = threading.Event()
+
+    def on_partial(fetched: MetadataDict) -> None:
+        loop.call_soon_threadsafe(queue.put_nowait, fetched)
+
+    fetch = loop.run_in_executor(_fetch_executor, lambda: obtain_pubmed_data(missing, on_partial, cancel_event))
+    fetch.add_done_callback(lambda _: queue.put_nowait(_DONE))
+
+    seen = set(cached)
+    try:
+        while True:
+            item = await asyncio.wait_for(queue.get(), remaining())
+            if item is _DONE:
+                break
+            fresh = {pmid: entry for pmid, entry in item.items() if pmid not in seen}
+            if fresh:
+                seen.update(fresh)
+                yield fresh
+        fetched = await fetch
+        fresh = {pmid: entry for pmid, entry in fetched.items() if pmid not in seen}
+        if fresh:
+            yield fresh
+    finally:
+        if not fetch.done():
+            cancel_event.set()
+
+
+async def aresolve_metadata_for_pmids(
+    PMID_list: Union[str, List[str]],
+    timeout: Optional[float] = None,
+) -> MetadataDict:
+    """Collect ``iter_metadata_for_pmids`` into one dict (async ``resolve_metadata_for_pmids``)."""
+    merged: MetadataDict = {}
+    async for chunk in iter_metadata_for_pmids(PMID_list, timeout=timeout):
+        merged.update(chunk)
+    return merged
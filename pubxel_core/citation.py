@@ -0,0 +1,265 @@
+# Pub-Xel - A Biomedical Reference Management Tool
+# Copyright (C) 2024  Jongyeob Kim <info@pubxel.org>
+#
+# Citation formats for the worksheet Citation/Citation<year> columns.
+#
+# A format is text with {field} placeholders (see CITATION_FIELDS) and
+# optional [...] sections that are dropped unless every field inside them is
+# non-empty; write [[ ]] {{ }} for literal brackets/braces:
+#
+#   "{authors_vancouver}. {title} {journal}[ (IF: {impact_factor})]. {year}[;{volume}][({issue})][:{page}]."
+#
+# Formats are compiled once (compile_citation_format is memoized). Settings:
+# "citation_format" names a built-in or user format (or is a format string
+# itself); "citation_formats" maps user format names to format strings.
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Set, Tuple
+
+# Placeholder -> metadata fields it is built from (see metadata_projection).
+CITATION_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "pmid": (),
+    "authors_etal": ("firstauthorlastnameetal",),
+    "authors": ("authors",),
+    "authors_vancouver": ("authors",),
+    "authors_apa": ("authors",),
+    "authoryear": ("authoryear",),
+    "title": ("title",),
+    "journal": ("journal",),
+    "fulljournal": ("fulljournal",),
+    "source": ("source",),
+    "source_if": ("source", "journal"),
+    "year": ("year",),
+    "date": ("date",),
+    "volume": ("volume",),
+    "issue": ("issue",),
+    "page": ("page",),
+    "doi": ("doi",),
+    "impact_factor": (),
+}
+# Placeholders that differ between Citation and Citation<year> columns.
+_IMPACT_FACTOR_FIELDS = frozenset({"impact_factor", "source_if"})
+
+DEFAULT_CITATION_FORMAT = "NLM"
+BUILTIN_CITATION_FORMATS: Dict[str, str] = {
+    # The original worksheet citation:
+    # "Polack et al. Title. N Engl J Med (IF: 84.5). 2020 Dec 31;383(27):2603-2615. PMID: 33301246."
+    "NLM": "{authors_etal}. {title} {source_if} PMID: {pmid}.",
+    "Vancouver": (
+        "{authors_vancouver}. {title} {journal}[ (IF: {impact_factor})]. {year}"
+        "[;{volume}][({issue})][:{page}]."
+    ),
+    "APA": (
+        "{authors_apa} ({year}). {title} {fulljournal}[ (IF: {impact_factor})]"
+        "[, {volume}][({issue})][, {page}].[ https://doi.org/{doi}]"
+    ),
+}
+
+VANCOUVER_MAX_AUTHORS = 6
+APA_MAX_AUTHORS = 20
+
+_TOKEN_RE = re.compile(r"\[\[|\]\]|\{\{|\}\}|\{(\w*)\}|\[|\]|[{}]|[^\[\]{}]+")
+
+# Compiled parts: (_LITERAL, text) | (_FIELD, name) | (_OPTIONAL, (fields, parts))
+_LITERAL, _FIELD, _OPTIONAL = 0, 1, 2
+
+
+def _format_error(format_string: str, reason: str) -> ValueError:
+    return ValueError(f"Citation Format Error.\n{reason} in citation format: {format_string!r}")
+
+
+def _compile_parts(format_string: str) -> Tuple[Tuple[Any, ...], Set[str]]:
+    parts: List[Tuple[int, Any]] = []
+    group: Optional[List[Tuple[int, Any]]] = None
+    group_fields: Set[str] = set()
+    fields: Set[str] = set()
+    for match in _TOKEN_RE.finditer(format_string):
+        token = match.group(0)
+        target = parts if group is None else group
+        if token in ("[[", "]]", "{{", "}}"):
+            target.append((_LITERAL, token[0]))
+        elif match.group(1) is not None:
+            name = match.group(1)
+            if name not in CITATION_FIELDS:
+                raise _format_error(format_string, f"Unknown field {{{name}}}")
+            target.append((_FIELD, name))
+            fields.add(name)
+            if group is not None:
+                group_fields.add(name)
+        elif token == "[":
+            if group is not None:
+                raise _format_error(format_string, "Nested [ ]")
+            group, group_fields = [], set()
+        elif token == "]":
+            if group is None:
+                raise _format_error(format_string, "Unmatched ]")
+            parts.append((_OPTIONAL, (frozenset(group_fields), tuple(group))))
+            group = None
+        elif token in ("{", "}"):
+            raise _format_error(format_string, f"Unmatched {token}")
+        else:
+            target.append((_LITERAL, token))
+    if group is not None:
+        raise _format_error(format_string, "Unmatched [")
+    return tuple(parts), fields
+
+
+def _render_parts(parts: Sequence[Tuple[int, Any]], values: Mapping[str, str]) -> str:
+    out: List[str] = []
+    for kind, payload in parts:
+        if kind == _LITERAL:
+            out.append(payload)
+        elif kind == _FIELD:
+            out.append(values[payload])
+        else:
+            group_fields, group = payload
+            if all(values[name] for name in group_fields):
+                out.append(_render_parts(group, values))
+    return "".join(out)
+
+
+def _author_name(author: Mapping[str, Any]) -> str:
+    return author.get("short_name") or author.get("full_name") or ""
+
+
+def _apa_name(author: Mapping[str, Any]) -> str:
+    full_name = author.get("full_name") or ""
+    last, sep, given = full_name.partition(",")
+    if not sep or author.get("author_type") == "CORPORATE":
+        return full_name or author.get("short_name") or ""
+    initials = " ".join(f"{part[0]}." for part in given.replace("-", " ").split() if part)
+    return f"{last.strip()}, {initials}" if initials else last.strip()
+
+
+def _vancouver_authors(authors: Sequence[Mapping[str, Any]]) -> str:
+    names = [name for name in (_author_name(a) for a in authors) if name]
+    if len(names) > VANCOUVER_MAX_AUTHORS:
+        return ", ".join(names[:VANCOUVER_MAX_AUTHORS]) + ", et al"
+    return ", ".join(names)
+
+
+def _apa_authors(authors: Sequence[Mapping[str, Any]]) -> str:
+    names = [name for name in (_apa_name(a) for a in authors) if name]
+    if len(names) <= 1:
+        return "".join(names)
+    if len(names) > APA_MAX_AUTHORS:
+        return ", ".join(names[:APA_MAX_AUTHORS - 1]) + ", ... " + names[-1]
+    return ", ".join(names[:-1]) + ", & " + names[-1]
+
+
+def insert_impact_factor(source: str, journal: str, impact_factor: str) -> str:
+    """``source`` with " (IF: x)" after the first occurrence of ``journal``."""
+    if not impact_factor:
+        return source
+    return source.replace(journal, f"{journal} (IF: {impact_factor})", 1)
+
+
+class CitationTemplate:
+    """A compiled citation format; use compile_citation_format to get one."""
+
+    def __init__(self, format_string: str):
+        self.format_string = format_string
+        self._parts, self.fields = _compile_parts(format_string)
+        self._uses_impact_factor = bool(self.fields & _IMPACT_FACTOR_FIELDS)
+        self.metadata_fields = frozenset(
+            source for name in self.fields for source in CITATION_FIELDS[name]
+        )
+
+    def field_values(
+        self,
+        pmid: str,
+        article: Mapping[str, Any],
+        authors: Sequence[Mapping[str, Any]],
+    ) -> Dict[str, str]:
+        """Placeholder values for one article (without the impact factor)."""
+        values: Dict[str, str] = {}
+        for name in self.fields:
+            if name == "pmid":
+                values[name] = pmid
+            elif name == "authors_etal":
+                values[name] = (article.get("firstauthorlastnameetal") or "").rstrip(".")
+            elif name == "authors":
+                values[name] = ", ".join(n for n in (_author_name(a) for a in authors) if n)
+            elif name == "authors_vancouver":
+                values[name] = _vancouver_authors(authors)
+            elif name == "authors_apa":
+                values[name] = _apa_authors(authors)
+            elif name in ("source", "source_if"):
+                values[name] = (article.get("source") or "").rstrip()
+            elif name != "impact_factor":
+                values[name] = str(article.get(name) or "")
+        return values
+
+    def render(self, values: Mapping[str, str], journal: str = "", impact_factor: str = "") -> str:
+        if self._uses_impact_factor:
+            values = dict(values, impact_factor=impact_factor)
+            if "source_if" in values:
+                values["source_if"] = insert_impact_factor(values["source_if"], journal, impact_factor)
+        return _render_parts(self._parts, values)
+
+    def render_variants(
+        self,
+        pmid: str,
+        article: Mapping[str, Any],
+        authors: Sequence[Mapping[str, Any]],
+        impact_factors: Mapping[str, str],
+    ) -> Dict[str, str]:
+        """
+        Render one citation per ``impact_factors`` key (e.g. ``{"cite": "",
+        "cite2025": "84.5"}``). Field values are computed once per article and
+        variants with the same impact factor share one render.
+        """
+        values = self.field_values(pmid, article, authors)
+        journal = article.get("journal") or ""
+        rendered: Dict[str, str] = {}
+        result: Dict[str, str] = {}
+        for key, impact_factor in impact_factors.items():
+            impact_factor = impact_factor if self._uses_impact_factor else ""
+            if impact_factor not in rendered:
+                rendered[impact_factor] = self.render(values, journal, impact_factor)
+            result[key] = rendered[impact_factor]
+        return result
+
+    def __repr__(self) -> str:
+        return f"CitationTemplate({self.format_string!r})"
+
+
+@lru_cache(maxsize=32)
+def compile_citation_format(format_string: str) -> CitationTemplate:
+    """Compile (once) a citation format; raises ValueError for malformed formats."""
+    return CitationTemplate(format_string)
+
+
+def citation_formats(settings: Optional[Mapping[str, Any]] = None) -> Dict[str, str]:
+    """Built-in formats plus the user's ``citation_formats`` from settings."""
+    formats = dict(BUILTIN_CITATION_FORMATS)
+    user_formats = (settings or {}).get("citation_formats") or {}
+    if isinstance(user_formats, dict):
+        formats.update({str(k): str(v) for k, v in user_formats.items() if v})
+    return formats
+
+
+def citation_template_from_settings(settings: Optional[Mapping[str, Any]]) -> CitationTemplate:
+    """Template named by ``citation_format`` (falls back to NLM if unknown or malformed)."""
+    choice = str((settings or {}).get("citation_format") or DEFAULT_CITATION_FORMAT).strip()
+    formats = citation_formats(settings)
+    format_string = formats.get(choice)
+    if format_string is None:
+        if "{" not in choice:
+            print(f"Unknown citation_format {choice!r}; using {DEFAULT_CITATION_FORMAT}")
+        format_string = choice if "{" in choice else formats[DEFAULT_CITATION_FORMAT]
+    try:
+        return compile_citation_format(format_string)
+    except ValueError as e:
+        print(e)
+        return compile_citation_format(BUILTIN_CITATION_FORMATS[DEFAULT_CITATION_FORMAT])
+
+
+def get_citation_template() -> CitationTemplate:
+    """Template for the current settings (read on every call, so format changes apply at once)."""
+    from pubxel_core import runtime as rt
+
+    return citation_template_from_settings(rt.settings)
@@ -0,0 +1,138 @@
+# Pub-Xel - A Biomedical Reference Management Tool
+# Copyright (C) 2024  Jongyeob Kim <info@pubxel.org>
+#
+# Shared HTTP session for all network traffic (NCBI, update check). One
+# keep-alive connection pool per process, created lazily on first use.
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 10.0
+
+_config: Dict[str, Any] = {
+    "pool_size": DEFAULT_POOL_SIZE,
+    "connect_timeout": DEFAULT_CONNECT_TIMEOUT,
+    "read_timeout": DEFAULT_READ_TIMEOUT,
+}
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+_stats: Dict[str, Dict[str, float]] = {}
+_stats_lock = threading.Lock()
+
+
+def configure(
+    pool_size: Optional[int] = None,
+    connect_timeout: Optional[float] = None,
+    read_timeout: Optional[float] = None,
+) -> None:
+    """Update pool size / default timeouts. The session is rebuilt on next use."""
+    if pool_size is not None:
+        _config["pool_size"] = max(1, int(pool_size))
+    if connect_timeout is not None:
+        _config["connect_timeout"] = float(connect_timeout)
+    if read_timeout is not None:
+        _config["read_timeout"] = float(read_timeout)
+    close_session()
+
+
+def configure_from_settings(settings: Dict[str, Any]) -> None:
+    """Apply ``http_pool_size`` / ``http_connect_timeout`` / ``http_read_timeout`` settings."""
+    try:
+        configure(
+            pool_size=settings.get("http_pool_size"),
+            connect_timeout=settings.get("http_connect_timeout"),
+            read_timeout=settings.get("http_read_timeout"),
+        )
+    except (TypeError, ValueError) as e:
+        print(f"Invalid HTTP settings, using defaults: {e}")
+
+
+def default_timeout() -> Tuple[float, float]:
+    return (_config["connect_timeout"], _config["read_timeout"])
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=_config["pool_size"],
+                pool_maxsize=_config["pool_size"],
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(
+                {
+                    "Accept-Encoding": "gzip, deflate",
+                    "Connection": "keep-alive",
+                    "User-Agent": "Pub-Xel (https://pubxel.org)",
+                }
+            )
+            _session = session
+        return _session
+
+
+def close_session() -> None:
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def _record(host: str, elapsed: float, failed: bool) -> None:
+    with _stats_lock:
+        entry = _stats.setdefault(
+            host,
+            {"requests": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0, "last_seconds": 0.0},
+        )
+        entry["requests"] += 1
+        if failed:
+            entry["errors"] += 1
+        entry["total_seconds"] += elapsed
+        entry["last_seconds"] = elapsed
+        if elapsed > entry["max_seconds"]:
+            entry["max_seconds"] = elapsed
+
+
+def request_stats() -> Dict[str, Dict[str, float]]:
+    """Per-host request counters: requests, errors, total/max/last seconds."""
+    with _stats_lock:
+        return {host: dict(entry) for host, entry in _stats.items()}
+
+
+def reset_request_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
+
+
+def get(url: str, timeout: Any = None, **kwargs: Any) -> requests.Response:
+    """``requests.get`` through the shared session, with timing counters.
+
+    ``timeout`` defaults to the configured ``(connect, read)`` pair. Exceptions
+    from ``requests`` propagate unchanged.
+    """
+    if timeout is None:
+        timeout = default_timeout()
+    host = urlsplit(url).netloc
+    failed = True
+    start = time.perf_counter()
+    try:
+        response = get_session().get(url, timeout=timeout, **kwargs)
+        failed = not response.ok
+        return response
+    finally:
+        _record(host, time.perf_counter() - start, failed)
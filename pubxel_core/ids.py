@@ -8,7 +8,7 @@
 
 import os
 import re
-from typing import Iterable, List, Optional
+from typing import Iterable, List, Optional, Union
 
 # PMIDs in PubMed article URLs (modern /pubmed/ legacy paths).
 _PUBMED_URL_PMID = re.compile(
@@ -29,6 +29,14 @@ def set_preserve_order(input_list: Iterable[str]) -> List[str]:
     return [x for x in input_list if not (x in seen or seen.add(x))]
 
 
+def normalize_pmid(pmid: Union[str, int]) -> str:
+    """Normalize a single PMID/accession for SQLite and metadata dict keys."""
+    s = str(pmid).strip()
+    if not s.isnumeric() or len(s) > 9:
+        return s
+    return s.lstrip("0") or "0"
+
+
 def pmids_from_pubmed_urls_in_text(text: str) -> List[str]:
     """Extract PMIDs from PubMed article URLs in ``text`` (order preserved, deduped)."""
     if not text or not text.strip():
@@ -0,0 +1,238 @@
+# Pub-Xel - A Biomedical Reference Management Tool
+# Copyright (C) 2024  Jongyeob Kim <info@pubxel.org>
+#
+# Journal impact factors and quartiles from data/journal_combined_2025.txt.
+# The table is parsed once per process and re-read only when the file's mtime
+# or size changes; every IF_<year>/q_<year> column in the header is kept.
+# Articles are matched by exact NLM abbreviation first, then by ISSN/eISSN,
+# then by normalized abbreviation, then by normalized full journal title.
+# ISSNs and normalized names shared by several journals in the table (e.g. the
+# NEPHRON series on one print ISSN) are not used as keys.
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from pubxel_core.paths import journal_combined_path
+
+_IF_COLUMN_RE = re.compile(r"^IF_(\d{4})$")
+_Q_COLUMN_RE = re.compile(r"^q_(\d{4})$")
+_ISSN_RE = re.compile(r"\b(\d{4})-?(\d{3}[\dX])\b", re.IGNORECASE)
+_NON_WORD_RE = re.compile(r"[\W_]+", re.UNICODE)
+LEGACY_IMPACT_FACTOR_YEARS = ("2022", "2023", "2024", "2025")
+
+# JournalMetricsIndex.match() key kinds, in lookup order.
+MATCH_ABBREVIATION = "abbreviation"
+MATCH_ISSN = "issn"
+MATCH_NORMALIZED_ABBREVIATION = "normalized abbreviation"
+MATCH_TITLE = "title"
+
+
+def normalize_journal_abbreviation(journal: Any) -> str:
+    """Lookup key for the ``abb`` column (NLM abbreviation, uppercased, no trailing period)."""
+    return str(journal or "").upper().strip().rstrip(".")
+
+
+def normalize_journal_name(name: Any) -> str:
+    """Loose key for abbreviations and titles: uppercase words, no punctuation, no leading "THE"."""
+    text = str(name or "").upper().replace("&", " AND ")
+    key = " ".join(_NON_WORD_RE.sub(" ", text).split())
+    return key[4:] if key.startswith("THE ") else key
+
+
+def normalize_issns(value: Any) -> List[str]:
+    """ISSNs in ``value`` as ``NNNN-NNNC``; accepts MEDLINE ``IS`` values such as
+    ``"0028-4793 (Print)|1533-4406 (Electronic)"``."""
+    return [f"{a}-{b.upper()}" for a, b in _ISSN_RE.findall(str(value or ""))]
+
+
+class JournalMetrics:
+    """One journal line: identifiers plus impact factor/quartile per year."""
+
+    __slots__ = ("abbreviation", "title", "issn", "eissn", "publisher", "impact_factors", "quartiles")
+
+    def __init__(
+        self,
+        abbreviation: str,
+        title: str = "",
+        issn: str = "",
+        eissn: str = "",
+        publisher: str = "",
+        impact_factors: Optional[Dict[str, str]] = None,
+        quartiles: Optional[Dict[str, str]] = None,
+    ):
+        self.abbreviation = abbreviation
+        self.title = title
+        self.issn = issn
+        self.eissn = eissn
+        self.publisher = publisher
+        self.impact_factors = impact_factors or {}
+        self.quartiles = quartiles or {}
+
+    def impact_factor(self, year: str) -> str:
+        return self.impact_factors.get(year, "")
+
+    def quartile(self, year: str) -> str:
+        return self.quartiles.get(year, "")
+
+    def __repr__(self) -> str:
+        return f"JournalMetrics({self.abbreviation!r}, if={self.impact_factors!r}, q={self.quartiles!r})"
+
+
+def _unique_keys(
+    pairs: Iterable[Tuple[str, JournalMetrics]],
+) -> Tuple[Dict[str, JournalMetrics], FrozenSet[str]]:
+    """``(key -> journal for keys of exactly one journal, keys shared by several)``."""
+    index: Dict[str, JournalMetrics] = {}
+    shared: Set[str] = set()
+    for key, metrics in pairs:
+        if not key or key in shared:
+            continue
+        other = index.setdefault(key, metrics)
+        if other is not metrics:
+            del index[key]
+            shared.add(key)
+    return index, frozenset(shared)
+
+
+class JournalMetricsIndex:
+    """
+    Parsed journal table; ``years`` lists every year with an IF_ or q_ column.
+    ``shared_issns`` are ISSNs listed for more than one journal (not matched on).
+    """
+
+    def __init__(self, years: Tuple[str, ...], journals: Dict[str, JournalMetrics]):
+        self.years = years
+        self._by_abbreviation = journals
+        self._by_issn, self.shared_issns = _unique_keys(
+            (issn, metrics)
+            for metrics in journals.values()
+            for issn in normalize_issns(metrics.issn) + normalize_issns(metrics.eissn)
+        )
+        self._by_normalized_abbreviation, _ = _unique_keys(
+            (normalize_journal_name(metrics.abbreviation), metrics) for metrics in journals.values()
+        )
+        self._by_title, _ = _unique_keys(
+            (normalize_journal_name(metrics.title), metrics) for metrics in journals.values()
+        )
+        self._legacy: Optional[Dict[str, Tuple[str, ...]]] = None
+
+    def get(self, journal: Any) -> Optional[JournalMetrics]:
+        """Exact ``abb`` lookup only (the pre-ISSN behaviour); see ``lookup``."""
+        return self._by_abbreviation.get(normalize_journal_abbreviation(journal))
+
+    def match(
+        self,
+        journal: Any = None,
+        issn: Any = None,
+        title: Any = None,
+    ) -> Tuple[Optional[JournalMetrics], str]:
+        """
+        Find an article's journal from its ``journal`` (MEDLINE TA), ``issn`` (IS)
+        and ``title`` (JT) fields. Returns ``(metrics or None, MATCH_* kind or "")``.
+        """
+        if journal:
+            metrics = self._by_abbreviation.get(normalize_journal_abbreviation(journal))
+            if metrics is not None:
+                return metrics, MATCH_ABBREVIATION
+        for value in normalize_issns(issn):
+            metrics = self._by_issn.get(value)
+            if metrics is not None:
+                return metrics, MATCH_ISSN
+        if journal:
+            metrics = self._by_normalized_abbreviation.get(normalize_journal_name(journal))
+            if metrics is not None:
+                return metrics, MATCH_NORMALIZED_ABBREVIATION
+        if title:
+            metrics = self._by_title.get(normalize_journal_name(title))
+            if metrics is not None:
+                return metrics, MATCH_TITLE
+        return None, ""
+
+    def lookup(self, journal: Any = None, issn: Any = None, title: Any = None) -> Optional[JournalMetrics]:
+        return self.match(journal, issn, title)[0]
+
+    def __len__(self) -> int:
+        return len(self._by_abbreviation)
+
+    def journals(self) -> Iterable[JournalMetrics]:
+        return self._by_abbreviation.values()
+
+    def legacy_impact_factor_dict(self) -> Dict[str, Tuple[str, ...]]:
+        """``{abb: (IF_2022, q_2022, ..., IF_2025, q_2025)}`` as load_impact_factor_dict returned."""
+        if self._legacy is None:
+            legacy: Dict[str, Tuple[str, ...]] = {}
+            for abb, metrics in self._by_abbreviation.items():
+                values = tuple(
+                    value
+                    for year in LEGACY_IMPACT_FACTOR_YEARS
+                    for value in (metrics.impact_factor(year), metrics.quartile(year))
+                )
+                if any(values):
+                    legacy[abb] = values
+            self._legacy = legacy
+        return self._legacy
+
+
+def parse_journal_table(path: str = journal_combined_path) -> JournalMetricsIndex:
+    """Parse a tab-separated journal table (header row first; ``abb`` column required)."""
+    with open(path, "r", encoding="utf8") as file:
+        header_line = file.readline()
+        header = [h.strip() for h in header_line.rstrip("\r\n").split("\t")]
+        hidx = {name: i for i, name in enumerate(header)}
+        if "abb" not in hidx:
+            return JournalMetricsIndex((), {})
+
+        if_columns: Dict[str, int] = {}
+        q_columns: Dict[str, int] = {}
+        for name, i in hidx.items():
+            match = _IF_COLUMN_RE.match(name)
+            if match:
+                if_columns[match.group(1)] = i
+            match = _Q_COLUMN_RE.match(name)
+            if match:
+                q_columns[match.group(1)] = i
+        years = tuple(sorted(set(if_columns) | set(q_columns)))
+        abb_i = hidx["abb"]
+        text_columns = [hidx.get(name, -1) for name in ("pubmed_journal", "pubmed_issn", "pubmed_eissn", "Publisher")]
+
+        journals: Dict[str, JournalMetrics] = {}
+        for line in file:
+            parts = line.rstrip("\r\n").split("\t")
+            n = len(parts)
+            abb = parts[abb_i].strip() if abb_i < n else ""
+            if not abb:
+                continue
+            title, issn, eissn, publisher = (parts[i].strip() if 0 <= i < n else "" for i in text_columns)
+            impact_factors = {year: parts[i].strip() for year, i in if_columns.items() if i < n}
+            quartiles = {year: parts[i].strip() for year, i in q_columns.items() if i < n}
+            journals[abb] = JournalMetrics(
+                abb,
+                title,
+                issn,
+                eissn,
+                publisher,
+                {year: value for year, value in impact_factors.items() if value},
+                {year: value for year, value in quartiles.items() if value},
+            )
+    return JournalMetricsIndex(years, journals)
+
+
+_index_lock = threading.Lock()
+_indexes: Dict[str, Tuple[Tuple[int, int], JournalMetricsIndex]] = {}
+
+
+def get_journal_metrics(path: str = journal_combined_path) -> JournalMetricsIndex:
+    """Process-wide index for ``path``, re-parsed when the file's mtime or size changes."""
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _index_lock:
+        cached = _indexes.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        index = parse_journal_table(path)
+        _indexes[path] = (stamp, index)
+        return index
@@ -0,0 +1,235 @@
+# Pub-Xel - A Biomedical Reference Management Tool
+# Copyright (C) 2024  Jongyeob Kim <info@pubxel.org>
+#
+# Single-pass MEDLINE tokenizer shared by every importer (PubMed fetch, nbib).
+# Records are parsed line by line and yielded as SQLite-ready rows, so memory
+# use does not grow with the size of the input.
+
+from __future__ import annotations
+
+import codecs
+import datetime
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from pubxel_core.ids import normalize_pmid
+from pubxel_core.metadata_store import ArticleRow, AuthorRow
+
+MedlineRecord = Tuple[ArticleRow, List[AuthorRow]]
+
+_CONTINUATION = "      "
+_YEAR_RE = re.compile(r"\b(\d{4})\b")
+
+# MEDLINE tag -> article column, in ArticleRow order (accession/pmid/link/
+# year/doi/retrievedate are derived separately).
+_TAG_COLUMNS = {
+    "TI": "title",
+    "AB": "abstract",
+    "TA": "journal",
+    "SO": "source",
+    "DP": "date",
+    "VI": "volume",
+    "IP": "issue",
+    "PG": "page",
+    "LA": "language",
+    "PT": "publicationtype",
+    "JT": "fulljournal",
+    "IS": "issn",
+    "SI": "si",
+    "GR": "gr",
+    "CIN": "cin",
+    "OWN": "provider",
+}
+
+
+def _empty_to_none(value: Any) -> Any:
+    if value is None:
+        return None
+    if isinstance(value, str) and value.strip() == "":
+        return None
+    return value
+
+
+def _first_doi(aid_values: List[str]) -> str:
+    for v in aid_values:
+        if v.endswith(" [doi]"):
+            return v[:-6]
+    return ""
+
+
+def iter_medline_lines(source: Iterable[Union[str, bytes]]) -> Iterator[str]:
+    """
+    Normalize ``source`` into lines without terminators.
+
+    ``str`` items are lines (one trailing ``\\n`` or ``\\r\\n`` is dropped; embedded
+    newlines are split); ``bytes`` items are raw UTF-8 chunks that may break
+    lines or multi-byte characters anywhere.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = ""
+    for item in source:
+        if isinstance(item, str):
+            if pending:
+                yield from _split_lines(pending)
+                pending = ""
+            yield from _split_lines(item[:-1] if item.endswith("\n") else item)
+            continue
+        pending += decoder.decode(item)
+        if "\n" in pending:
+            head, pending = pending.rsplit("\n", 1)
+            yield from _split_lines(head)
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield from _split_lines(pending)
+
+
+def _split_lines(text: str) -> Iterator[str]:
+    for line in text.split("\n"):
+        yield line.rstrip("\r")
+
+
+class _RecordBuilder:
+    """Accumulates the fields of one record as its lines arrive."""
+
+    __slots__ = ("fields", "aids", "authors", "_tag", "_value")
+
+    def __init__(self) -> None:
+        self.fields: Dict[str, str] = {}
+        self.aids: List[str] = []
+        self.authors: List[List[Optional[str]]] = []
+        self._tag: Optional[str] = None
+        self._value = ""
+
+    @property
+    def empty(self) -> bool:
+        return self._tag is None and not self.fields
+
+    def start(self, tag: str, value: str) -> None:
+        self._finish_field()
+        self._tag = tag
+        self._value = value
+
+    def extend(self, text: str) -> None:
+        if self._tag is None:
+            return
+        if self._value.endswith(" "):
+            self._value = self._value[:-1]
+        self._value += " " + text
+
+    def _finish_field(self) -> None:
+        tag = self._tag
+        if tag is None:
+            return
+        value = self._value.rstrip()
+        self._tag = None
+        self._value = ""
+
+        if tag in self.fields:
+            self.fields[tag] += "|" + value
+        else:
+            self.fields[tag] = value
+        if tag == "AID":
+            self.aids.append(value)
+
+        author_value = value.strip()
+        if not author_value or tag not in ("CN", "FAU", "AU"):
+            return
+        # [type, full_name, short_name]
+        if tag == "CN":
+            self.authors.append(["CORPORATE", author_value, None])
+        elif tag == "FAU":
+            self.authors.append(["PERSON", author_value, None])
+        else:
+            for author in reversed(self.authors):
+                if author[0] == "PERSON" and author[2] is None:
+                    author[2] = author_value
+                    break
+            else:
+                self.authors.append(["PERSON", None, author_value])
+
+    def build(self, retrievedate: str) -> Optional[MedlineRecord]:
+        self._finish_field()
+        raw_pmid = self.fields.get("PMID", "").strip()
+        if not raw_pmid:
+            return None
+        pmid = normalize_pmid(raw_pmid)
+        fields = self.fields
+        col = {name: _empty_to_none(fields.get(tag, "")) for tag, name in _TAG_COLUMNS.items()}
+
+        year = None
+        if col["date"]:
+            m_year = _YEAR_RE.search(col["date"])
+            if m_year:
+                year = m_year.group(1)
+
+        article_row: ArticleRow = (
+            pmid,
+            pmid,
+            col["title"],
+            col["abstract"],
+            col["journal"],
+            year,
+            col["source"],
+            col["date"],
+            _empty_to_none(_first_doi(self.aids)),
+            f"https://pubmed.ncbi.nlm.nih.gov/{pmid}",
+            col["volume"],
+            col["issue"],
+            col["page"],
+            col["language"],
+            col["publicationtype"],
+            col["fulljournal"],
+            col["issn"],
+            col["si"],
+            col["gr"],
+            col["cin"],
+            retrievedate,
+            col["provider"],
+        )
+        author_rows: List[AuthorRow] = [
+            (pmid, idx, author_type, _empty_to_none(full_name), _empty_to_none(short_name))
+            for idx, (author_type, full_name, short_name) in enumerate(self.authors, start=1)
+        ]
+        return article_row, author_rows
+
+
+def iter_medline_records(
+    source: Iterable[Union[str, bytes]],
+    retrievedate: Optional[str] = None,
+    missing_pmid_error: Optional[str] = None,
+) -> Iterator[MedlineRecord]:
+    """
+    Parse MEDLINE text in one pass and yield ``(ArticleRow, [AuthorRow])`` per record.
+
+    ``source`` is an iterable of lines (``str``) or raw byte chunks (``bytes``),
+    e.g. an open text file or ``response.iter_content()``. Records are separated
+    by blank lines. Records without a PMID are skipped, or raise
+    ``ValueError(missing_pmid_error)`` when that message is given.
+    """
+    if retrievedate is None:
+        retrievedate = datetime.date.today().isoformat()
+
+    record = _RecordBuilder()
+    for line in iter_medline_lines(source):
+        if not line.strip():
+            if not record.empty:
+                built = record.build(retrievedate)
+                if built is not None:
+                    yield built
+                elif missing_pmid_error:
+                    raise ValueError(missing_pmid_error)
+                record = _RecordBuilder()
+            continue
+        if line.startswith(_CONTINUATION):
+            record.extend(line[len(_CONTINUATION):])
+            continue
+        if "- " in line:
+            tag, value = line.split("- ", 1)
+            record.start(tag.rstrip(), value)
+
+    if not record.empty:
+        built = record.build(retrievedate)
+        if built is not None:
+            yield built
+        elif missing_pmid_error:
+            raise ValueError(missing_pmid_error)
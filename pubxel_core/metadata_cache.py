@@ -0,0 +1,132 @@
+# Pub-Xel - A Biomedical Reference Management Tool
+# Copyright (C) 2024  Jongyeob Kim <info@pubxel.org>
+#
+# In-memory LRU of enriched article records, kept per metadata database by
+# MetadataStorePool. Repeated lookups of the same PMIDs within a session
+# (inspect windows, worksheet builds, re-reads after an upsert) are served
+# without touching SQLite; upserts invalidate the affected accessions.
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+METADATA_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Rough per-object overheads (CPython, 64-bit) used to estimate entry sizes.
+_ENTRY_OVERHEAD = 400
+_FIELD_OVERHEAD = 80
+_AUTHOR_OVERHEAD = 400
+
+
+def _entry_size(entry: Dict[str, Any]) -> int:
+    size = _ENTRY_OVERHEAD
+    for value in (entry.get("article") or {}).values():
+        size += _FIELD_OVERHEAD + (len(value) if isinstance(value, str) else 0)
+    for author in entry.get("authors") or ():
+        size += _AUTHOR_OVERHEAD + sum(len(v) for v in author.values() if isinstance(v, str))
+    return size
+
+
+def _copy_entry(entry: Dict[str, Any]) -> Dict[str, Any]:
+    # Article dicts/ArticleRecords are mutable and copied; AuthorRecord.copy()
+    # returns the (immutable) record itself.
+    article = entry.get("article")
+    return {
+        "article": article.copy() if article is not None else {},
+        "authors": [a.copy() for a in entry.get("authors") or ()],
+    }
+
+
+class MetadataCache:
+    """Thread-safe LRU of complete metadata entries, bounded by estimated bytes."""
+
+    def __init__(self, max_bytes: int = METADATA_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._generation = 0
+
+    @property
+    def generation(self) -> int:
+        """Bumped by every invalidation; pass it to put_many to drop racing reads."""
+        return self._generation
+
+    def get_many(self, accessions: Iterable[str]) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+        """Return ``(copies of cached entries, accessions not cached)``."""
+        found: Dict[str, Dict[str, Any]] = {}
+        missing: List[str] = []
+        with self._lock:
+            for accession in accessions:
+                item = self._entries.get(accession)
+                if item is None:
+                    missing.append(accession)
+                    continue
+                self._entries.move_to_end(accession)
+                found[accession] = item[0]
+            self.hits += len(found)
+            self.misses += len(missing)
+        return {accession: _copy_entry(entry) for accession, entry in found.items()}, missing
+
+    def put_many(self, data: Dict[str, Dict[str, Any]], generation: Optional[int] = None) -> None:
+        """
+        Cache complete entries (never projected ones), evicting the least
+        recently used. With ``generation`` (read before loading ``data``) nothing
+        is cached if an upsert invalidated entries in the meantime.
+        """
+        if self.max_bytes <= 0:
+            return
+        items = [(accession, _copy_entry(entry)) for accession, entry in data.items()]
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            for accession, entry in items:
+                size = _entry_size(entry)
+                if size > self.max_bytes:
+                    continue
+                old = self._entries.pop(accession, None)
+                if old is not None:
+                    self._bytes -= old[1]
+                self._entries[accession] = (entry, size)
+                self._bytes += size
+            self._evict_locked()
+
+    def invalidate(self, accessions: Iterable[str]) -> None:
+        with self._lock:
+            self._generation += 1
+            for accession in accessions:
+                old = self._entries.pop(accession, None)
+                if old is not None:
+                    self._bytes -= old[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def resize(self, max_bytes: int) -> None:
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict_locked()
+
+    def _evict_locked(self) -> None:
+        while self._entries and self._bytes > max(self.max_bytes, 0):
+            _, (_, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -6,8 +6,20 @@
 # the Free Software Foundation, either version 3 of the License, or
 # (at your option) any later version.
 
+import datetime
+import hashlib
+import os
+import queue
+import re
 import sqlite3
-from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, TypeAlias
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, TypeAlias
+
+from pubxel_core.metadata_cache import METADATA_CACHE_MAX_BYTES, MetadataCache
+from pubxel_core.records import ArticleRecord, AuthorRecord
 
 ArticleRow: TypeAlias = Tuple[
     Optional[str],  # accession
@@ -36,12 +48,564 @@ ArticleRow: TypeAlias = Tuple[
 AuthorRow: TypeAlias = Tuple[str, int, str, Optional[str], Optional[str]]
 MetadataDict: TypeAlias = Dict[str, Dict[str, Any]]
 
+_RETRIEVEDATE_INDEX = 20
+
+# articles columns in ArticleRow order.
+ARTICLE_COLUMNS: Tuple[str, ...] = (
+    "accession", "pmid", "title", "abstract", "journal", "year", "source", "date",
+    "doi", "link", "volume", "issue", "page", "language", "publicationtype",
+    "fulljournal", "issn", "si", "gr", "cin", "retrievedate", "provider",
+)
+AUTHORS_FIELD = "authors"
+# Citation fields persisted at upsert time (derive_citation_fields). Author
+# changes reset them to NULL; reads recompute NULLs on the fly.
+DERIVED_COLUMNS: Tuple[str, ...] = (
+    "firstauthor", "firstauthorlastname", "firstauthorlastnameetal",
+    "authoryear", "cite", "cite_maincheckbox",
+)
+# Derived field -> the stored fields it is built from.
+DERIVED_FIELD_SOURCES: Dict[str, Tuple[str, ...]] = {
+    "firstauthor": (AUTHORS_FIELD,),
+    "firstauthorlastname": (AUTHORS_FIELD,),
+    "firstauthorlastnameetal": (AUTHORS_FIELD,),
+    "authoryear": (AUTHORS_FIELD, "year"),
+    "cite": (AUTHORS_FIELD, "year", "title", "source"),
+    "cite_maincheckbox": ("title", "source"),
+}
+
+
+def metadata_projection(fields: Optional[Iterable[str]]) -> Tuple[List[str], bool]:
+    """
+    Resolve requested metadata fields to ``(article columns to select, whether
+    authors are needed)``. ``accession`` and ``retrievedate`` (for TTL checks)
+    are always selected; ``None`` means all.
+    """
+    if fields is None:
+        return [*ARTICLE_COLUMNS, *DERIVED_COLUMNS], True
+    wanted = {"accession", "retrievedate"}
+    need_authors = False
+    for field in fields:
+        if field == AUTHORS_FIELD:
+            need_authors = True
+        elif field in ARTICLE_COLUMNS or field in DERIVED_COLUMNS:
+            wanted.add(field)
+        else:
+            raise ValueError(f"Unknown metadata field: {field}")
+    return [c for c in (*ARTICLE_COLUMNS, *DERIVED_COLUMNS) if c in wanted], need_authors
+
+# Bound parameters per IN (...) clause. Well under SQLITE_MAX_VARIABLE_NUMBER
+# (999 on older builds), so accession lists of any size are queried in chunks.
+SQLITE_IN_CHUNK = 500
+
+
+def _chunked(keys: List[str], size: int = SQLITE_IN_CHUNK) -> Iterator[List[str]]:
+    for i in range(0, len(keys), size):
+        yield keys[i:i + size]
+
+
+def content_hash(article_row: ArticleRow, author_rows: Iterable[AuthorRow]) -> str:
+    """Hash of a record's MEDLINE content (everything except retrievedate)."""
+    h = hashlib.sha1()
+    for i, value in enumerate(article_row):
+        if i != _RETRIEVEDATE_INDEX:
+            h.update(b"\x1e" if value is None else str(value).encode("utf-8"))
+        h.update(b"\x1f")
+    for row in sorted(author_rows, key=lambda r: r[1]):
+        h.update(repr(row[1:]).encode("utf-8"))
+    return h.hexdigest()
+
+
+# Large free-text columns are stored zlib-compressed (as BLOBs) once they reach
+# this many UTF-8 bytes; shorter values stay plain TEXT. Reads accept both.
+COMPRESS_MIN_BYTES = 512
+COMPRESS_LEVEL = 6
+_COMPRESSED_COLUMN_INDEXES = (3, 17, 18, 19)  # abstract, si, gr, cin in ArticleRow
+_COMPRESSED_COLUMNS = ("abstract", "si", "gr", "cin")
+
+
+def deflate_text(value: Optional[str]) -> Any:
+    if value is None:
+        return None
+    data = value.encode("utf-8")
+    if len(data) < COMPRESS_MIN_BYTES:
+        return value
+    return zlib.compress(data, COMPRESS_LEVEL)
+
+
+def inflate_text(value: Any) -> Optional[str]:
+    if isinstance(value, bytes):
+        return zlib.decompress(value).decode("utf-8")
+    return value
+
+
+def register_sql_functions(conn: sqlite3.Connection) -> None:
+    """Functions used by migrations and bulk_upsert_metadata (the schema's triggers are plain SQL)."""
+    conn.create_function("pubxel_inflate", 1, inflate_text, deterministic=True)
+    conn.create_function("pubxel_deflate", 1, deflate_text, deterministic=True)
+
+
+def _compress_row(row: Tuple[Any, ...]) -> Tuple[Any, ...]:
+    values = list(row)
+    for i in _COMPRESSED_COLUMN_INDEXES:
+        if isinstance(values[i], str):
+            values[i] = deflate_text(values[i])
+    return tuple(values)
+
+
+def _derived_values(row: Tuple[Any, ...], author_rows: Iterable[AuthorRow]) -> Tuple[str, ...]:
+    article = {"title": row[2], "year": row[5], "source": row[6]}
+    authors = [
+        {"full_name": full_name, "short_name": short_name}
+        for _, _, _, full_name, short_name in sorted(author_rows, key=lambda r: r[1])
+    ]
+    return _ordered_derived(article, authors)
+
+
+def _ordered_derived(article: Dict[str, Any], authors: List[Dict[str, Any]]) -> Tuple[str, ...]:
+    values = derive_citation_fields(article, authors)
+    return tuple(values[col] for col in DERIVED_COLUMNS)
+
+
+_FTS_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_query(text: str) -> str:
+    """
+    Turn free text into a safe FTS5 query: every word must match (the last one
+    as a prefix, for search-as-you-type). Returns "" when there is nothing to search.
+    """
+    tokens = _FTS_TOKEN_RE.findall(text)
+    if not tokens:
+        return ""
+    terms = [f'"{t}"' for t in tokens]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def _table_columns(conn: sqlite3.Connection, table: str) -> Set[str]:
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table});").fetchall()}
+
+
+def _migrate_base_schema(conn: sqlite3.Connection) -> None:
+    # Also brings pre-versioning databases (user_version 0) up to date, so
+    # every statement here must be idempotent.
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS articles (
+      accession       TEXT PRIMARY KEY,
+      pmid            TEXT,
+      title           TEXT,
+      abstract        TEXT,
+      journal         TEXT,
+      year            TEXT,
+      source          TEXT,
+      date            TEXT,
+      doi             TEXT,
+      link            TEXT,
+      volume          TEXT,
+      issue           TEXT,
+      page            TEXT,
+      language        TEXT,
+      publicationtype TEXT,
+      fulljournal     TEXT,
+      issn            TEXT,
+      si              TEXT,
+      gr              TEXT,
+      cin             TEXT,
+      retrievedate    TEXT,
+      provider        TEXT
+    );
+    """)
+    existing_cols = _table_columns(conn, "articles")
+    for col in ("si", "gr", "cin"):
+        if col not in existing_cols:
+            conn.execute(f"ALTER TABLE articles ADD COLUMN {col} TEXT;")
+
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS article_authors (
+      accession    TEXT NOT NULL,
+      author_order INTEGER NOT NULL,
+      author_type  TEXT,
+      full_name    TEXT,
+      short_name   TEXT,
+      PRIMARY KEY (accession, author_order),
+      FOREIGN KEY (accession) REFERENCES articles(accession) ON DELETE CASCADE
+    );
+    """)
+
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_pmid ON articles(pmid);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_year ON articles(year);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_doi ON articles(doi);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_journal ON articles(journal);")
+
+
+def _migrate_content_hash(conn: sqlite3.Connection) -> None:
+    if "content_hash" not in _table_columns(conn, "articles"):
+        conn.execute("ALTER TABLE articles ADD COLUMN content_hash TEXT;")
+
+
+def _migrate_authors_without_rowid(conn: sqlite3.Connection) -> None:
+    # Authors are always read by (accession, author_order): cluster the table
+    # on that key instead of keeping a rowid table plus a separate PK index.
+    conn.execute("""
+    CREATE TABLE article_authors_new (
+      accession    TEXT NOT NULL,
+      author_order INTEGER NOT NULL,
+      author_type  TEXT,
+      full_name    TEXT,
+      short_name   TEXT,
+      PRIMARY KEY (accession, author_order),
+      FOREIGN KEY (accession) REFERENCES articles(accession) ON DELETE CASCADE
+    ) WITHOUT ROWID;
+    """)
+    conn.execute("""
+    INSERT OR REPLACE INTO article_authors_new
+    SELECT accession, author_order, author_type, full_name, short_name
+    FROM article_authors;
+    """)
+    conn.execute("DROP TABLE article_authors;")
+    conn.execute("ALTER TABLE article_authors_new RENAME TO article_authors;")
+
+
+_FTS_AUTHORS_SQL = """
+    (SELECT group_concat(COALESCE(full_name, short_name), '; ')
+     FROM article_authors WHERE accession = {accession})
+"""
+
+
+def _migrate_fulltext_index(conn: sqlite3.Connection) -> None:
+    # FTS5 rows share the rowid of their articles row, so triggers can update
+    # them by key instead of scanning the (unindexed) accession column. The
+    # authors column is read when the articles row is written, which is why
+    # upsert_metadata replaces authors before it upserts articles.
+    try:
+        conn.execute("""
+        CREATE VIRTUAL TABLE articles_fts USING fts5(
+          accession UNINDEXED,
+          title,
+          abstract,
+          journal,
+          authors,
+          tokenize = 'unicode61 remove_diacritics 2'
+        );
+        """)
+    except sqlite3.OperationalError as e:
+        print(f"Full-text search unavailable (SQLite built without FTS5): {e}")
+        return
+
+    authors_new = _FTS_AUTHORS_SQL.format(accession="new.accession")
+    conn.execute(f"""
+    CREATE TRIGGER articles_fts_ai AFTER INSERT ON articles BEGIN
+      INSERT INTO articles_fts (rowid, accession, title, abstract, journal, authors)
+      VALUES (new.rowid, new.accession, new.title, new.abstract, new.journal, {authors_new});
+    END;
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER articles_fts_au AFTER UPDATE OF accession, title, abstract, journal ON articles BEGIN
+      DELETE FROM articles_fts WHERE rowid = old.rowid;
+      INSERT INTO articles_fts (rowid, accession, title, abstract, journal, authors)
+      VALUES (new.rowid, new.accession, new.title, new.abstract, new.journal, {authors_new});
+    END;
+    """)
+    conn.execute("""
+    CREATE TRIGGER articles_fts_ad AFTER DELETE ON articles BEGIN
+      DELETE FROM articles_fts WHERE rowid = old.rowid;
+    END;
+    """)
+    conn.execute(f"""
+    INSERT INTO articles_fts (rowid, accession, title, abstract, journal, authors)
+    SELECT a.rowid, a.accession, a.title, a.abstract, a.journal,
+           {_FTS_AUTHORS_SQL.format(accession="a.accession")}
+    FROM articles AS a;
+    """)
+
+
+def _migrate_compressed_text(conn: sqlite3.Connection) -> None:
+    # The FTS triggers must index the inflated text, then existing large
+    # values are compressed in place (re-indexed through the new triggers).
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'articles_fts'").fetchone():
+        authors_new = _FTS_AUTHORS_SQL.format(accession="new.accession")
+        conn.execute("DROP TRIGGER IF EXISTS articles_fts_ai;")
+        conn.execute("DROP TRIGGER IF EXISTS articles_fts_au;")
+        conn.execute(f"""
+        CREATE TRIGGER articles_fts_ai AFTER INSERT ON articles BEGIN
+          INSERT INTO articles_fts (rowid, accession, title, abstract, journal, authors)
+          VALUES (new.rowid, new.accession, new.title, pubxel_inflate(new.abstract), new.journal,
+                  {authors_new});
+        END;
+        """)
+        conn.execute(f"""
+        CREATE TRIGGER articles_fts_au AFTER UPDATE OF accession, title, abstract, journal ON articles BEGIN
+          DELETE FROM articles_fts WHERE rowid = old.rowid;
+          INSERT INTO articles_fts (rowid, accession, title, abstract, journal, authors)
+          VALUES (new.rowid, new.accession, new.title, pubxel_inflate(new.abstract), new.journal,
+                  {authors_new});
+        END;
+        """)
+    for col in ("abstract", "si", "gr", "cin"):
+        conn.execute(
+            f"UPDATE articles SET {col} = pubxel_deflate({col}) "
+            f"WHERE typeof({col}) = 'text' AND length(CAST({col} AS BLOB)) >= ?;",
+            (COMPRESS_MIN_BYTES,),
+        )
+
+
+# The citation fields as migration 6 added them. The migration derives them
+# with its own frozen copy of derive_citation_fields, so later changes to the
+# live code (or to the read path) cannot change what an upgrade computes.
+_V6_DERIVED_COLUMNS: Tuple[str, ...] = (
+    "firstauthor", "firstauthorlastname", "firstauthorlastnameetal",
+    "authoryear", "cite", "cite_maincheckbox",
+)
+
+
+def _v6_citation_fields(
+    title: Optional[str],
+    year: Optional[str],
+    source: Optional[str],
+    full_name: Optional[str],
+    short_name: Optional[str],
+    n_authors: int,
+) -> Tuple[str, ...]:
+    title = title or ""
+    year = year or ""
+    source = (source or "").strip()
+    full_name = full_name or ""
+    short_name = short_name or ""
+    if full_name:
+        lastname = full_name.split(",", 1)[0]
+    else:
+        lastname = short_name.split(" ", 1)[0] if short_name else ""
+    etal = f"{lastname} et al." if n_authors >= 2 else lastname
+    authoryear = f"{etal}, {year}" if year else etal
+    return (
+        short_name or lastname,
+        lastname,
+        etal,
+        authoryear,
+        f"{authoryear}.\n{title}\n{source}".strip(),
+        f"{title}\n{source}".strip(),
+    )
+
+
+def _migrate_derived_citation_fields(conn: sqlite3.Connection) -> None:
+    existing_cols = _table_columns(conn, "articles")
+    for col in _V6_DERIVED_COLUMNS:
+        if col not in existing_cols:
+            conn.execute(f"ALTER TABLE articles ADD COLUMN {col} TEXT;")
+
+    reset = ", ".join(f"{col} = NULL" for col in _V6_DERIVED_COLUMNS)
+    for event, ref in (("INSERT", "new"), ("UPDATE", "new"), ("DELETE", "old")):
+        conn.execute(f"""
+        CREATE TRIGGER article_authors_derived_{event[0].lower()} AFTER {event} ON article_authors BEGIN
+          UPDATE articles SET {reset}
+          WHERE accession = {ref}.accession AND cite IS NOT NULL;
+        END;
+        """)
+
+    # First author (lowest author_order) and author count per article, read
+    # straight from the version-5 tables.
+    rows = conn.execute("""
+    SELECT a.accession, a.title, a.year, a.source, fa.full_name, fa.short_name,
+           (SELECT count(*) FROM article_authors WHERE accession = a.accession)
+    FROM articles AS a
+    LEFT JOIN article_authors AS fa
+      ON fa.accession = a.accession
+     AND fa.author_order = (SELECT min(author_order) FROM article_authors WHERE accession = a.accession);
+    """)
+    assign = ", ".join(f"{col} = ?" for col in _V6_DERIVED_COLUMNS)
+    while True:
+        chunk = rows.fetchmany(SQLITE_IN_CHUNK)
+        if not chunk:
+            break
+        conn.executemany(
+            f"UPDATE articles SET {assign} WHERE accession = ?;",
+            [(*_v6_citation_fields(*row[1:]), row[0]) for row in chunk],
+        )
+
+
+def _migrate_sql_only_fts_triggers(conn: sqlite3.Connection) -> None:
+    # The triggers from _migrate_compressed_text call pubxel_inflate(), so any
+    # connection without the Python functions (sqlite3 CLI, older app versions,
+    # MetadataStore(conn=...)) could not write articles at all. These are plain
+    # SQL: compressed (BLOB) abstracts are not indexed by the triggers, the
+    # writers in MetadataStore put their text into articles_fts instead (see
+    # _index_compressed_abstracts); an update that leaves a BLOB keeps the
+    # indexed text.
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'articles_fts'").fetchone():
+        return
+    authors_new = _FTS_AUTHORS_SQL.format(accession="new.accession")
+    conn.execute("DROP TRIGGER IF EXISTS articles_fts_ai;")
+    conn.execute("DROP TRIGGER IF EXISTS articles_fts_au;")
+    conn.execute(f"""
+    CREATE TRIGGER articles_fts_ai AFTER INSERT ON articles BEGIN
+      INSERT INTO articles_fts (rowid, accession, title, abstract, journal, authors)
+      VALUES (new.rowid, new.accession, new.title,
+              CASE WHEN typeof(new.abstract) = 'blob' THEN NULL ELSE new.abstract END,
+              new.journal, {authors_new});
+    END;
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER articles_fts_au AFTER UPDATE OF accession, title, abstract, journal ON articles BEGIN
+      UPDATE articles_fts SET
+        rowid = new.rowid,
+        accession = new.accession,
+        title = new.title,
+        abstract = CASE WHEN typeof(new.abstract) = 'blob' THEN abstract ELSE new.abstract END,
+        journal = new.journal,
+        authors = {authors_new}
+      WHERE rowid = old.rowid;
+    END;
+    """)
+
+
+def _migrate_contentless_fulltext_index(conn: sqlite3.Connection) -> None:
+    # A stored-content FTS5 table keeps a second copy of every title, abstract,
+    # journal and author list (larger than articles itself). The contentless
+    # index only keeps the inverted lists; search() joins back to articles on
+    # rowid. Row deletes need contentless_delete=1 (SQLite 3.43+); older
+    # SQLite keeps the stored-content index. With nothing to read back, the
+    # update trigger re-indexes the whole row, and compressed (BLOB) abstracts
+    # are indexed by the writers in MetadataStore as before.
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'articles_fts'").fetchone():
+        return
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp.articles_fts_probe USING fts5(x, content='', contentless_delete=1);")
+    except sqlite3.OperationalError as e:
+        print(f"Keeping the stored-content full-text index (SQLite {sqlite3.sqlite_version}): {e}")
+        return
+    conn.execute("DROP TABLE temp.articles_fts_probe;")
+
+    for name in ("ai", "au", "ad"):
+        conn.execute(f"DROP TRIGGER IF EXISTS articles_fts_{name};")
+    conn.execute("DROP TABLE articles_fts;")
+    conn.execute("""
+    CREATE VIRTUAL TABLE articles_fts USING fts5(
+      accession UNINDEXED,
+      title,
+      abstract,
+      journal,
+      authors,
+      content = '',
+      contentless_delete = 1,
+      tokenize = 'unicode61 remove_diacritics 2'
+    );
+    """)
+
+    authors_new = _FTS_AUTHORS_SQL.format(accession="new.accession")
+    values_new = f"""
+      VALUES (new.rowid, new.accession, new.title,
+              CASE WHEN typeof(new.abstract) = 'blob' THEN NULL ELSE new.abstract END,
+              new.journal, {authors_new});
+    """
+    conn.execute(f"""
+    CREATE TRIGGER articles_fts_ai AFTER INSERT ON articles BEGIN
+      INSERT INTO articles_fts (rowid, accession, title, abstract, journal, authors)
+      {values_new}
+    END;
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER articles_fts_au AFTER UPDATE OF accession, title, abstract, journal ON articles BEGIN
+      DELETE FROM articles_fts WHERE rowid = old.rowid;
+      INSERT INTO articles_fts (rowid, accession, title, abstract, journal, authors)
+      {values_new}
+    END;
+    """)
+    conn.execute("""
+    CREATE TRIGGER articles_fts_ad AFTER DELETE ON articles BEGIN
+      DELETE FROM articles_fts WHERE rowid = old.rowid;
+    END;
+    """)
+    conn.execute(f"""
+    INSERT INTO articles_fts (rowid, accession, title, abstract, journal, authors)
+    SELECT a.rowid, a.accession, a.title, pubxel_inflate(a.abstract), a.journal,
+           {_FTS_AUTHORS_SQL.format(accession="a.accession")}
+    FROM articles AS a;
+    """)
+
+
+# Schema migrations, applied in order. Migration N leaves the database at
+# PRAGMA user_version = N. Append new entries; never edit or reorder old ones.
+MIGRATIONS: List[Tuple[str, Callable[[sqlite3.Connection], None]]] = [
+    ("base schema", _migrate_base_schema),
+    ("articles.content_hash", _migrate_content_hash),
+    ("article_authors WITHOUT ROWID", _migrate_authors_without_rowid),
+    ("articles_fts full-text index", _migrate_fulltext_index),
+    ("compressed abstract/si/gr/cin", _migrate_compressed_text),
+    ("persisted citation fields", _migrate_derived_citation_fields),
+    ("SQL-only articles_fts triggers", _migrate_sql_only_fts_triggers),
+    ("contentless articles_fts", _migrate_contentless_fulltext_index),
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def run_migrations(conn: sqlite3.Connection) -> List[Tuple[int, str, float]]:
+    """
+    Bring the database up to SCHEMA_VERSION. Each pending migration runs once,
+    in its own transaction, and is reported with its duration in seconds.
+    """
+    if conn.execute("PRAGMA user_version;").fetchone()[0] >= SCHEMA_VERSION:
+        return []
+
+    applied: List[Tuple[int, str, float]] = []
+    if conn.in_transaction:
+        conn.commit()
+    while True:
+        conn.execute("BEGIN IMMEDIATE;")
+        try:
+            # Re-read under the write lock: another connection may have migrated.
+            version = conn.execute("PRAGMA user_version;").fetchone()[0]
+            if version >= SCHEMA_VERSION:
+                conn.rollback()
+                break
+            name, migrate = MIGRATIONS[version]
+            started = time.perf_counter()
+            migrate(conn)
+            conn.execute(f"PRAGMA user_version = {version + 1};")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        elapsed = time.perf_counter() - started
+        applied.append((version + 1, name, elapsed))
+        print(f"Metadata schema migration {version + 1} ({name}) took {elapsed * 1000:.1f} ms")
+    return applied
+
+
+# articles columns written by upsert_metadata/bulk_upsert_metadata, in the
+# order of their prepared rows (ArticleRow + content_hash + derived).
+_ARTICLE_WRITE_COLUMNS: Tuple[str, ...] = ARTICLE_COLUMNS + ("content_hash",) + DERIVED_COLUMNS
+_ARTICLE_ON_CONFLICT = "ON CONFLICT(accession) DO UPDATE SET " + ", ".join(
+    f"{col} = excluded.{col}" for col in _ARTICLE_WRITE_COLUMNS[1:]
+)
+_AUTHOR_WRITE_COLUMNS = "accession, author_order, author_type, full_name, short_name"
+
+# bulk_upsert_metadata stages this many records per executemany, and drops and
+# rebuilds the secondary articles indexes for loads of at least
+# BULK_REBUILD_INDEX_MIN_ROWS articles (one sort per index instead of a B-tree
+# insert per row).
+BULK_STAGE_BATCH = 5000
+BULK_REBUILD_INDEX_MIN_ROWS = 50000
+
 
 class MetadataStore:
-    def __init__(self, db_path: str):
-        self.conn = sqlite3.connect(db_path)
-        self._apply_pragmas()
-        self._ensure_schema()
+    def __init__(
+        self,
+        db_path: str = "",
+        conn: Optional[sqlite3.Connection] = None,
+        cache: Optional[MetadataCache] = None,
+    ):
+        # With ``conn`` the store borrows an already prepared connection (see
+        # MetadataStorePool): no pragmas, no schema check, and close() is a no-op.
+        # ``cache`` is invalidated for every accession this store upserts.
+        self.cache = cache
+        self._owns_conn = conn is None
+        if conn is None:
+            self.conn = sqlite3.connect(db_path)
+            register_sql_functions(self.conn)
+            self._apply_pragmas()
+            self._ensure_schema()
+        else:
+            self.conn = conn
 
     def _apply_pragmas(self):
         self.conn.execute("PRAGMA journal_mode=WAL;")
@@ -49,70 +613,48 @@ class MetadataStore:
         self.conn.execute("PRAGMA temp_store=MEMORY;")
 
     def _ensure_schema(self):
-        self.conn.execute("""
-        CREATE TABLE IF NOT EXISTS articles (
-          accession       TEXT PRIMARY KEY,
-          pmid            TEXT,
-          title           TEXT,
-          abstract        TEXT,
-          journal         TEXT,
-          year            TEXT,
-          source          TEXT,
-          date            TEXT,
-          doi             TEXT,
-          link            TEXT,
-          volume          TEXT,
-          issue           TEXT,
-          page            TEXT,
-          language        TEXT,
-          publicationtype TEXT,
-          fulljournal     TEXT,
-          issn            TEXT,
-          si              TEXT,
-          gr              TEXT,
-          cin             TEXT,
-          retrievedate    TEXT,
-          provider        TEXT
-        );
-        """)
-        existing_cols = {
-            row[1] for row in self.conn.execute("PRAGMA table_info(articles);").fetchall()
-        }
-        for col in ("si", "gr", "cin"):
-            if col not in existing_cols:
-                self.conn.execute(f"ALTER TABLE articles ADD COLUMN {col} TEXT;")
-
-        self.conn.execute("""
-        CREATE TABLE IF NOT EXISTS article_authors (
-          accession    TEXT NOT NULL,
-          author_order INTEGER NOT NULL,
-          author_type  TEXT,
-          full_name    TEXT,
-          short_name   TEXT,
-          PRIMARY KEY (accession, author_order),
-          FOREIGN KEY (accession) REFERENCES articles(accession) ON DELETE CASCADE
-        );
-        """)
+        run_migrations(self.conn)
 
-        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_pmid ON articles(pmid);")
-        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_year ON articles(year);")
-        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_doi ON articles(doi);")
-        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_journal ON articles(journal);")
+    def _select_in(self, sql: str, keys: List[str], params: Tuple[Any, ...] = ()) -> List[Tuple[Any, ...]]:
+        """Run ``sql`` (with an ``{q}`` placeholder list) once per chunk of ``keys``."""
+        rows: List[Tuple[Any, ...]] = []
+        for chunk in _chunked(keys):
+            q = ",".join("?" for _ in chunk)
+            rows.extend(self.conn.execute(sql.format(q=q), [*chunk, *params]).fetchall())
+        return rows
 
-        self.conn.commit()
+    def _has_fulltext_index(self) -> bool:
+        return self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'articles_fts'"
+        ).fetchone() is not None
+
+    def _index_compressed_abstracts(self, rows: List[Tuple[str, str]]) -> None:
+        """Put ``(abstract, accession)`` text into articles_fts for abstracts stored compressed."""
+        if rows and self._has_fulltext_index():
+            # Whole-row re-index: a contentless articles_fts has no stored
+            # columns to update in place.
+            self.conn.executemany(
+                "DELETE FROM articles_fts WHERE rowid = (SELECT rowid FROM articles WHERE accession = ?);",
+                [(accession,) for _, accession in rows],
+            )
+            self.conn.executemany(
+                f"""
+                INSERT INTO articles_fts (rowid, accession, title, abstract, journal, authors)
+                SELECT a.rowid, a.accession, a.title, ?, a.journal,
+                       {_FTS_AUTHORS_SQL.format(accession="a.accession")}
+                FROM articles AS a WHERE a.accession = ?;
+                """,
+                rows,
+            )
 
     def missing(self, accessions: Iterable[str]) -> List[str]:
         uniq = list({str(a) for a in accessions})
         if not uniq:
             return []
 
-        q = ",".join("?" for _ in uniq)
         have = {
             r[0]
-            for r in self.conn.execute(
-                f"SELECT accession FROM articles WHERE accession IN ({q})",
-                uniq,
-            )
+            for r in self._select_in("SELECT accession FROM articles WHERE accession IN ({q})", uniq)
         }
         return [a for a in uniq if a not in have]
 
@@ -121,90 +663,124 @@ class MetadataStore:
         if not uniq:
             return []
 
-        q = ",".join("?" for _ in uniq)
+        rows = self._select_in("SELECT accession FROM articles WHERE accession IN ({q})", uniq)
+
+        return [r[0] for r in rows]
 
-        rows = self.conn.execute(
-            f"SELECT accession FROM articles WHERE accession IN ({q})",
+    def stale(self, accessions: Iterable[str], max_age_days: int) -> List[str]:
+        """Accessions stored with a retrievedate older than ``max_age_days`` (or none)."""
+        uniq = list({str(a) for a in accessions})
+        if not uniq or max_age_days <= 0:
+            return []
+
+        cutoff = (datetime.date.today() - datetime.timedelta(days=max_age_days)).isoformat()
+        rows = self._select_in(
+            """
+            SELECT accession FROM articles
+            WHERE accession IN ({q}) AND (retrievedate IS NULL OR retrievedate < ?)
+            """,
             uniq,
-        ).fetchall()
+            (cutoff,),
+        )
 
         return [r[0] for r in rows]
 
-    def get_metadata(self, accessions: Iterable[str]) -> MetadataDict:
+    def search(self, query: str, limit: int = 50, raw: bool = False) -> List[str]:
+        """
+        Accessions of cached articles matching ``query``, best match first.
+
+        Title hits rank above author/journal hits, which rank above abstract
+        hits. ``query`` is free text unless ``raw`` is set, in which case it is
+        passed to FTS5 MATCH as-is (phrases, OR/NOT, ``title:`` filters).
+        """
+        match = query if raw else fts_query(query)
+        if not match.strip():
+            return []
+        try:
+            rows = self.conn.execute(
+                """
+                SELECT a.accession FROM articles_fts
+                JOIN articles AS a ON a.rowid = articles_fts.rowid
+                WHERE articles_fts MATCH ?
+                ORDER BY bm25(articles_fts, 0.0, 10.0, 1.0, 3.0, 5.0)
+                LIMIT ?
+                """,
+                (match, limit),
+            ).fetchall()
+        except sqlite3.OperationalError as e:
+            raise ValueError(f"Search Error.\nInvalid search query: {query}\n{e}")
+        return [r[0] for r in rows]
+
+    def get_metadata(
+        self,
+        accessions: Iterable[str],
+        fields: Optional[Iterable[str]] = None,
+    ) -> MetadataDict:
+        """
+        Load stored articles (and their authors) keyed by accession.
+
+        ``fields`` limits the query to the article columns, ``"authors"`` and
+        enrich_metadata-derived fields (``cite``, ``authoryear``, ...) the caller
+        needs; see ``metadata_projection``. The author query is skipped when no
+        requested field depends on authors. ``None`` loads everything.
+
+        Articles and authors come back as ``ArticleRecord`` / ``AuthorRecord``
+        (see pubxel_core.records), which read like the plain dicts they replace.
+        """
         uniq = list({str(a) for a in accessions})
         if not uniq:
             return {}
 
-        q = ",".join("?" for _ in uniq)
-
-        article_rows = self.conn.execute(
+        columns, need_authors = metadata_projection(fields)
+        article_rows = self._select_in(
             f"""
-            SELECT
-                accession, pmid, title, abstract, journal, year, source, date,
-                doi, link, volume, issue, page, language, publicationtype,
-                fulljournal, issn, si, gr, cin, retrievedate, provider
+            SELECT {", ".join(columns)}
             FROM articles
-            WHERE accession IN ({q})
+            WHERE accession IN ({{q}})
             """,
             uniq,
-        ).fetchall()
+        )
 
+        compressed = [c for c in _COMPRESSED_COLUMNS if c in columns]
+        derived = [c for c in DERIVED_COLUMNS if c in columns]
         result = {}
+        invalidated: List[str] = []
+        make_article = ArticleRecord.factory(columns)
         for row in article_rows:
-            (
-                accession, pmid, title, abstract, journal, year, source, date,
-                doi, link, volume, issue, page, language, publicationtype,
-                fulljournal, issn, si, gr, cin, retrievedate, provider,
-            ) = row
-
-            result[accession] = {
-                "article": {
-                    "accession": accession,
-                    "pmid": pmid,
-                    "title": title,
-                    "abstract": abstract,
-                    "journal": journal,
-                    "year": year,
-                    "source": source,
-                    "date": date,
-                    "doi": doi,
-                    "link": link,
-                    "volume": volume,
-                    "issue": issue,
-                    "page": page,
-                    "language": language,
-                    "publicationtype": publicationtype,
-                    "fulljournal": fulljournal,
-                    "issn": issn,
-                    "si": si,
-                    "gr": gr,
-                    "cin": cin,
-                    "retrievedate": retrievedate,
-                    "provider": provider,
-                },
-                "authors": [],
-            }
-
-        author_rows = self.conn.execute(
-            f"""
+            article = make_article(row)
+            for col in compressed:
+                article[col] = inflate_text(article[col])
+            if derived and any(article[col] is None for col in derived):
+                invalidated.append(article["accession"])
+            result[article["accession"]] = {"article": article, "authors": []}
+
+        if invalidated:
+            # Authors changed since the citation fields were stored (or a legacy
+            # row): recompute them for this read.
+            source_fields = {src for col in derived for src in DERIVED_FIELD_SOURCES[col]}
+            sources = self.get_metadata(invalidated, source_fields)
+            for accession, entry in sources.items():
+                values = derive_citation_fields(entry["article"], entry["authors"])
+                result[accession]["article"].update({col: values[col] for col in derived})
+
+        if not need_authors:
+            return result
+
+        author_rows = self._select_in(
+            """
             SELECT accession, author_order, author_type, full_name, short_name
             FROM article_authors
             WHERE accession IN ({q})
             ORDER BY accession, author_order
             """,
             uniq,
-        ).fetchall()
+        )
 
         for accession, author_order, author_type, full_name, short_name in author_rows:
             if accession not in result:
                 continue
             result[accession]["authors"].append(
-                {
-                    "author_order": author_order,
-                    "author_type": author_type,
-                    "full_name": full_name,
-                    "short_name": short_name,
-                }
+                AuthorRecord(author_order, author_type, full_name, short_name)
             )
 
         return result
@@ -213,105 +789,470 @@ class MetadataStore:
         self,
         articles_rows: List[ArticleRow],
         authors_rows: List[AuthorRow],
-    ) -> None:
+    ) -> List[str]:
+        """
+        Insert or update articles and replace their authors.
+
+        Rows whose content hash matches the stored one only get their
+        retrievedate touched. Returns the accessions that were written in full.
+        """
         if not articles_rows and not authors_rows:
-            return
+            return []
+
+        authors_by_accession: Dict[str, List[AuthorRow]] = {}
+        for author_row in authors_rows:
+            authors_by_accession.setdefault(author_row[0], []).append(author_row)
+        hashed_rows = [
+            (*row, content_hash(row, authors_by_accession.get(row[0], ())))
+            for row in articles_rows
+        ]
 
         accessions: Set[str] = {row[0] for row in articles_rows if row[0] is not None}
+        stored: Dict[str, Optional[str]] = dict(
+            self._select_in(
+                "SELECT accession, content_hash FROM articles WHERE accession IN ({q})",
+                list(accessions),
+            )
+        )
+        unchanged = {
+            row[0] for row in hashed_rows
+            if row[0] in stored and stored[row[0]] == row[-1]
+        }
+        changed_rows = [
+            _compress_row(row) + _derived_values(row, authors_by_accession.get(row[0], ()))
+            for row in hashed_rows if row[0] not in unchanged
+        ]
+        changed = [row[0] for row in changed_rows if row[0] is not None]
 
         with self.conn:
-            if articles_rows:
-                self.conn.executemany("""
-                INSERT INTO articles (
-                    accession, pmid, title, abstract, journal, year, source, date,
-                    doi, link, volume, issue, page, language, publicationtype,
-                    fulljournal, issn, si, gr, cin, retrievedate, provider
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(accession) DO UPDATE SET
-                    pmid            = excluded.pmid,
-                    title           = excluded.title,
-                    abstract        = excluded.abstract,
-                    journal         = excluded.journal,
-                    year            = excluded.year,
-                    source          = excluded.source,
-                    date            = excluded.date,
-                    doi             = excluded.doi,
-                    link            = excluded.link,
-                    volume          = excluded.volume,
-                    issue           = excluded.issue,
-                    page            = excluded.page,
-                    language        = excluded.language,
-                    publicationtype = excluded.publicationtype,
-                    fulljournal     = excluded.fulljournal,
-                    issn            = excluded.issn,
-                    si              = excluded.si,
-                    gr              = excluded.gr,
-                    cin             = excluded.cin,
-                    retrievedate    = excluded.retrievedate,
-                    provider        = excluded.provider;
-                """, articles_rows)
-
-            if accessions:
-                q = ",".join("?" for _ in accessions)
+            if unchanged:
+                self.conn.executemany(
+                    "UPDATE articles SET retrievedate = ? WHERE accession = ?",
+                    [
+                        (row[_RETRIEVEDATE_INDEX], row[0])
+                        for row in articles_rows if row[0] in unchanged
+                    ],
+                )
+
+            # Authors first: the articles_fts triggers read them when the
+            # articles row is written.
+            for chunk in _chunked(changed):
+                q = ",".join("?" for _ in chunk)
                 self.conn.execute(
                     f"DELETE FROM article_authors WHERE accession IN ({q})",
-                    list(accessions),
+                    chunk,
                 )
 
+            authors_rows = [row for row in authors_rows if row[0] not in unchanged]
             if authors_rows:
-                self.conn.executemany("""
-                INSERT INTO article_authors (
-                    accession, author_order, author_type, full_name, short_name
-                ) VALUES (?, ?, ?, ?, ?);
-                """, authors_rows)
+                self.conn.executemany(
+                    f"INSERT INTO article_authors ({_AUTHOR_WRITE_COLUMNS}) VALUES (?, ?, ?, ?, ?);",
+                    authors_rows,
+                )
+
+            if changed_rows:
+                placeholders = ", ".join("?" for _ in _ARTICLE_WRITE_COLUMNS)
+                self.conn.executemany(
+                    f"""
+                    INSERT INTO articles ({", ".join(_ARTICLE_WRITE_COLUMNS)})
+                    VALUES ({placeholders})
+                    {_ARTICLE_ON_CONFLICT};
+                    """,
+                    changed_rows,
+                )
+                self._index_compressed_abstracts([
+                    (row[3], row[0])
+                    for row in hashed_rows
+                    if row[0] not in unchanged and isinstance(row[3], str)
+                    and len(row[3].encode("utf-8")) >= COMPRESS_MIN_BYTES
+                ])
+
+        if self.cache is not None:
+            self.cache.invalidate(accessions | {row[0] for row in authors_rows})
+        return changed
+
+    def bulk_upsert_metadata(
+        self,
+        records: Iterable[Tuple[ArticleRow, List[AuthorRow]]],
+        batch_size: int = BULK_STAGE_BATCH,
+        rebuild_indexes: Optional[bool] = None,
+    ) -> Dict[str, float]:
+        """
+        Set-based upsert_metadata for large imports such as a full MEDLINE dump.
+
+        ``records`` yields ``(ArticleRow, [AuthorRow])`` like iter_medline_records
+        and is streamed in batches into TEMP staging tables, then merged into
+        articles/article_authors in one transaction with the same result as
+        upsert_metadata (later duplicates win, unchanged rows only get their
+        retrievedate touched). Secondary articles indexes are dropped and rebuilt
+        around the merge when ``rebuild_indexes`` is true; by default when at
+        least BULK_REBUILD_INDEX_MIN_ROWS articles were staged.
+
+        Returns ``{"articles", "changed", "authors", "seconds", "rows_per_second"}``.
+        """
+        started = time.perf_counter()
+        conn = self.conn
+        columns = ", ".join(_ARTICLE_WRITE_COLUMNS)
+        placeholders = ", ".join("?" for _ in _ARTICLE_WRITE_COLUMNS)
+        staged: Set[str] = set()
+        n_authors = 0
+        changed = 0
+
+        # Stage on disk: a dump does not fit in TEMP tables held in memory.
+        # (Changing temp_store drops existing TEMP tables; only ours use it.)
+        conn.execute("PRAGMA temp_store=FILE;")
+        try:
+            conn.execute(f"""
+            CREATE TEMP TABLE bulk_articles (
+                accession TEXT PRIMARY KEY,
+                {", ".join(_ARTICLE_WRITE_COLUMNS[1:])},
+                unchanged INTEGER NOT NULL DEFAULT 0
+            );
+            """)
+            conn.execute("""
+            CREATE TEMP TABLE bulk_authors (
+                accession TEXT NOT NULL,
+                author_order INTEGER NOT NULL,
+                author_type TEXT,
+                full_name TEXT,
+                short_name TEXT,
+                PRIMARY KEY (accession, author_order)
+            ) WITHOUT ROWID;
+            """)
+
+            with conn:
+                batch: Dict[str, Tuple[ArticleRow, List[AuthorRow]]] = {}
+                for article_row, author_rows in records:
+                    if article_row[0] is None:
+                        continue
+                    batch[article_row[0]] = (article_row, list(author_rows))
+                    if len(batch) >= batch_size:
+                        n_authors += self._stage_bulk_batch(batch, staged, placeholders)
+                        batch = {}
+                n_authors += self._stage_bulk_batch(batch, staged, placeholders)
+
+                conn.execute("""
+                UPDATE temp.bulk_articles SET unchanged = 1
+                WHERE content_hash = (
+                    SELECT a.content_hash FROM main.articles AS a
+                    WHERE a.accession = bulk_articles.accession
+                );
+                """)
+                conn.execute("""
+                UPDATE main.articles SET retrievedate = (
+                    SELECT s.retrievedate FROM temp.bulk_articles AS s
+                    WHERE s.accession = articles.accession
+                )
+                WHERE accession IN (SELECT accession FROM temp.bulk_articles WHERE unchanged);
+                """)
+                changed = conn.execute(
+                    "SELECT COUNT(*) FROM temp.bulk_articles WHERE NOT unchanged;"
+                ).fetchone()[0]
+
+                if rebuild_indexes is None:
+                    rebuild_indexes = changed >= BULK_REBUILD_INDEX_MIN_ROWS
+                indexes: List[Tuple[str, str]] = []
+                if rebuild_indexes:
+                    indexes = conn.execute("""
+                    SELECT name, sql FROM main.sqlite_master
+                    WHERE type = 'index' AND tbl_name = 'articles' AND sql IS NOT NULL;
+                    """).fetchall()
+                    for name, _ in indexes:
+                        conn.execute(f"DROP INDEX main.{name};")
+
+                # Authors first, as in upsert_metadata (articles_fts triggers).
+                conn.execute("""
+                DELETE FROM main.article_authors
+                WHERE accession IN (SELECT accession FROM temp.bulk_articles WHERE NOT unchanged);
+                """)
+                conn.execute(f"""
+                INSERT INTO main.article_authors ({_AUTHOR_WRITE_COLUMNS})
+                SELECT {_AUTHOR_WRITE_COLUMNS} FROM temp.bulk_authors
+                WHERE accession IN (SELECT accession FROM temp.bulk_articles WHERE NOT unchanged);
+                """)
+                select = ", ".join(
+                    f"pubxel_deflate({col})" if col in _COMPRESSED_COLUMNS else col
+                    for col in _ARTICLE_WRITE_COLUMNS
+                )
+                conn.execute(f"""
+                INSERT INTO main.articles ({columns})
+                SELECT {select} FROM temp.bulk_articles
+                WHERE NOT unchanged
+                ORDER BY accession
+                {_ARTICLE_ON_CONFLICT};
+                """)
+                if self._has_fulltext_index():
+                    # The articles_fts triggers skip compressed abstracts;
+                    # re-index those rows whole (see _index_compressed_abstracts).
+                    compressed = """
+                        FROM main.articles AS a
+                        JOIN temp.bulk_articles AS s ON s.accession = a.accession
+                        WHERE NOT s.unchanged AND typeof(a.abstract) = 'blob'
+                    """
+                    conn.execute(f"DELETE FROM main.articles_fts WHERE rowid IN (SELECT a.rowid {compressed});")
+                    conn.execute(f"""
+                    INSERT INTO main.articles_fts (rowid, accession, title, abstract, journal, authors)
+                    SELECT a.rowid, a.accession, a.title, s.abstract, a.journal,
+                           {_FTS_AUTHORS_SQL.format(accession="a.accession")}
+                    {compressed};
+                    """)
+
+                for _, sql in indexes:
+                    conn.execute(sql)
+        finally:
+            conn.execute("DROP TABLE IF EXISTS temp.bulk_articles;")
+            conn.execute("DROP TABLE IF EXISTS temp.bulk_authors;")
+            conn.execute("PRAGMA temp_store=MEMORY;")
+
+        if self.cache is not None:
+            self.cache.invalidate(staged)
+        elapsed = time.perf_counter() - started
+        stats = {
+            "articles": len(staged),
+            "changed": changed,
+            "authors": n_authors,
+            "seconds": elapsed,
+            "rows_per_second": len(staged) / elapsed if elapsed > 0 else 0.0,
+        }
+        print(
+            f"Bulk metadata upsert: {len(staged)} articles ({changed} changed, "
+            f"{n_authors} authors) in {elapsed:.1f} s, {stats['rows_per_second']:.0f} rows/s"
+            + (f", rebuilt {len(indexes)} indexes" if indexes else "")
+        )
+        return stats
+
+    def _stage_bulk_batch(
+        self,
+        batch: Dict[str, Tuple[ArticleRow, List[AuthorRow]]],
+        staged: Set[str],
+        placeholders: str,
+    ) -> int:
+        if not batch:
+            return 0
+        repeated = [accession for accession in batch if accession in staged]
+        for chunk in _chunked(repeated):
+            q = ",".join("?" for _ in chunk)
+            self.conn.execute(f"DELETE FROM temp.bulk_authors WHERE accession IN ({q});", chunk)
+        staged.update(batch)
+
+        article_rows = []
+        author_rows: List[AuthorRow] = []
+        for article_row, authors in batch.values():
+            row = (*article_row, content_hash(article_row, authors))
+            # Compressed in the merge, so unchanged rows never pay for zlib.
+            article_rows.append(row + _derived_values(row, authors))
+            author_rows.extend(authors)
+        self.conn.executemany(
+            f"""
+            INSERT OR REPLACE INTO temp.bulk_articles ({", ".join(_ARTICLE_WRITE_COLUMNS)})
+            VALUES ({placeholders});
+            """,
+            article_rows,
+        )
+        self.conn.executemany(
+            f"INSERT OR REPLACE INTO temp.bulk_authors ({_AUTHOR_WRITE_COLUMNS}) VALUES (?, ?, ?, ?, ?);",
+            author_rows,
+        )
+        return len(author_rows)
 
     def close(self) -> None:
-        self.conn.close()
+        if self._owns_conn:
+            self.conn.close()
 
 
 # Backward-compatible alias (legacy name).
 metadataStore = MetadataStore
 
+STORE_POOL_READERS = 3
+metadata_cache_max_bytes = METADATA_CACHE_MAX_BYTES
+
 
-def enrich_metadata(data: MetadataDict) -> MetadataDict:
+class MetadataStorePool:
+    """
+    Long-lived connections to one metadata database, shared by all threads.
+
+    One writer connection (serialized by a lock) and up to ``readers`` read-only
+    connections handed out exclusively; WAL lets readers run alongside the
+    writer. The schema is checked once, when the writer is opened.
+
+        with get_store_pool(metadata_path).read() as store:
+            store.get_metadata(pmids)
+    """
+
+    def __init__(self, db_path: str, readers: int = STORE_POOL_READERS):
+        self.db_path = db_path
+        self.max_readers = max(1, readers)
+        self._write_lock = threading.Lock()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        self._closed = False
+        self.cache = MetadataCache(metadata_cache_max_bytes)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        register_sql_functions(conn)
+        return conn
+
+    def _get_writer(self) -> sqlite3.Connection:
+        # Called with _write_lock held.
+        if self._closed:
+            raise sqlite3.ProgrammingError("Metadata store pool is closed")
+        if self._writer is None:
+            conn = self._connect()
+            store = MetadataStore(conn=conn)
+            store._apply_pragmas()
+            store._ensure_schema()
+            self._writer = conn
+        return self._writer
+
+    def _acquire_reader(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._readers_lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Metadata store pool is closed")
+            if len(self._readers) < self.max_readers:
+                # The writer creates the schema before the first read.
+                with self._write_lock:
+                    self._get_writer()
+                conn = self._connect()
+                conn.execute("PRAGMA query_only=ON;")
+                conn.execute("PRAGMA temp_store=MEMORY;")
+                self._readers.append(conn)
+                return conn
+        return self._idle.get()
+
+    @contextmanager
+    def read(self) -> Iterator[MetadataStore]:
+        conn = self._acquire_reader()
+        try:
+            yield MetadataStore(conn=conn, cache=self.cache)
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+
+    @contextmanager
+    def write(self) -> Iterator[MetadataStore]:
+        with self._write_lock:
+            yield MetadataStore(conn=self._get_writer(), cache=self.cache)
+
+    def close(self) -> None:
+        with self._readers_lock, self._write_lock:
+            self._closed = True
+            for conn in self._readers:
+                conn.close()
+            self._readers.clear()
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+
+_pools: Dict[str, MetadataStorePool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_store_pool(db_path: str) -> MetadataStorePool:
+    """Return the process-wide pool for ``db_path``, creating it on first use."""
+    key = os.path.abspath(db_path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = MetadataStorePool(db_path)
+        return pool
+
+
+def configure_cache(max_bytes: int) -> None:
+    """Set the per-database LRU size (0 disables it), including for open pools."""
+    global metadata_cache_max_bytes
+    metadata_cache_max_bytes = max(0, max_bytes)
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.cache.resize(metadata_cache_max_bytes)
+        if metadata_cache_max_bytes == 0:
+            pool.cache.clear()
+
+
+def close_store_pools() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+def derive_citation_fields(article: Dict[str, Any], authors: List[Dict[str, Any]]) -> Dict[str, str]:
+    """Citation fields built from title/year/source and the author list (see DERIVED_COLUMNS)."""
+    title = article.get("title", "") or ""
+    year = article.get("year", "") or ""
+    source = (article.get("source", "") or "").strip()
+
+    if authors:
+        fa = authors[0]
+        full_name = fa.get("full_name", "") or ""
+        short_name = fa.get("short_name", "") or ""
+        if full_name:
+            firstauthorlastname = full_name.split(",", 1)[0]
+        else:
+            firstauthorlastname = short_name.split(" ", 1)[0] if short_name else ""
+    else:
+        full_name = ""
+        firstauthorlastname = ""
+        short_name = ""
+
+    if len(authors) >= 2:
+        firstauthorlastnameetal = f"{firstauthorlastname} et al."
+    elif len(authors) == 1:
+        firstauthorlastnameetal = firstauthorlastname
+    else:
+        cn = article.get("collaborator", "") or ""
+        firstauthorlastnameetal = cn if cn else ""
+
+    authoryear = f"{firstauthorlastnameetal}, {year}" if year else firstauthorlastnameetal
+    cite = f"{authoryear}.\n{title}\n{source}".strip()
+    cite_maincheckbox = f"{title}\n{source}".strip()
+
+    return {
+        "firstauthor": short_name or firstauthorlastname,
+        "firstauthorlastname": firstauthorlastname,
+        "firstauthorlastnameetal": firstauthorlastnameetal,
+        "authoryear": authoryear,
+        "cite": cite,
+        "cite_maincheckbox": cite_maincheckbox,
+    }
+
+
+def enrich_metadata(data: MetadataDict, fields: Optional[Iterable[str]] = None) -> MetadataDict:
+    """
+    Fill in the citation fields for entries that lack them. Rows read from
+    MetadataStore already carry the persisted values, so this is normally a no-op.
+
+    ``fields`` is what the rows were loaded with (see get_metadata); a citation
+    field is only derived when all of its DERIVED_FIELD_SOURCES were loaded,
+    otherwise it is left out rather than built from missing values.
+    """
+    loaded: Optional[Set[str]] = None
+    if fields is not None:
+        columns, need_authors = metadata_projection(fields)
+        loaded = set(columns)
+        if need_authors:
+            loaded.add(AUTHORS_FIELD)
+    derivable = [
+        col for col in DERIVED_COLUMNS
+        if loaded is None or all(src in loaded for src in DERIVED_FIELD_SOURCES[col])
+    ]
     for pmid, entry in data.items():
         article = entry.get("article", {})
-        authors = entry.get("authors", [])
-
-        title = article.get("title", "") or ""
-        year = article.get("year", "") or ""
-        source = (article.get("source", "") or "").strip()
-
-        if authors:
-            fa = authors[0]
-            full_name = fa.get("full_name", "") or ""
-            short_name = fa.get("short_name", "") or ""
-            if full_name:
-                firstauthorlastname = full_name.split(",", 1)[0]
-            else:
-                firstauthorlastname = short_name.split(" ", 1)[0] if short_name else ""
-        else:
-            full_name = ""
-            firstauthorlastname = ""
-            short_name = ""
-
-        if len(authors) >= 2:
-            firstauthorlastnameetal = f"{firstauthorlastname} et al."
-        elif len(authors) == 1:
-            firstauthorlastnameetal = firstauthorlastname
-        else:
-            cn = article.get("collaborator", "") or ""
-            firstauthorlastnameetal = cn if cn else ""
-
-        authoryear = f"{firstauthorlastnameetal}, {year}" if year else firstauthorlastnameetal
-        cite = f"{authoryear}.\n{title}\n{source}".strip()
-        cite_maincheckbox = f"{title}\n{source}".strip()
-
-        article["firstauthor"] = short_name or firstauthorlastname
-        article["firstauthorlastname"] = firstauthorlastname
-        article["firstauthorlastnameetal"] = firstauthorlastnameetal
-        article["authoryear"] = authoryear
-        article["cite"] = cite
-        article["cite_maincheckbox"] = cite_maincheckbox
+        missing = [col for col in derivable if article.get(col) is None]
+        if not missing:
+            continue
+        values = derive_citation_fields(article, entry.get("authors", []))
+        for col in missing:
+            article[col] = values[col]
 
     return data
@@ -6,7 +6,7 @@ from __future__ import annotations
 import re
 from typing import List, Tuple
 
-from pubxel_core.pubmed import normalize_pmid
+from pubxel_core.ids import normalize_pmid
 
 NBIB_EXCEL_MAX_ARTICLES = 200
 PUBMED_Nbib_ERROR = "Can only import .nbib file from PubMed"
@@ -0,0 +1,140 @@
+# Pub-Xel - A Biomedical Reference Management Tool
+# Copyright (C) 2024  Jongyeob Kim <info@pubxel.org>
+#
+# MEDLINE metadata providers. Every provider answers "MEDLINE text for these
+# PMIDs" over HTTP, so the fetch engine (batching, retries, streaming) is the
+# same for all of them:
+#   - CtxpProvider:   NCBI literature citation exporter (default)
+#   - EutilsProvider: NCBI E-utilities efetch (rettype=medline)
+# Offline load/failure tests use scripts/fake_ncbi_server.py.
+
+from __future__ import annotations
+
+import abc
+import threading
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlencode, urlsplit
+
+from pubxel_core.pubmed_fetch import (
+    NCBI_REQUESTS_PER_SECOND,
+    PUBMED_BATCH_MAX_ID_CHARS,
+    PUBMED_BATCH_MAX_IDS,
+    RateLimiter,
+)
+
+CTXP_URL = "https://api.ncbi.nlm.nih.gov/lit/ctxp/v1/pubmed/"
+EFETCH_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
+# NCBI allows 10 requests/second with an API key.
+NCBI_REQUESTS_PER_SECOND_WITH_KEY = 10.0
+# pubmed_provider URLs on these hosts (local test servers) are not rate limited.
+LOCAL_PROVIDER_HOSTS = frozenset({"localhost", "127.0.0.1", "::1"})
+
+
+class MetadataProvider(abc.ABC):
+    """Base provider: builds the GET URL for one batch of PMIDs."""
+
+    name = ""
+
+    def __init__(
+        self,
+        base_url: str,
+        requests_per_second: float = NCBI_REQUESTS_PER_SECOND,
+        max_batch_ids: int = PUBMED_BATCH_MAX_IDS,
+        max_id_chars: int = PUBMED_BATCH_MAX_ID_CHARS,
+    ):
+        self.base_url = base_url
+        self.max_batch_ids = max_batch_ids
+        self.max_id_chars = max_id_chars
+        self.rate_limiter: Optional[RateLimiter] = (
+            RateLimiter(requests_per_second) if requests_per_second > 0 else None
+        )
+
+    @abc.abstractmethod
+    def build_url(self, pmids: List[str]) -> str:
+        """GET URL that returns MEDLINE text for ``pmids``."""
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.base_url!r})"
+
+
+class CtxpProvider(MetadataProvider):
+    name = "ctxp"
+
+    def __init__(self, base_url: str = CTXP_URL, **kwargs: Any):
+        super().__init__(base_url, **kwargs)
+
+    def build_url(self, pmids: List[str]) -> str:
+        return self.base_url + "?format=medline&id=" + ",".join(pmids)
+
+
+class EutilsProvider(MetadataProvider):
+    name = "efetch"
+
+    def __init__(
+        self,
+        base_url: str = EFETCH_URL,
+        api_key: str = "",
+        tool: str = "pubxel",
+        email: str = "",
+        **kwargs: Any,
+    ):
+        if "requests_per_second" not in kwargs:
+            kwargs["requests_per_second"] = (
+                NCBI_REQUESTS_PER_SECOND_WITH_KEY if api_key else NCBI_REQUESTS_PER_SECOND
+            )
+        super().__init__(base_url, **kwargs)
+        self.api_key = api_key
+        self.tool = tool
+        self.email = email
+
+    def build_url(self, pmids: List[str]) -> str:
+        params = {"db": "pubmed", "rettype": "medline", "retmode": "text", "tool": self.tool}
+        if self.email:
+            params["email"] = self.email
+        if self.api_key:
+            params["api_key"] = self.api_key
+        return self.base_url + "?" + urlencode(params) + "&id=" + ",".join(pmids)
+
+
+_provider: MetadataProvider = CtxpProvider()
+_provider_lock = threading.Lock()
+
+
+def get_provider() -> MetadataProvider:
+    with _provider_lock:
+        return _provider
+
+
+def set_provider(provider: MetadataProvider) -> MetadataProvider:
+    """Install ``provider`` for all PubMed fetches; returns the previous one."""
+    global _provider
+    with _provider_lock:
+        previous, _provider = _provider, provider
+    return previous
+
+
+def provider_from_settings(settings: Dict[str, Any]) -> MetadataProvider:
+    """
+    Build the provider named by ``pubmed_provider``: ``"ctxp"`` (default),
+    ``"efetch"`` (uses ``ncbi_api_key`` / ``ncbi_email``), or an
+    ``http(s)://`` base URL of a ctxp-compatible server. Such URLs keep the NCBI
+    rate limit unless they point at localhost (e.g. scripts/fake_ncbi_server.py).
+    """
+    choice = str(settings.get("pubmed_provider") or "ctxp").strip()
+    if choice == "efetch":
+        return EutilsProvider(
+            api_key=str(settings.get("ncbi_api_key") or ""),
+            email=str(settings.get("ncbi_email") or ""),
+        )
+    if choice.startswith(("http://", "https://")):
+        if (urlsplit(choice).hostname or "") in LOCAL_PROVIDER_HOSTS:
+            print(f"Local pubmed_provider {choice!r}; NCBI rate limit disabled")
+            return CtxpProvider(base_url=choice, requests_per_second=0)
+        return CtxpProvider(base_url=choice)
+    if choice != "ctxp":
+        print(f"Unknown pubmed_provider {choice!r}; using ctxp")
+    return CtxpProvider()
+
+
+def configure_from_settings(settings: Dict[str, Any]) -> None:
+    set_provider(provider_from_settings(settings))
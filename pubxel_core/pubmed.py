@@ -7,22 +7,53 @@
 # (at your option) any later version.
 
 import datetime
+import html
+import io
+import queue
 import re
-from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 
 import requests
 import xlwings as xw
-from bs4 import BeautifulSoup
 
-from pubxel_core.ids import set_preserve_order
+from pubxel_core.citation import CitationTemplate, get_citation_template
+from pubxel_core.ids import normalize_pmid, set_preserve_order  # noqa: F401 (normalize_pmid re-exported)
+from pubxel_core.journal_metrics import JournalMetrics, JournalMetricsIndex, get_journal_metrics
+from pubxel_core.medline import MedlineRecord, iter_medline_lines, iter_medline_records
+from pubxel_core.metadata_cache import METADATA_CACHE_MAX_BYTES
 from pubxel_core.metadata_store import (
     ArticleRow,
     AuthorRow,
     MetadataDict,
-    MetadataStore,
+    configure_cache,
     enrich_metadata,
+    get_store_pool,
 )
-from pubxel_core.paths import journal_combined_path, metadata_path
+from pubxel_core.nbib import PUBMED_Nbib_ERROR
+from pubxel_core.paths import metadata_path
+from pubxel_core.providers import MetadataProvider, get_provider
+from pubxel_core.pubmed_fetch import (
+    FlightCancelledError,
+    chunk_pmids,
+    fetch_batches,
+    get_with_retry,
+    pubmed_circuit,
+    pubmed_inflight,
+)
+
+# Records per SQLite transaction while streaming a PubMed response.
+PUBMED_FLUSH_RECORDS = 100
+PUBMED_STREAM_CHUNK_BYTES = 64 * 1024
+
+# Cached records older than this are served immediately and then re-fetched in
+# the background (0 disables the refresh). Overridden by settings
+# "metadata_ttl_days".
+METADATA_TTL_DAYS = 30
+metadata_ttl_days = METADATA_TTL_DAYS
+
+_refresh_cancel_event = threading.Event()
 
 
 def value_from_dict(
@@ -44,14 +75,6 @@ def value_from_dict(
     return default
 
 
-def normalize_pmid(pmid: Union[str, int]) -> str:
-    """Normalize a single PMID/accession for SQLite and metadata dict keys."""
-    s = str(pmid).strip()
-    if not s.isnumeric() or len(s) > 9:
-        return s
-    return s.lstrip("0") or "0"
-
-
 def normalize_pmid_list(PMID_list: Union[str, List[str]]) -> List[str]:
     """Normalize, dedupe, and filter a PMID list (same rules as obtain_pubmed_data)."""
     if not isinstance(PMID_list, list):
@@ -65,278 +88,324 @@ def normalize_pmid_list(PMID_list: Union[str, List[str]]) -> List[str]:
     return PMID_list
 
 
-def _normalize_medline_segment(segment: str) -> str:
-    return segment.replace("\r\n", "\n").replace("\n", "\r\n")
-
-
-def _medline_to_dict(text: str) -> Dict[str, str]:
-    text = text.replace(" \r\n      ", " ")
-    text = text.replace("\r\n      ", " ")
-    result: Dict[str, str] = {}
-    for line in text.strip().split("\r\n"):
-        if "- " in line:
-            key, value = line.split("- ", 1)
-            key = key.rstrip()
-            value = value.rstrip()
-            if key in result:
-                result[key] += "|" + value
-            else:
-                result[key] = value
-    return result
-
-
-def _get_first_doi_value(values: Any) -> str:
-    try:
-        if not isinstance(values, list):
-            return ""
-        for v in values:
-            if isinstance(v, str) and v.endswith(" [doi]"):
-                return v[:-6]
-        return ""
-    except Exception:
-        return ""
+def _upsert_medline_records(records: Iterable[MedlineRecord]) -> MetadataDict:
+    articles_rows: List[ArticleRow] = []
+    authors_rows: List[AuthorRow] = []
+    for article_row, author_rows in records:
+        articles_rows.append(article_row)
+        authors_rows.extend(author_rows)
 
+    if not articles_rows and not authors_rows:
+        return {}
 
-def _empty_to_none(value: Any) -> Any:
-    if value is None:
-        return None
-    if isinstance(value, str) and value.strip() == "":
-        return None
-    return value
+    pool = get_store_pool(metadata_path)
+    with pool.write() as store:
+        store.upsert_metadata(articles_rows, authors_rows)
+        accessions = [row[0] for row in articles_rows if row[0]]
+        raw = enrich_metadata(store.get_metadata(accessions))
+        # Still under the write lock, so no later upsert can race this.
+        pool.cache.put_many(raw)
+    return raw
 
 
-def _parse_authors_from_segment(segment: str) -> List[Dict[str, Any]]:
-    authors: List[Dict[str, Any]] = []
-    for raw_line in _normalize_medline_segment(segment).split("\r\n"):
-        line = raw_line.rstrip("\n")
-        if not line.strip():
-            continue
-        m = re.match(r"^(CN|FAU|AU)\s*-\s*(.*)$", line)
-        if not m:
-            continue
-        tag, value = m.group(1), m.group(2).strip()
-        if value == "":
-            continue
-        if tag == "CN":
-            authors.append({"type": "CORPORATE", "full_name": value, "short_name": None})
-        elif tag == "FAU":
-            authors.append({"type": "PERSON", "full_name": value, "short_name": None})
-        elif tag == "AU":
-            attached = False
-            for i in range(len(authors) - 1, -1, -1):
-                if authors[i]["type"] == "PERSON" and authors[i]["short_name"] is None:
-                    authors[i]["short_name"] = value
-                    attached = True
-                    break
-            if not attached:
-                authors.append({"type": "PERSON", "full_name": None, "short_name": value})
-    return authors
+def _iter_record_lines(records: Iterable[str]) -> Iterator[str]:
+    for record in records:
+        yield record
+        yield ""
 
 
-def _rows_from_medline_segment(
-    pmid: str,
-    segment: str,
-    retrievedate: str,
-) -> Tuple[Optional[ArticleRow], List[AuthorRow]]:
-    segment = _normalize_medline_segment(segment)
-    pmid_dict = _medline_to_dict(segment)
-
-    title = value_from_dict(pmid_dict, "TI", outputtype="string", default="")
-    abstract = value_from_dict(pmid_dict, "AB", outputtype="string", default="")
-    journal = value_from_dict(pmid_dict, "TA", outputtype="string", default="")
-    fulljournal = value_from_dict(pmid_dict, "JT", outputtype="string", default="")
-    source = value_from_dict(pmid_dict, "SO", outputtype="string", default="")
-    date_str = value_from_dict(pmid_dict, "DP", outputtype="string", default="")
-    language = value_from_dict(pmid_dict, "LA", outputtype="string", default="")
-    publicationtype = value_from_dict(pmid_dict, "PT", outputtype="string", default="")
-    issn = value_from_dict(pmid_dict, "IS", outputtype="string", default="")
-    si = value_from_dict(pmid_dict, "SI", outputtype="string", default="")
-    gr = value_from_dict(pmid_dict, "GR", outputtype="string", default="")
-    cin = value_from_dict(pmid_dict, "CIN", outputtype="string", default="")
-    volume = value_from_dict(pmid_dict, "VI", outputtype="string", default="")
-    issue = value_from_dict(pmid_dict, "IP", outputtype="string", default="")
-    page = value_from_dict(pmid_dict, "PG", outputtype="string", default="")
-    provider = value_from_dict(pmid_dict, "OWN", outputtype="string", default="")
-
-    year = None
-    if date_str:
-        m_year = re.search(r"\b(\d{4})\b", date_str)
-        if m_year:
-            year = m_year.group(1)
-
-    aid_list = value_from_dict(pmid_dict, "AID", outputtype="list", default=[])
-    doi = _get_first_doi_value(aid_list)
-
-    accession = pmid
-    title = _empty_to_none(title)
-    abstract = _empty_to_none(abstract)
-    journal = _empty_to_none(journal)
-    fulljournal = _empty_to_none(fulljournal)
-    source = _empty_to_none(source)
-    date_str = _empty_to_none(date_str)
-    year = _empty_to_none(year)
-    language = _empty_to_none(language)
-    publicationtype = _empty_to_none(publicationtype)
-    issn = _empty_to_none(issn)
-    si = _empty_to_none(si)
-    gr = _empty_to_none(gr)
-    cin = _empty_to_none(cin)
-    volume = _empty_to_none(volume)
-    issue = _empty_to_none(issue)
-    page = _empty_to_none(page)
-    provider = _empty_to_none(provider)
-    doi = _empty_to_none(doi)
-    link = f"https://pubmed.ncbi.nlm.nih.gov/{pmid}" if pmid else None
-
-    article_row: ArticleRow = (
-        accession,
-        pmid,
-        title,
-        abstract,
-        journal,
-        year,
-        source,
-        date_str,
-        doi,
-        link,
-        volume,
-        issue,
-        page,
-        language,
-        publicationtype,
-        fulljournal,
-        issn,
-        si,
-        gr,
-        cin,
-        retrievedate,
-        provider,
+def import_nbib_to_metadata(records: Iterable[str]) -> MetadataDict:
+    """Parse PubMed nbib MEDLINE records and upsert into SQLite (no network)."""
+    return _upsert_medline_records(
+        iter_medline_records(_iter_record_lines(records), missing_pmid_error=PUBMED_Nbib_ERROR)
     )
 
-    authors_rows: List[AuthorRow] = []
-    authors = _parse_authors_from_segment(segment)
-    for idx, author in enumerate(authors, start=1):
-        authors_rows.append(
-            (
-                accession,
-                idx,
-                author.get("type"),
-                _empty_to_none(author.get("full_name")),
-                _empty_to_none(author.get("short_name")),
-            )
-        )
 
-    return article_row, authors_rows
+def load_cached_metadata(
+    pmids: List[str],
+    fields: Optional[Iterable[str]] = None,
+) -> Tuple[MetadataDict, List[str]]:
+    """
+    Return ``(enriched metadata for PMIDs in SQLite, PMIDs missing from SQLite)``.
 
+    PMIDs in the in-memory LRU are served without opening the database; full
+    reads (``fields=None``) are added to it. ``fields`` limits what is loaded
+    (see ``MetadataStore.get_metadata``).
+    """
+    pool = get_store_pool(metadata_path)
+    hits, rest = pool.cache.get_many(pmids)
+    missing: List[str] = []
+    raw: MetadataDict = {}
+    if rest:
+        generation = pool.cache.generation
+        with pool.read() as store:
+            missing = store.missing(rest)
+            missing_set = set(missing)
+            cached = [p for p in rest if p not in missing_set]
+            raw = enrich_metadata(store.get_metadata(cached, fields), fields) if cached else {}
+        if fields is None and raw:
+            pool.cache.put_many(raw, generation)
+    merged = {pmid: hits.get(pmid) or raw[pmid] for pmid in pmids if pmid in hits or pmid in raw}
+    return merged, missing
+
+
+def search_cached_metadata(query: str, limit: int = 50) -> MetadataDict:
+    """Full-text search of the local SQLite cache (no network), best match first."""
+    with get_store_pool(metadata_path).read() as store:
+        accessions = store.search(query, limit=limit)
+        raw = store.get_metadata(accessions) if accessions else {}
+    return enrich_metadata({a: raw[a] for a in accessions if a in raw})
+
+
+def configure_from_settings(settings: Dict[str, Any]) -> None:
+    global metadata_ttl_days
+    try:
+        metadata_ttl_days = int(settings.get("metadata_ttl_days", METADATA_TTL_DAYS))
+    except (TypeError, ValueError):
+        metadata_ttl_days = METADATA_TTL_DAYS
+    try:
+        cache_mb = float(settings.get("metadata_cache_mb", METADATA_CACHE_MAX_BYTES / (1024 * 1024)))
+    except (TypeError, ValueError):
+        cache_mb = METADATA_CACHE_MAX_BYTES / (1024 * 1024)
+    configure_cache(int(cache_mb * 1024 * 1024))
 
-def _upsert_medline_segments(segments: List[Tuple[str, str]]) -> MetadataDict:
-    retrievedate = datetime.date.today().isoformat()
-    articles_rows: List[ArticleRow] = []
-    authors_rows: List[AuthorRow] = []
 
-    for pmid, segment in segments:
-        article_row, author_rows = _rows_from_medline_segment(pmid, segment, retrievedate)
-        if article_row:
-            articles_rows.append(article_row)
-            authors_rows.extend(author_rows)
+def stale_pmids(metadata: MetadataDict, max_age_days: Optional[int] = None) -> List[str]:
+    """PMIDs in ``metadata`` whose retrievedate is older than ``max_age_days`` (or missing)."""
+    max_age_days = metadata_ttl_days if max_age_days is None else max_age_days
+    if max_age_days <= 0:
+        return []
+    cutoff = (datetime.date.today() - datetime.timedelta(days=max_age_days)).isoformat()
+    return [
+        pmid for pmid, entry in metadata.items()
+        if (entry["article"].get("retrievedate") or "") < cutoff
+    ]
 
-    if not articles_rows and not authors_rows:
-        return {}
 
-    store = MetadataStore(metadata_path)
-    try:
-        store.upsert_metadata(articles_rows, authors_rows)
-        accessions = [row[0] for row in articles_rows if row[0]]
-        raw = store.get_metadata(accessions)
-        return enrich_metadata(raw)
-    finally:
-        store.close()
+class _StaleRefresher:
+    """
+    One long-lived daemon thread that re-fetches stale PMIDs. PMIDs already
+    queued or being fetched are not queued again; queued batches are merged
+    into one fetch.
+    """
 
+    def __init__(self):
+        self._queue: "queue.Queue[Optional[List[str]]]" = queue.Queue()
+        self._pending: Set[str] = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, pmids: List[str]) -> None:
+        with self._lock:
+            new = [pmid for pmid in dict.fromkeys(pmids) if pmid not in self._pending]
+            if not new:
+                return
+            self._pending.update(new)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="pubxel-metadata-refresh", daemon=True)
+                self._thread.start()
+        self._queue.put(new)
+
+    def stop(self) -> None:
+        self._queue.put(None)
+
+    def _run(self) -> None:
+        while True:
+            batch = self._queue.get()
+            if batch is None:
+                return
+            stopping = False
+            while not self._queue.empty():
+                more = self._queue.get_nowait()
+                if more is None:
+                    stopping = True
+                    break
+                batch.extend(more)
+            try:
+                self._refresh(batch)
+            finally:
+                with self._lock:
+                    self._pending.difference_update(batch)
+            if stopping:
+                return
+
+    def _refresh(self, pmids: List[str]) -> None:
+        if pubmed_circuit.is_open or _refresh_cancel_event.is_set():
+            return
+        print(f"Refreshing {len(pmids)} stale cached article(s) in the background")
+        try:
+            obtain_pubmed_data(pmids, cancel_event=_refresh_cancel_event)
+        except ValueError as e:
+            print(f"Background refresh failed: {e}")
+        except Exception as e:
+            # requests/sqlite3 errors must not end the refresh thread.
+            print(f"Background refresh failed: {type(e).__name__}: {e}")
+
+
+_stale_refresher = _StaleRefresher()
+
+
+def schedule_stale_refresh(metadata: MetadataDict) -> None:
+    """
+    Stale-while-revalidate: re-fetch the PMIDs in ``metadata`` (as just read from
+    the cache) whose retrievedate is older than ``metadata_ttl_days`` on the
+    background refresh thread. Unchanged records only get a new retrievedate.
+    Nothing is started when no PMID is stale.
+    """
+    if not metadata or metadata_ttl_days <= 0 or _refresh_cancel_event.is_set():
+        return
+    stale = stale_pmids(metadata)
+    if stale:
+        _stale_refresher.submit(stale)
 
-def import_nbib_to_metadata(records: List[str]) -> MetadataDict:
-    """Parse PubMed nbib MEDLINE records and upsert into SQLite (no network)."""
-    segments: List[Tuple[str, str]] = []
-    for record in records:
-        segment = _normalize_medline_segment(record)
-        pmid = None
-        for line in segment.split("\r\n"):
-            if line.startswith("PMID-"):
-                pmid = normalize_pmid(line.split("-", 1)[1].strip())
-                break
-        if not pmid:
-            raise ValueError("Can only import .nbib file from PubMed")
-        segments.append((pmid, segment))
-    return _upsert_medline_segments(segments)
+
+def stop_stale_refresh() -> None:
+    """Stop background refreshes (called on shutdown)."""
+    _refresh_cancel_event.set()
+    _stale_refresher.stop()
 
 
 def resolve_metadata_for_pmids(
     PMID_list: Union[str, List[str]],
     on_partial: Optional[Callable[[MetadataDict], None]] = None,
     on_fetch_start: Optional[Callable[[], None]] = None,
+    fields: Optional[Iterable[str]] = None,
 ) -> MetadataDict:
     """
     Load metadata cache-first: SQLite for PMIDs already stored, PubMed only for missing.
 
     When ``on_partial`` is provided, it is invoked after loading cached rows (if any),
-    and again after a PubMed fetch when any PMIDs were missing from SQLite.
+    progressively while missing PMIDs stream in from PubMed, and once more when
+    the fetch has finished.
     When ``on_fetch_start`` is provided, it is invoked only when a network fetch to
     PubMed is about to start (i.e., at least one PMID is missing from SQLite).
+    While the PubMed circuit breaker is open, only cached rows are returned.
+    Cached rows past their TTL are returned as-is and refreshed in the background.
+    ``fields`` limits what is read for cached PMIDs; fetched PMIDs are complete.
     """
     pmids = normalize_pmid_list(PMID_list)
     if not pmids:
         return {}
 
-    store = MetadataStore(metadata_path)
-    merged: MetadataDict = {}
-    try:
-        missing = store.missing(pmids)
-        missing_set = set(missing)
-        cached = [p for p in pmids if p not in missing_set]
-
-        if cached:
-            merged = enrich_metadata(store.get_metadata(cached))
-            if on_partial:
-                on_partial(merged)
-
-        if missing:
-            if on_fetch_start:
-                on_fetch_start()
-            fetched = obtain_pubmed_data(missing)
-            merged.update(fetched)
-            if on_partial:
-                on_partial(merged)
-    finally:
-        store.close()
+    merged, missing = load_cached_metadata(pmids, fields)
+    if merged and on_partial:
+        on_partial(merged)
+    schedule_stale_refresh(merged)
+
+    if missing and pubmed_circuit.is_open:
+        # Cache-only mode: PubMed failed repeatedly, don't wait on it again.
+        print(f"PubMed circuit open; returning {len(merged)} cached article(s) only")
+    elif missing:
+        if on_fetch_start:
+            on_fetch_start()
+        on_fetched = None
+        if on_partial:
+            cached_merged = dict(merged)
+
+            def on_fetched(fetched: MetadataDict) -> None:
+                on_partial({**cached_merged, **fetched})
+
+        fetched = obtain_pubmed_data(missing, on_partial=on_fetched)
+        merged.update(fetched)
+        if on_partial:
+            on_partial(merged)
 
     return merged
 
 
-def obtain_pubmed_data(PMID_list: Union[str, List[str]]) -> MetadataDict:
+_HTML_TAG_RE = re.compile(r"<[A-Za-z/!?][^<>]*>")
+_HTML_ENTITY_RE = re.compile(r"&(?:#[0-9]+|#[xX][0-9a-fA-F]+|[A-Za-z][A-Za-z0-9]{1,31});")
+
+
+def medline_text_from_response(text: str, content_type: str = "") -> str:
     """
-    Fetch PubMed MEDLINE data via NCBI, persist to SQLite, and return enriched metadata.
+    Return plain MEDLINE text from a ctxp response body.
 
-    Fetches from the NCBI ctxp API, upserts into ``metadata_article.sqlite``,
-    then returns ``enrich_metadata(store.get_metadata(...))`` for callers.
+    The API normally answers with ``text/plain`` MEDLINE, which is returned as-is.
+    Tags are stripped and entities unescaped only for an HTML content type or
+    when the body actually contains markup/entities.
     """
-    PMID_list = normalize_pmid_list(PMID_list)
-    if not PMID_list:
-        return {}
+    is_html = "html" in content_type.lower()
+    if not is_html:
+        if "<" not in text and "&" not in text:
+            return text
+        if _HTML_TAG_RE.search(text) is None and _HTML_ENTITY_RE.search(text) is None:
+            return text
+    return html.unescape(_HTML_TAG_RE.sub("", text))
 
-    if len(PMID_list) > 1:
-        PMID_list_str = ",".join(PMID_list)
-    else:
-        PMID_list_str = PMID_list[0]
 
-    url = "https://api.ncbi.nlm.nih.gov/lit/ctxp/v1/pubmed/?format=medline&id=" + PMID_list_str
+class _MedlineSink:
+    """
+    Collects fetched records from the batch workers and upserts them into SQLite
+    in bounded transactions, reporting the merged metadata after every flush.
+    """
+
+    def __init__(
+        self,
+        requested: Iterable[str],
+        on_partial: Optional[Callable[[MetadataDict], None]] = None,
+        flush_size: int = PUBMED_FLUSH_RECORDS,
+        cancel_event: Optional[threading.Event] = None,
+    ):
+        self.requested = set(requested)
+        self.on_partial = on_partial
+        self.cancel_event = cancel_event
+        self.flush_size = flush_size
+        self.merged: MetadataDict = {}
+        self._pending: List[MedlineRecord] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    def add(self, record: MedlineRecord) -> bool:
+        if record[0][0] not in self.requested:
+            return False
+        with self._lock:
+            self._pending.append(record)
+            if len(self._pending) >= self.flush_size:
+                self._flush_locked()
+        return True
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._pending:
+            return
+        records, self._pending = self._pending, []
+        self.merged.update(_upsert_medline_records(records))
+        if self.on_partial:
+            self.on_partial(dict(self.merged))
+
+
+def _require_medline_start(lines: Iterable[str]) -> Iterator[str]:
+    started = False
+    for line in lines:
+        if not started:
+            if not line.strip():
+                continue
+            if not line.startswith("PMID"):
+                raise ValueError("Error.\nInvalid PMID(s). Please try again.")
+            started = True
+        yield line
+    if not started:
+        raise ValueError("Error.\nInvalid PMID(s). Please try again.")
 
-    n_articles = len(PMID_list)
-    preview = ", ".join(PMID_list[:5])
-    if n_articles > 5:
-        preview = f"{preview}, ..."
-    print(f"Obtaining PubMed data for {n_articles} article(s): {preview}")
+
+def _fetch_medline_batch(PMID_list: List[str], sink: _MedlineSink, provider: MetadataProvider) -> int:
+    """
+    Fetch one batch of PMIDs from ``provider``, streaming each completed
+    MEDLINE record into ``sink``. Returns the number of records accepted.
+    """
+    if sink.cancelled:
+        return 0
+    url = provider.build_url(PMID_list)
 
     try:
-        response = requests.get(url, timeout=10)
+        response = get_with_retry(url, limiter=provider.rate_limiter, stream=True)
         response.raise_for_status()
     except requests.exceptions.HTTPError as e:
         raise ValueError(f"HTTP Error.\nInvalid PMID(s). Please try again.\n{e}")
@@ -347,28 +416,125 @@ def obtain_pubmed_data(PMID_list: Union[str, List[str]]) -> MetadataDict:
     except requests.exceptions.RequestException as e:
         raise ValueError(f"Error.\nAn unexpected error occurred: {e}")
 
-    html_doc = response.text
-    soup = BeautifulSoup(html_doc, "html.parser")
-    data = soup.get_text()
+    accepted = 0
+    with response:
+        content_type = response.headers.get("Content-Type", "")
+        try:
+            if "html" in content_type.lower():
+                lines: Iterable[str] = io.StringIO(medline_text_from_response(response.text, content_type))
+            else:
+                lines = (
+                    medline_text_from_response(line)
+                    for line in iter_medline_lines(response.iter_content(chunk_size=PUBMED_STREAM_CHUNK_BYTES))
+                )
+            for record in iter_medline_records(_require_medline_start(lines)):
+                if sink.cancelled:
+                    break
+                if sink.add(record):
+                    accepted += 1
+        except requests.exceptions.RequestException as e:
+            raise ValueError(f"Connection Error.\nDownload interrupted. Please try again.\n{e}")
+    return accepted
 
-    if not data.startswith("PMID"):
-        raise ValueError("Error.\nInvalid PMID(s). Please try again.")
 
-    html_dict: Dict[str, str] = {}
-    for segment in data.split("\r\n\r\n"):
-        for line in segment.split("\r\n"):
-            if line.startswith("PMID"):
-                pmid_key = line.split("-", 1)[1].strip()
-                html_dict[pmid_key] = segment
-                break
+def _fetch_owned_pmids(owned: List[str], sink: _MedlineSink, errors: List[Exception]) -> None:
+    """
+    Fetch PMIDs claimed in ``pubmed_inflight`` into ``sink`` and release their
+    flights: with the batch error, or with FlightCancelledError for PMIDs left
+    unfetched because ``sink`` was cancelled (or this call failed).
+    """
+    try:
+        if owned:
+            provider = get_provider()
+            batches = chunk_pmids(owned, provider.max_batch_ids, provider.max_id_chars)
+            outcomes = fetch_batches(
+                batches,
+                lambda batch: _fetch_medline_batch(batch, sink, provider),
+            )
+            sink.flush()
+            for batch, _, error in outcomes:
+                if error is not None:
+                    print(f"PubMed batch of {len(batch)} article(s) failed: {error}")
+                    errors.append(error)
+                if sink.cancelled:
+                    pubmed_inflight.release([pmid for pmid in batch if pmid in sink.merged])
+                else:
+                    pubmed_inflight.release(batch, error)
+    finally:
+        pubmed_inflight.release(owned, FlightCancelledError())
+
+
+def obtain_pubmed_data(
+    PMID_list: Union[str, List[str]],
+    on_partial: Optional[Callable[[MetadataDict], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+) -> MetadataDict:
+    """
+    Fetch PubMed MEDLINE data via NCBI, persist to SQLite, and return enriched metadata.
 
-    segments: List[Tuple[str, str]] = []
-    for pmid in PMID_list:
-        if pmid in html_dict:
-            segments.append((pmid, html_dict[pmid]))
+    PMIDs are split into size-bounded batches that are fetched concurrently from
+    the current metadata provider (NCBI ctxp by default; see
+    ``pubxel_core.providers`` and ``pubxel_core.pubmed_fetch``). PMIDs already being
+    fetched by another caller are not requested again; this call waits for
+    that fetch and reads its rows from SQLite. A failing batch only drops its
+    own PMIDs; ``ValueError`` is raised only when nothing could be fetched.
+    Responses are streamed: each completed MEDLINE record is parsed as it
+    arrives and upserted into ``metadata_article.sqlite`` in bounded
+    transactions. ``on_partial``, if given, receives the enriched metadata
+    fetched so far after every flush. Setting ``cancel_event`` stops the
+    remaining downloads; records already received are still saved. Returns the
+    enriched metadata for all fetched PMIDs.
+    """
+    PMID_list = normalize_pmid_list(PMID_list)
+    if not PMID_list:
+        return {}
 
-    return _upsert_medline_segments(segments)
+    n_articles = len(PMID_list)
+    preview = ", ".join(PMID_list[:5])
+    if n_articles > 5:
+        preview = f"{preview}, ..."
+    print(f"Obtaining PubMed data for {n_articles} article(s): {preview}")
 
+    sink = _MedlineSink(PMID_list, on_partial=on_partial, cancel_event=cancel_event)
+    owned, waiting = pubmed_inflight.claim(PMID_list)
+    if waiting:
+        print(f"{len(waiting)} article(s) already being fetched; waiting for the shared result")
+
+    errors: List[Exception] = []
+    _fetch_owned_pmids(owned, sink, errors)
+
+    while waiting:
+        shared = pubmed_inflight.wait(waiting, cancel_event)
+        if len(shared) < len(waiting):
+            break  # cancelled while waiting
+        retry = [pmid for pmid, error in shared.items() if isinstance(error, FlightCancelledError)]
+        errors.extend(
+            error for error in shared.values()
+            if error is not None and not isinstance(error, FlightCancelledError)
+        )
+        done = [pmid for pmid, error in shared.items() if error is None]
+        if done:
+            cached, _ = load_cached_metadata(done)
+            if cached:
+                sink.merged.update(cached)
+                if on_partial:
+                    on_partial(dict(sink.merged))
+        if not retry or sink.cancelled:
+            break
+        # The owner was cancelled before finishing these; fetch them here.
+        print(f"{len(retry)} article(s) left unfinished by a cancelled fetch; fetching them")
+        owned, waiting = pubmed_inflight.claim(retry)
+        _fetch_owned_pmids(owned, sink, errors)
+
+    if errors and not sink.merged:
+        raise errors[0]
+
+    return {pmid: sink.merged[pmid] for pmid in PMID_list if pmid in sink.merged}
+
+
+# Years with IF<year>/Q<year>/Citation<year> worksheet columns (journal_metrics
+# reads whichever IF_/q_ columns the journal table has).
+IMPACT_FACTOR_YEARS = ("2020", "2021", "2022", "2023", "2024", "2025")
 
 # Worksheet column header (lowercase) -> internal field key
 WORKSHEET_COLUMN_HEADER: Dict[str, str] = {
@@ -388,20 +554,34 @@ WORKSHEET_COLUMN_HEADER: Dict[str, str] = {
     "citation": "cite",
     "output2": "ou2",
     "authors": "au2",
-    "if2022": "if2022",
-    "citation2022": "cite2022",
-    "q2022": "q2022",
-    "if2023": "if2023",
-    "citation2023": "cite2023",
-    "q2023": "q2023",
-    "if2024": "if2024",
-    "citation2024": "cite2024",
-    "q2024": "q2024",
-    "if2025": "if2025",
-    "citation2025": "cite2025",
-    "q2025": "q2025",
+    **{f"if{year}": f"if{year}" for year in IMPACT_FACTOR_YEARS},
+    **{f"citation{year}": f"cite{year}" for year in IMPACT_FACTOR_YEARS},
+    **{f"q{year}": f"q{year}" for year in IMPACT_FACTOR_YEARS},
 }
 
+# Fields JournalMetricsIndex.lookup matches impact factors on.
+_JOURNAL_MATCH_SOURCES = ("journal", "issn", "fulljournal")
+# Internal worksheet field key -> metadata fields build_worksheet_row_values reads
+# (see metadata_store.metadata_projection). Keys not listed need nothing;
+# citation keys also need their CitationTemplate's metadata_fields.
+WORKSHEET_FIELD_SOURCES: Dict[str, Tuple[str, ...]] = {
+    "doi": ("doi",),
+    "gr": ("gr",),
+    "si": ("si",),
+    "au": ("authors",),
+    "au2": ("authors",),
+    "fa": ("firstauthorlastnameetal",),
+    "ti": ("title",),
+    "ab": ("abstract",),
+    "jo": ("journal",),
+    "yr": ("year",),
+    "fayr": ("authoryear",),
+    **{f"if{year}": _JOURNAL_MATCH_SOURCES for year in IMPACT_FACTOR_YEARS},
+    **{f"q{year}": _JOURNAL_MATCH_SOURCES for year in IMPACT_FACTOR_YEARS},
+    **{f"cite{year}": _JOURNAL_MATCH_SOURCES for year in IMPACT_FACTOR_YEARS},
+}
+_CITATION_KEYS = frozenset({"cite", *(f"cite{year}" for year in IMPACT_FACTOR_YEARS)})
+
 
 def _sql_if_empty(value: Any) -> str:
     if value == "" or value is None:
@@ -442,76 +622,27 @@ def build_worksheet_header_map(header_names: List[Any]) -> Dict[str, int]:
     return header2
 
 
+def metadata_fields_for_columns(
+    column_names: List[Any],
+    citation: Optional[CitationTemplate] = None,
+) -> Set[str]:
+    """Metadata fields needed to fill worksheet columns with these header labels."""
+    citation = citation or get_citation_template()
+    fields: Set[str] = set()
+    for key in build_worksheet_header_map(column_names):
+        fields.update(WORKSHEET_FIELD_SOURCES.get(key, ()))
+        if key in _CITATION_KEYS:
+            fields.update(citation.metadata_fields)
+    return fields
+
+
 def load_impact_factor_dict() -> Dict[str, Tuple[str, ...]]:
-    impactfactordict: Dict[str, Tuple[str, ...]] = {}
-    with open(journal_combined_path, "r", encoding="utf8") as file:
-        lines = file.readlines()
-        if not lines:
-            return impactfactordict
-        tsv_header = [h.strip() for h in lines[0].rstrip("\n").split("\t")]
-        hidx = {name: i for i, name in enumerate(tsv_header)}
-        for line in lines[1:]:
-            parts = line.rstrip("\n").split("\t")
-            if "abb" not in hidx or (
-                "IF_2022" not in hidx
-                and "q_2022" not in hidx
-                and "IF_2023" not in hidx
-                and "q_2023" not in hidx
-                and "IF_2024" not in hidx
-                and "q_2024" not in hidx
-                and "IF_2025" not in hidx
-                and "q_2025" not in hidx
-            ):
-                continue
-            max_idx = max(
-                hidx.get("abb", -1),
-                hidx.get("IF_2022", -1),
-                hidx.get("q_2022", -1),
-                hidx.get("IF_2023", -1),
-                hidx.get("q_2023", -1),
-                hidx.get("IF_2024", -1),
-                hidx.get("q_2024", -1),
-                hidx.get("IF_2025", -1),
-                hidx.get("q_2025", -1),
-            )
-            if len(parts) <= max_idx:
-                continue
-            abb = parts[hidx["abb"]].strip()
-            if not abb:
-                continue
-            IF2022 = parts[hidx["IF_2022"]].strip() if "IF_2022" in hidx else ""
-            quartile2022 = parts[hidx["q_2022"]].strip() if "q_2022" in hidx else ""
-            IF2023 = parts[hidx["IF_2023"]].strip() if "IF_2023" in hidx else ""
-            quartile2023 = parts[hidx["q_2023"]].strip() if "q_2023" in hidx else ""
-            IF2024 = parts[hidx["IF_2024"]].strip() if "IF_2024" in hidx else ""
-            quartile2024 = parts[hidx["q_2024"]].strip() if "q_2024" in hidx else ""
-            IF2025 = parts[hidx["IF_2025"]].strip() if "IF_2025" in hidx else ""
-            quartile2025 = parts[hidx["q_2025"]].strip() if "q_2025" in hidx else ""
-            if (
-                IF2022
-                or quartile2022
-                or IF2023
-                or quartile2023
-                or IF2024
-                or quartile2024
-                or IF2025
-                or quartile2025
-            ):
-                impactfactordict[abb] = (
-                    IF2022,
-                    quartile2022,
-                    IF2023,
-                    quartile2023,
-                    IF2024,
-                    quartile2024,
-                    IF2025,
-                    quartile2025,
-                )
-    return impactfactordict
+    """``{abb: (IF_2022, q_2022, ..., IF_2025, q_2025)}``; kept for callers of the old API (see journal_metrics)."""
+    return dict(get_journal_metrics().legacy_impact_factor_dict())
 
 
 def _needs_impact_factors(header2: Dict[str, int]) -> bool:
-    for year in ("2022", "2023", "2024", "2025"):
+    for year in IMPACT_FACTOR_YEARS:
         if (
             header2.get(f"if{year}", -1) >= 0
             or header2.get(f"cite{year}", -1) >= 0
@@ -529,177 +660,217 @@ def _format_worksheet_cell(key: str, value: Any) -> Any:
     return _sql_if_empty(value)
 
 
-def build_worksheet_row_values(
-    pmid: str,
-    metadata: MetadataDict,
-    header2: Dict[str, int],
-    impactfactordict: Dict[str, Tuple[str, ...]],
-) -> Dict[str, Any]:
-    """Compute internal field values for one PMID row (formatted for worksheet cells)."""
-    article_dict = metadata[pmid].get("article", {}) or {}
-
-    journal = article_dict.get("journal", "")
-    title = article_dict.get("title", "")
-    source = article_dict.get("source", "") or ""
-    firstauthorlastnameetal = article_dict.get("firstauthorlastnameetal", "")
-    cite = (
-        firstauthorlastnameetal.rstrip(".")
-        + ". "
-        + title
-        + " "
-        + source.rstrip()
-        + " PMID: "
-        + pmid
-        + "."
-    )
-    authors_list = metadata[pmid].get("authors", []) or []
-    authors_text = ", ".join(
+def _authors_text(authors: List[Dict[str, Any]]) -> str:
+    return ", ".join(
         a.get("short_name") or a.get("full_name") or ""
-        for a in authors_list
+        for a in authors
         if (a.get("short_name") or a.get("full_name"))
     )
 
-    IF2022 = IF2023 = IF2024 = IF2025 = ""
-    Q2022 = Q2023 = Q2024 = Q2025 = ""
-    cite2022 = cite2023 = cite2024 = cite2025 = ""
-    need_any = _needs_impact_factors(header2)
-    if need_any:
-        jkey = (journal or "").upper().strip().rstrip(".")
-        IF2022, Q2022, IF2023, Q2023, IF2024, Q2024, IF2025, Q2025 = impactfactordict.get(
-            jkey, ("", "", "", "", "", "", "", "")
-        )
 
-        if header2.get("cite2022", -1) >= 0:
-            if IF2022:
-                pattern = re.escape(journal)
-                replacement = r"\1 (IF: " + IF2022 + ")"
-                source2022 = re.sub(f"({pattern})", replacement, source, count=1)
-            else:
-                source2022 = source
-            cite2022 = (
-                firstauthorlastnameetal.rstrip(".")
-                + ". "
-                + title
-                + " "
-                + source2022.rstrip()
-                + " PMID: "
-                + pmid
-                + "."
-            )
+def _article_column(field: str) -> Callable[[Dict[str, Any], List[Dict[str, Any]]], Any]:
+    return lambda article, authors: article.get(field, "")
 
-        if header2.get("cite2023", -1) >= 0:
-            if IF2023:
-                pattern = re.escape(journal)
-                replacement = r"\1 (IF: " + IF2023 + ")"
-                source2023 = re.sub(f"({pattern})", replacement, source, count=1)
-            else:
-                source2023 = source
-            cite2023 = (
-                firstauthorlastnameetal.rstrip(".")
-                + ". "
-                + title
-                + " "
-                + source2023.rstrip()
-                + " PMID: "
-                + pmid
-                + "."
-            )
 
-        if header2.get("cite2024", -1) >= 0:
-            if IF2024:
-                pattern = re.escape(journal)
-                replacement = r"\1 (IF: " + IF2024 + ")"
-                source2024 = re.sub(f"({pattern})", replacement, source, count=1)
-            else:
-                source2024 = source
-            cite2024 = (
-                firstauthorlastnameetal.rstrip(".")
-                + ". "
-                + title
-                + " "
-                + source2024.rstrip()
-                + " PMID: "
-                + pmid
-                + "."
-            )
+def _list_column(field: str) -> Callable[[Dict[str, Any], List[Dict[str, Any]]], Any]:
+    return lambda article, authors: (article.get(field, "") or "").replace("|", "; ")
 
-        if header2.get("cite2025", -1) >= 0:
-            if IF2025:
-                pattern = re.escape(journal)
-                replacement = r"\1 (IF: " + IF2025 + ")"
-                source2025 = re.sub(f"({pattern})", replacement, source, count=1)
-            else:
-                source2025 = source
-            cite2025 = (
-                firstauthorlastnameetal.rstrip(".")
-                + ". "
-                + title
-                + " "
-                + source2025.rstrip()
-                + " PMID: "
-                + pmid
-                + "."
+
+# Worksheet key -> value from (article, authors) for the plain metadata columns;
+# pmid, IF/Q<year> and citation columns are built by build_worksheet_columns.
+_WORKSHEET_ARTICLE_COLUMNS: Dict[str, Callable[[Dict[str, Any], List[Dict[str, Any]]], Any]] = {
+    "doi": _article_column("doi"),
+    "gr": _list_column("gr"),
+    "si": _list_column("si"),
+    "au": lambda article, authors: _authors_text(authors),
+    "au2": lambda article, authors: _authors_text(authors),
+    "fa": _article_column("firstauthorlastnameetal"),
+    "ti": _article_column("title"),
+    "ab": _article_column("abstract"),
+    "jo": _article_column("journal"),
+    "yr": _article_column("year"),
+    "fayr": _article_column("authoryear"),
+}
+
+
+def build_worksheet_columns(
+    pmids: List[str],
+    metadata: MetadataDict,
+    header2: Dict[str, int],
+    journal_metrics: Optional[JournalMetricsIndex] = None,
+    citation: Optional[CitationTemplate] = None,
+) -> Dict[str, List[Any]]:
+    """
+    Compute the worksheet columns in ``header2`` for all ``pmids`` at once.
+
+    Returns ``{key: [cell value per PMID]}`` (formatted for worksheet cells).
+    Only the requested columns are computed; the journal lookup and the
+    citation variants run once per row however many IF/Q/Citation columns use
+    them. PMIDs missing from ``metadata`` get their PMID in the ``pmid`` column
+    and ``None`` (no value) in the others.
+    """
+    rows = [
+        None if entry is None else (entry.get("article", {}) or {}, entry.get("authors", []) or [])
+        for entry in (metadata.get(pmid) for pmid in pmids)
+    ]
+    columns: Dict[str, List[Any]] = {}
+    if "pmid" in header2:
+        columns["pmid"] = list(pmids)
+
+    metrics_rows: List[Optional[JournalMetrics]] = [None] * len(rows)
+    if journal_metrics is not None and _needs_impact_factors(header2):
+        metrics_rows = [
+            None
+            if row is None
+            else journal_metrics.lookup(
+                row[0].get("journal", ""), issn=row[0].get("issn"), title=row[0].get("fulljournal")
             )
+            for row in rows
+        ]
+    for year in IMPACT_FACTOR_YEARS:
+        for key, value_of in ((f"if{year}", JournalMetrics.impact_factor), (f"q{year}", JournalMetrics.quartile)):
+            if key in header2:
+                columns[key] = [
+                    None if row is None else _journal_if_empty(value_of(metrics, year) if metrics else "")
+                    for row, metrics in zip(rows, metrics_rows)
+                ]
+
+    cite_keys = [key for key in header2 if key in _CITATION_KEYS]
+    if cite_keys:
+        template = citation or get_citation_template()
+        rendered: List[Optional[Dict[str, str]]] = []
+        for pmid, row, metrics in zip(pmids, rows, metrics_rows):
+            if row is None:
+                rendered.append(None)
+                continue
+            # Citation key -> impact factor inserted into it ("" for the plain citation).
+            impact_factors = {
+                key: metrics.impact_factor(key[len("cite"):]) if metrics and key != "cite" else ""
+                for key in cite_keys
+            }
+            rendered.append(template.render_variants(pmid, row[0], row[1], impact_factors))
+        for key in cite_keys:
+            columns[key] = [None if values is None else _sql_if_empty(values[key]) for values in rendered]
+
+    for key in header2:
+        if key in columns:
+            continue
+        value_of = _WORKSHEET_ARTICLE_COLUMNS.get(key)
+        columns[key] = [
+            None if row is None else _format_worksheet_cell(key, value_of(*row) if value_of else "")
+            for row in rows
+        ]
+    return columns
+
 
-    raw: Dict[str, Any] = {
-        "pmid": pmid,
-        "doi": article_dict.get("doi", ""),
-        "gr": (article_dict.get("gr", "") or "").replace("|", "; "),
-        "si": (article_dict.get("si", "") or "").replace("|", "; "),
-        "au2": authors_text,
-        "au": authors_text,
-        "fa": firstauthorlastnameetal,
-        "ti": title,
-        "ab": article_dict.get("abstract", ""),
-        "jo": article_dict.get("journal", ""),
-        "yr": article_dict.get("year", ""),
-        "fayr": article_dict.get("authoryear", ""),
-        "cite": cite,
-        "if2022": IF2022,
-        "cite2022": cite2022,
-        "q2022": Q2022,
-        "if2023": IF2023,
-        "cite2023": cite2023,
-        "q2023": Q2023,
-        "if2024": IF2024,
-        "cite2024": cite2024,
-        "q2024": Q2024,
-        "if2025": IF2025,
-        "cite2025": cite2025,
-        "q2025": Q2025,
-    }
-
-    return {key: _format_worksheet_cell(key, raw.get(key, "")) for key in header2}
+def build_worksheet_row_values(
+    pmid: str,
+    metadata: MetadataDict,
+    header2: Dict[str, int],
+    journal_metrics: Optional[JournalMetricsIndex],
+    citation: Optional[CitationTemplate] = None,
+) -> Dict[str, Any]:
+    """Compute internal field values for one PMID row (see build_worksheet_columns)."""
+    columns = build_worksheet_columns([pmid], metadata, header2, journal_metrics, citation)
+    return {key: values[0] for key, values in columns.items()}
 
 
 def iter_worksheet_export_rows(
     pmids: List[str],
     metadata: MetadataDict,
     column_names: List[str],
+    citation: Optional[CitationTemplate] = None,
 ) -> Tuple[List[str], List[List[str]]]:
     """Build header and data rows for worksheet export (Excel TSV, etc.)."""
     header2 = build_worksheet_header_map(column_names)
     need_any = _needs_impact_factors(header2)
-    impactfactordict = load_impact_factor_dict() if need_any else {}
+    journal_metrics = get_journal_metrics() if need_any else None
+    columns = build_worksheet_columns(pmids, metadata, header2, journal_metrics, citation)
+
+    blank: List[Any] = [None] * len(pmids)
+    cell_columns = [
+        columns.get(WORKSHEET_COLUMN_HEADER.get(str(col_name).lower(), ""), blank)
+        for col_name in column_names
+    ]
+    data_rows: List[List[str]] = [
+        ["" if column[i] is None else str(column[i]) for column in cell_columns]
+        for i in range(len(pmids))
+    ]
+    return column_names, data_rows
 
-    data_rows: List[List[str]] = []
-    for pmid in pmids:
-        if pmid not in metadata:
-            row_values = {"pmid": pmid}
+
+def _contiguous_runs(indexes: Iterable[int]) -> List[Tuple[int, int]]:
+    """(first, last) of each run of consecutive integers in ``indexes``."""
+    runs: List[Tuple[int, int]] = []
+    for index in indexes:
+        if runs and index == runs[-1][1] + 1:
+            runs[-1] = (runs[-1][0], index)
         else:
-            row_values = build_worksheet_row_values(pmid, metadata, header2, impactfactordict)
+            runs.append((index, index))
+    return runs
 
-        cells: List[str] = []
-        for col_name in column_names:
-            key = WORKSHEET_COLUMN_HEADER.get(str(col_name).lower())
-            if key is None:
-                cells.append("")
-            else:
-                val = row_values.get(key, "")
-                cells.append("" if val is None else str(val))
-        data_rows.append(cells)
 
-    return column_names, data_rows
+# Excel application state switched off while a block of cells is written.
+_EXCEL_WRITE_SUSPEND = (("screen_updating", False), ("enable_events", False), ("calculation", "manual"))
+
+
+@contextmanager
+def suspend_excel_updates(app: Optional[xw.App]) -> Iterator[None]:
+    """
+    Turn off screen updating, events and automatic calculation of ``app`` for
+    the duration of the block, restoring the previous values afterwards. Settings
+    the application refuses (e.g. no workbook open) are skipped.
+    """
+    saved: List[Tuple[str, Any]] = []
+    for attr, value in _EXCEL_WRITE_SUSPEND if app is not None else ():
+        try:
+            previous = getattr(app, attr)
+            setattr(app, attr, value)
+        except Exception as e:
+            print(f"Could not set Excel {attr}: {e}")
+            continue
+        saved.append((attr, previous))
+    try:
+        yield
+    finally:
+        for attr, previous in reversed(saved):
+            try:
+                setattr(app, attr, previous)
+            except Exception as e:
+                print(f"Could not restore Excel {attr}: {e}")
+
+
+def _worksheet_write_blocks(
+    rows: List[Tuple[int, str]],
+    identified: List[bool],
+    header2: Dict[str, int],
+) -> Iterator[Tuple[int, int, List[int], List[str]]]:
+    """
+    Rectangular blocks covering the cells fill_worksheet_rows writes, as
+    (first row, first column, positions in ``rows``, header2 keys). Blocks span
+    consecutive worksheet rows with the same identified state and consecutive
+    header2 columns; rows of unidentified PMIDs only cover the pmid column.
+    """
+    keys_by_col = {col_idx: key for key, col_idx in header2.items() if col_idx >= 0}
+    col_runs = [
+        (first, [keys_by_col[c] for c in range(first, last + 1)])
+        for first, last in _contiguous_runs(sorted(keys_by_col))
+    ]
+    pmid_col = header2.get("pmid", -1)
+    pmid_runs = [(pmid_col, ["pmid"])] if pmid_col >= 0 else []
+
+    start = 0
+    for end in range(1, len(rows) + 1):
+        if (
+            end < len(rows)
+            and rows[end][0] == rows[end - 1][0] + 1
+            and identified[end] == identified[start]
+        ):
+            continue
+        positions = list(range(start, end))
+        for first_col, keys in col_runs if identified[start] else pmid_runs:
+            yield rows[start][0], first_col, positions, keys
+        start = end
 
 
 def fill_worksheet_rows(
@@ -707,27 +878,40 @@ def fill_worksheet_rows(
     metadata: MetadataDict,
     header2: Dict[str, int],
     rows: List[Tuple[int, str]],
+    citation: Optional[CitationTemplate] = None,
 ) -> Tuple[List[str], List[str]]:
-    """Fill worksheet data rows. Each item in ``rows`` is (0-based row index, PMID)."""
-    identified_pmids: List[str] = []
-    unidentified_pmids: List[str] = []
-    need_any = _needs_impact_factors(header2)
-    impactfactordict = load_impact_factor_dict() if need_any else {}
+    """
+    Fill worksheet data rows. Each item in ``rows`` is (0-based row index, PMID).
 
-    for row_i, pmidstring in rows:
-        if pmidstring not in metadata:
-            unidentified_pmids.append(pmidstring)
-            if header2.get("pmid", -1) >= 0:
-                ws[row_i, header2["pmid"]].value = pmidstring
-            continue
+    Values are written as 2D blocks (one Range.value assignment per run of
+    consecutive rows and header columns) with Excel calculation and events
+    suspended; cells outside the header2 columns are left untouched.
+    """
+    identified = [pmidstring in metadata for _, pmidstring in rows]
+    identified_pmids = [pmidstring for (_, pmidstring), found in zip(rows, identified) if found]
+    unidentified_pmids = [pmidstring for (_, pmidstring), found in zip(rows, identified) if not found]
+    if not rows:
+        return identified_pmids, unidentified_pmids
 
-        identified_pmids.append(pmidstring)
-        row_values = build_worksheet_row_values(
-            pmidstring, metadata, header2, impactfactordict
-        )
-        for key, col_idx in header2.items():
-            if key in row_values:
-                ws[row_i, col_idx].value = row_values[key]
+    need_any = _needs_impact_factors(header2)
+    journal_metrics = get_journal_metrics() if need_any else None
+    columns = build_worksheet_columns(
+        [pmidstring for _, pmidstring in rows], metadata, header2, journal_metrics, citation
+    )
+
+    try:
+        app = ws.book.app
+    except Exception:
+        app = None
+    with suspend_excel_updates(app):
+        for first_row, first_col, positions, keys in _worksheet_write_blocks(rows, identified, header2):
+            block_columns = [columns[key] for key in keys]
+            values = [[column[i] for column in block_columns] for i in positions]
+            # xlwings ranges are 1-based (ws[row_i, col_idx] is 0-based).
+            ws.range(
+                (first_row + 1, first_col + 1),
+                (first_row + len(positions), first_col + len(keys)),
+            ).value = values
 
     return identified_pmids, unidentified_pmids
 
@@ -0,0 +1,375 @@
+# Pub-Xel - A Biomedical Reference Management Tool
+# Copyright (C) 2024  Jongyeob Kim <info@pubxel.org>
+#
+# Batching and concurrency for PubMed fetches: split PMID lists into
+# size-bounded batches and run them on a small worker pool, spaced out by a
+# shared rate limiter so we stay within NCBI's request-rate policy. Transient
+# failures are retried with backoff, and a circuit breaker stops hammering
+# NCBI (callers fall back to the SQLite cache) after repeated failures.
+
+from __future__ import annotations
+
+import concurrent.futures
+import datetime
+import email.utils
+import random
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+import requests
+
+from pubxel_core import http_session
+
+T = TypeVar("T")
+
+# NCBI asks clients without an API key to stay at or below 3 requests/second.
+NCBI_REQUESTS_PER_SECOND = 3.0
+PUBMED_FETCH_MAX_WORKERS = 3
+PUBMED_BATCH_MAX_IDS = 200
+# Length budget for the comma-joined id list (keeps the full GET URL well under
+# the ~2k character limit enforced by some proxies).
+PUBMED_BATCH_MAX_ID_CHARS = 1800
+
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+RETRY_MAX_ATTEMPTS = 4
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 8.0
+RETRY_AFTER_MAX = 30.0
+
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_SECONDS = 60.0
+
+BatchOutcome = Tuple[List[str], Optional[T], Optional[Exception]]
+
+
+class PubMedUnavailableError(ValueError):
+    """Raised instead of a network call while the PubMed circuit breaker is open."""
+
+    def __init__(self, message: str = ""):
+        super().__init__(
+            message
+            or "Connection Error.\nPubMed is temporarily unavailable after repeated failures. "
+            "Showing cached data only; please try again later."
+        )
+
+
+class FlightCancelledError(Exception):
+    """Flight outcome for PMIDs whose owner stopped before fetching them; waiters fetch them again."""
+
+
+class RateLimiter:
+    """Thread-safe limiter that spaces calls at least ``1 / rate`` seconds apart."""
+
+    def __init__(self, rate_per_second: float):
+        self.interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_allowed = 0.0
+
+    def wait(self) -> None:
+        if self.interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_allowed)
+            self._next_allowed = start + self.interval
+        delay = start - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+ncbi_rate_limiter = RateLimiter(NCBI_REQUESTS_PER_SECOND)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker. A failure is a request that still
+    failed after all of its retries (see get_with_retry), not a single attempt.
+
+    After ``failure_threshold`` such failures in a row the circuit opens and
+    ``allow()`` returns False for ``reset_seconds``. After that exactly one
+    caller is let through as a trial (half-open): success closes the circuit,
+    failure re-opens it; other callers are refused until then. A trial that
+    never reports back is replaced after another ``reset_seconds``.
+    ``is_open`` only reports the state and never claims the trial.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        reset_seconds: float = CIRCUIT_RESET_SECONDS,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_started: Optional[float] = None
+
+    def _refusing(self, now: float) -> bool:
+        if self._opened_at is None:
+            return False
+        if now - self._opened_at < self.reset_seconds:
+            return True
+        return self._trial_started is not None and now - self._trial_started < self.reset_seconds
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self._refusing(time.monotonic())
+
+    def allow(self) -> bool:
+        """Whether a request may go out now; in the half-open state this claims the one trial."""
+        with self._lock:
+            now = time.monotonic()
+            if self._refusing(now):
+                return False
+            if self._opened_at is not None:
+                self._trial_started = now
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_started = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_started = None
+            if self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    print(f"PubMed circuit opened after {self._failures} consecutive failures")
+                self._opened_at = time.monotonic()
+
+    def reset(self) -> None:
+        self.record_success()
+
+
+pubmed_circuit = CircuitBreaker()
+
+
+class _Flight:
+    __slots__ = ("done", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.error: Optional[Exception] = None
+
+
+class SingleFlight:
+    """
+    In-flight registry keyed by PMID.
+
+    The first caller to ``claim`` a key owns its fetch; concurrent callers for
+    the same key get the owner's flight to ``wait`` on and then read the row
+    the owner wrote, so each accession is downloaded and upserted once. An
+    owner that stops early releases its unfinished keys with a
+    ``FlightCancelledError`` so that waiters claim and fetch them themselves.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+
+    def claim(self, keys: Iterable[str]) -> Tuple[List[str], Dict[str, _Flight]]:
+        """Return ``(keys now owned by the caller, {key: flight} owned by others)``."""
+        owned: List[str] = []
+        waiting: Dict[str, _Flight] = {}
+        with self._lock:
+            for key in keys:
+                flight = self._flights.get(key)
+                if flight is None:
+                    self._flights[key] = _Flight()
+                    owned.append(key)
+                else:
+                    waiting[key] = flight
+        return owned, waiting
+
+    def release(self, keys: Iterable[str], error: Optional[Exception] = None) -> None:
+        """Finish the caller's flights for ``keys`` (idempotent) and wake waiters."""
+        with self._lock:
+            flights = [self._flights.pop(key) for key in keys if key in self._flights]
+        for flight in flights:
+            flight.error = error
+            flight.done.set()
+
+    @staticmethod
+    def wait(
+        waiting: Dict[str, _Flight],
+        cancel_event: Optional[threading.Event] = None,
+        poll_seconds: float = 0.2,
+    ) -> Dict[str, Optional[Exception]]:
+        """Block until every flight finishes (or ``cancel_event`` is set); return errors by key."""
+        results: Dict[str, Optional[Exception]] = {}
+        for key, flight in waiting.items():
+            while not flight.done.wait(poll_seconds):
+                if cancel_event is not None and cancel_event.is_set():
+                    return results
+            results[key] = flight.error
+        return results
+
+
+pubmed_inflight = SingleFlight()
+
+
+def _retry_after_seconds(response: requests.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return min(float(value), RETRY_AFTER_MAX)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=datetime.timezone.utc)
+    delta = (when - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+    return min(max(delta, 0.0), RETRY_AFTER_MAX)
+
+
+def _backoff_delay(attempt: int) -> float:
+    # "Full jitter": uniform in [0, min(cap, base * 2**attempt)].
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt)))
+
+
+def get_with_retry(
+    url: str,
+    max_attempts: int = RETRY_MAX_ATTEMPTS,
+    breaker: Optional[CircuitBreaker] = pubmed_circuit,
+    limiter: Optional[RateLimiter] = ncbi_rate_limiter,
+    **kwargs,
+) -> requests.Response:
+    """
+    GET through the shared session, retrying timeouts, connection errors and
+    HTTP 429/5xx with exponential backoff and jitter (``Retry-After`` wins on
+    429/503).
+
+    Returns the final response (callers still ``raise_for_status()``), or
+    re-raises the last ``requests`` exception. Raises ``PubMedUnavailableError``
+    without touching the network while ``breaker`` is open. Only a request that
+    has used up all its attempts counts as one ``breaker`` failure; a request
+    that has started always gets its retries. Every attempt, retries included,
+    first waits for ``limiter``.
+    """
+    if breaker is not None and not breaker.allow():
+        raise PubMedUnavailableError()
+    attempt = 0
+    while True:
+        delay: Optional[float] = None
+        if limiter is not None:
+            limiter.wait()
+        try:
+            response = http_session.get(url, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            attempt += 1
+            if attempt >= max_attempts:
+                if breaker is not None:
+                    breaker.record_failure()
+                raise
+        else:
+            if response.status_code not in RETRY_STATUS_CODES:
+                if breaker is not None:
+                    breaker.record_success()
+                return response
+            attempt += 1
+            if attempt >= max_attempts:
+                if breaker is not None:
+                    breaker.record_failure()
+                return response
+            if response.status_code in (429, 503):
+                delay = _retry_after_seconds(response)
+            response.close()
+        if delay is None:
+            delay = _backoff_delay(attempt)
+        print(f"PubMed request failed; retrying in {delay:.1f}s (attempt {attempt + 1}/{max_attempts})")
+        time.sleep(delay)
+
+
+def chunk_pmids(
+    pmids: List[str],
+    max_ids: int = PUBMED_BATCH_MAX_IDS,
+    max_chars: int = PUBMED_BATCH_MAX_ID_CHARS,
+) -> List[List[str]]:
+    """Split PMIDs into batches bounded by id count and joined id-list length."""
+    batches: List[List[str]] = []
+    current: List[str] = []
+    current_chars = 0
+    for pmid in pmids:
+        extra = len(pmid) + (1 if current else 0)
+        if current and (len(current) >= max_ids or current_chars + extra > max_chars):
+            batches.append(current)
+            current = []
+            current_chars = 0
+            extra = len(pmid)
+        current.append(pmid)
+        current_chars += extra
+    if current:
+        batches.append(current)
+    return batches
+
+
+_fetch_pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_fetch_pool_lock = threading.Lock()
+
+
+def _get_fetch_pool() -> concurrent.futures.ThreadPoolExecutor:
+    """The process-wide batch pool, shared by every fetch (created on first use)."""
+    global _fetch_pool
+    with _fetch_pool_lock:
+        if _fetch_pool is None:
+            _fetch_pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=PUBMED_FETCH_MAX_WORKERS,
+                thread_name_prefix="pubxel-fetch",
+            )
+        return _fetch_pool
+
+
+def fetch_batches(
+    batches: List[List[str]],
+    fetch_batch: Callable[[List[str]], T],
+    limiter: Optional[RateLimiter] = None,
+) -> List[BatchOutcome]:
+    """
+    Run ``fetch_batch`` for every batch on the shared fetch pool (at most
+    PUBMED_FETCH_MAX_WORKERS batches in flight across all callers). PubMed
+    requests are rate limited per attempt in get_with_retry; ``limiter`` only
+    spaces out batch starts for fetchers that do not go through it.
+
+    Returns ``(batch, result, error)`` per batch in input order. An exception
+    raised by one batch is captured in its own outcome and does not cancel the
+    others.
+    """
+
+    def run(batch: List[str]) -> T:
+        if limiter is not None:
+            limiter.wait()
+        return fetch_batch(batch)
+
+    if len(batches) == 1:
+        try:
+            return [(batches[0], run(batches[0]), None)]
+        except Exception as e:
+            return [(batches[0], None, e)]
+
+    pool = _get_fetch_pool()
+    futures = [pool.submit(run, batch) for batch in batches]
+    outcomes: List[BatchOutcome] = []
+    for batch, future in zip(batches, futures):
+        try:
+            outcomes.append((batch, future.result(), None))
+        except Exception as e:
+            outcomes.append((batch, None, e))
+    return outcomes
+
+
+def shutdown_fetch_pool() -> None:
+    """Stop the shared batch pool (called on shutdown); queued batches are dropped."""
+    global _fetch_pool
+    with _fetch_pool_lock:
+        pool, _fetch_pool = _fetch_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,169 @@
+# Pub-Xel - A Biomedical Reference Management Tool
+# Copyright (C) 2024  Jongyeob Kim <info@pubxel.org>
+#
+# Compact article/author records returned by MetadataStore.get_metadata.
+# They behave like the dicts they replace (get, [], in, keys/items, update,
+# ==, dict(record)) but keep their values in a list/slots, so large batches
+# allocate far fewer objects.
+
+from __future__ import annotations
+
+from collections.abc import Mapping, MutableMapping
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+_MISSING = object()
+
+
+@lru_cache(maxsize=64)
+def _column_index(columns: Tuple[str, ...]) -> Dict[str, int]:
+    return {name: i for i, name in enumerate(columns)}
+
+
+class ArticleRecord(MutableMapping):
+    """
+    One ``articles`` row as a mutable mapping.
+
+    Values live in a list indexed by a column map shared by every record of the
+    same query; keys outside the selected columns (e.g. fields added by
+    enrich_metadata to a projected row) go to a small overflow dict.
+    """
+
+    __slots__ = ("_index", "_values", "_extra")
+
+    def __init__(self, columns: Tuple[str, ...], values: Sequence[Any]):
+        self._index = _column_index(columns)
+        self._values = list(values)
+        self._extra: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ArticleRecord":
+        return cls(tuple(data), tuple(data.values()))
+
+    @classmethod
+    def factory(cls, columns: Sequence[str]) -> Callable[[Sequence[Any]], "ArticleRecord"]:
+        """Return a builder for many rows of the same ``columns`` (skips the per-row index lookup)."""
+        index = _column_index(tuple(columns))
+        new = object.__new__
+
+        def make(values: Sequence[Any]) -> "ArticleRecord":
+            record = new(cls)
+            record._index = index
+            record._values = list(values)
+            record._extra = None
+            return record
+
+        return make
+
+    def __getitem__(self, key: str) -> Any:
+        i = self._index.get(key)
+        if i is not None:
+            value = self._values[i]
+            if value is not _MISSING:
+                return value
+        elif self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        i = self._index.get(key)
+        if i is not None:
+            value = self._values[i]
+            return default if value is _MISSING else value
+        if self._extra is not None:
+            return self._extra.get(key, default)
+        return default
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        i = self._index.get(key)
+        if i is not None:
+            self._values[i] = value
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        i = self._index.get(key)
+        if i is not None and self._values[i] is not _MISSING:
+            self._values[i] = _MISSING
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        i = self._index.get(key)  # type: ignore[arg-type]
+        if i is not None:
+            return self._values[i] is not _MISSING
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self) -> Iterator[str]:
+        for name, i in self._index.items():
+            if self._values[i] is not _MISSING:
+                yield name
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        n = sum(1 for value in self._values if value is not _MISSING)
+        return n + (len(self._extra) if self._extra else 0)
+
+    def copy(self) -> "ArticleRecord":
+        clone = ArticleRecord.__new__(ArticleRecord)
+        clone._index = self._index
+        clone._values = list(self._values)
+        clone._extra = dict(self._extra) if self._extra is not None else None
+        return clone
+
+    def __reduce__(self):
+        return (ArticleRecord.from_dict, (dict(self),))
+
+    def __repr__(self) -> str:
+        return f"ArticleRecord({dict(self)!r})"
+
+
+class AuthorRecord(Mapping):
+    """One ``article_authors`` row as a read-only mapping."""
+
+    __slots__ = ("author_order", "author_type", "full_name", "short_name")
+    _FIELDS = ("author_order", "author_type", "full_name", "short_name")
+
+    def __init__(
+        self,
+        author_order: int,
+        author_type: Optional[str],
+        full_name: Optional[str],
+        short_name: Optional[str],
+    ):
+        self.author_order = author_order
+        self.author_type = author_type
+        self.full_name = full_name
+        self.short_name = short_name
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._FIELDS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self._FIELDS:
+            return getattr(self, key)
+        return default
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._FIELDS)
+
+    def __len__(self) -> int:
+        return len(self._FIELDS)
+
+    def copy(self) -> "AuthorRecord":
+        # Immutable, so sharing is safe.
+        return self
+
+    def __reduce__(self):
+        return (AuthorRecord, tuple(getattr(self, f) for f in self._FIELDS))
+
+    def __repr__(self) -> str:
+        return f"AuthorRecord({dict(self)!r})"
+
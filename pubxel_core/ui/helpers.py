@@ -10,6 +10,9 @@ from PyQt6 import QtCore
 from PyQt6.QtCore import Qt
 from PyQt6.QtWidgets import QMessageBox, QPushButton, QWidget
 
+from pubxel_core import async_resolver, http_session, pubmed
+from pubxel_core.metadata_store import close_store_pools
+from pubxel_core.pubmed_fetch import shutdown_fetch_pool
 from pubxel_core import runtime as rt
 from pubxel_core.recent_worksheets import register_recent_worksheet
 from pubxel_core.settings import save_settings_key
@@ -97,6 +100,26 @@ def graceful_shutdown():
         stop_listeners()
     except Exception:
         pass
+    try:
+        pubmed.stop_stale_refresh()
+    except Exception:
+        pass
+    try:
+        async_resolver.shutdown_event_loop()
+    except Exception:
+        pass
+    try:
+        shutdown_fetch_pool()
+    except Exception:
+        pass
+    try:
+        http_session.close_session()
+    except Exception:
+        pass
+    try:
+        close_store_pools()
+    except Exception:
+        pass
     try:
         if rt.lock_file:
             rt.lock_file.close()
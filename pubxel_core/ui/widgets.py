@@ -1,6 +1,7 @@
 # Pub-Xel - A Biomedical Reference Management Tool
 # Copyright (C) 2024  Jongyeob Kim <info@pubxel.org>
 
+import asyncio
 import copy
 import datetime
 import os
@@ -41,11 +42,19 @@ from PyQt6.QtWidgets import (
 )
 
 from data.version import __version__
+from pubxel_core import async_resolver
 from pubxel_core import runtime as rt
 from pubxel_core.excel_ops import check_file_exist, copy_list, files_name_to_path, process_ids
 from pubxel_core.clipboard import message_for_action, read_clipboard
+from pubxel_core.citation import citation_template_from_settings
 from pubxel_core.ids import list_to_string
-from pubxel_core.pubmed import input_pubmed_data, normalize_pmid, normalize_pmid_list, resolve_metadata_for_pmids
+from pubxel_core.pubmed import (
+    input_pubmed_data,
+    load_cached_metadata,
+    metadata_fields_for_columns,
+    normalize_pmid,
+    normalize_pmid_list,
+)
 from pubxel_core.settings import save_settings, save_settings_key
 from pubxel_core.ui.dialogs_extra import RunningFunctionDialog
 from pubxel_core.ui.helpers import (
@@ -57,7 +66,7 @@ from pubxel_core.ui.helpers import (
     show_worksheet_saved_dialog,
     try_open_directory,
 )
-from pubxel_core.worksheet_builder import create_filled_worksheet
+from pubxel_core.worksheet_builder import build_column_specs, create_filled_worksheet
 
 class PopupMessageFade(QLabel):
     def __init__(self, parent=None):
@@ -141,6 +150,7 @@ class window_inspect(QWidget):
         self.setWindowTitle('Inspect')
         self.data = data  # Store the passed data
         self.pubmeddata = None
+        self._pubmed_future = None
         self._pubmed_metadata_ready.connect(self._on_pubmed_metadata_ready)
         self._pubmed_connection_status.connect(self._on_pubmed_connection_status)
         self._worksheet_built.connect(self._on_worksheet_built)
@@ -399,11 +409,10 @@ class window_inspect(QWidget):
 
         self.scrollLayout_suppl.layout().addStretch()
 
-        thread = threading.Thread(target=self.load_pubmed_data, args=(pubmed_ids,))
         if pubmed_ids:
             self._pubmed_load_in_progress = True
             self._update_worksheet_buttons_state()
-        thread.start()
+        self.load_pubmed_data(pubmed_ids)
 
         button_openall = self.findChild(QPushButton, 'button_openall')
         button_openall.setText('&All')
@@ -650,30 +659,40 @@ class window_inspect(QWidget):
         elif action_copy_article is not None and selected == action_copy_article:
             copy_list(article_text)
 
+    @staticmethod
+    def _pubmed_metadata_fields():
+        # Labels/tooltips only; "Create worksheet" reloads full records when it runs.
+        return {"cite", "cite_maincheckbox", "authoryear"}
+
     def load_pubmed_data(self, pubmed_ids):
+        """Resolve PubMed metadata on the shared resolver loop (cancelled on close)."""
         if not pubmed_ids:
             return
+        self._pubmed_future = async_resolver.submit(self._load_pubmed_data_async(pubmed_ids))
 
+    async def _load_pubmed_data_async(self, pubmed_ids):
         fetch_started = False
 
-        def on_partial(data):
-            self._pubmed_metadata_ready.emit(data, pubmed_ids)
-
         def on_fetch_start():
             nonlocal fetch_started
             fetch_started = True
             self._pubmed_connection_status.emit("loading", "")
 
+        data = {}
         try:
-            data = resolve_metadata_for_pmids(
+            async for chunk in async_resolver.iter_metadata_for_pmids(
                 pubmed_ids,
-                on_partial=on_partial,
                 on_fetch_start=on_fetch_start,
-            )
-            if isinstance(data, dict):
-                self.pubmeddata = data
+                fields=self._pubmed_metadata_fields(),
+            ):
+                data.update(chunk)
+                self._pubmed_metadata_ready.emit(dict(data), pubmed_ids)
+            self.pubmeddata = data
             print("Data loaded: " + str(len(data)) + " items")
             self._pubmed_connection_status.emit("success" if fetch_started else "idle", "")
+        except asyncio.CancelledError:
+            print("PubMed data load cancelled")
+            raise
         except Exception as e:
             print(f"Failed to load data: {e}")
             self._pubmed_connection_status.emit("error", str(e))
@@ -830,6 +849,8 @@ class window_inspect(QWidget):
         # it here so the main window can start a new action.
         self.hide_popup_message()
         self.hide_popup_tooltip()
+        if getattr(self, "_pubmed_future", None) is not None:
+            self._pubmed_future.cancel()
         if hasattr(self, "_spinner_timer") and self._spinner_timer is not None:
             self._spinner_timer.stop()
         if hasattr(self, "_spinner_movie") and self._spinner_movie is not None:
@@ -869,10 +890,16 @@ class window_inspect(QWidget):
         try:
             fd, temp_path = tempfile.mkstemp(suffix=".xlsx")
             os.close(fd)
+            # self.pubmeddata only holds the label fields; columns and the citation
+            # format may also have changed since the window opened.
+            fields = metadata_fields_for_columns(
+                build_column_specs(rt.settings), citation_template_from_settings(rt.settings)
+            )
+            metadata, _ = load_cached_metadata(pmids, fields)
             create_filled_worksheet(
                 temp_path,
                 pmids,
-                self.pubmeddata or {},
+                {**(self.pubmeddata or {}), **metadata},
                 settings=rt.settings,
             )
             self._worksheet_built.emit(temp_path)
@@ -4,14 +4,14 @@
 import datetime
 import json
 import os
-
-import requests
 import webbrowser
+
 from PyQt6 import QtCore
 from PyQt6.QtCore import Qt
 from PyQt6.QtWidgets import QMessageBox
 
 from data.version import __version__
+from pubxel_core import http_session
 from pubxel_core.paths import appdatadir
 
 CHECKFILE = os.path.join(appdatadir, "pubxel_check.json")
@@ -71,7 +71,7 @@ def check_for_update(parent=None):
         return
 
     try:
-        resp = requests.get(
+        resp = http_session.get(
             "https://raw.githubusercontent.com/crossing96/Pub-Xel/main/data/latest.json",
             timeout=3,
         )
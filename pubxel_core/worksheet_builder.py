@@ -13,6 +13,7 @@ from typing import Any
 
 import xlwings as xw
 
+from pubxel_core.citation import citation_template_from_settings
 from pubxel_core.metadata_store import MetadataDict
 from pubxel_core.paths import appdatadir, pubsheet_all_columns_path
 from pubxel_core.pubmed import build_worksheet_header_map, fill_worksheet_rows, normalize_pmid_list
@@ -198,7 +199,9 @@ def create_filled_worksheet(
             header_names = [ws.range((1, col)).value for col in range(1, num_cols + 1)]
             header2 = build_worksheet_header_map(header_names)
             rows = [(1 + idx, pmid) for idx, pmid in enumerate(normalized_pmids)]
-            fill_worksheet_rows(ws, metadata, header2, rows)
+            fill_worksheet_rows(
+                ws, metadata, header2, rows, citation_template_from_settings(resolved_settings)
+            )
 
             wb.save()
         finally:
@@ -7,6 +7,7 @@ import csv
 import os
 from typing import List
 
+from pubxel_core.citation import citation_template_from_settings
 from pubxel_core.metadata_store import MetadataDict
 from pubxel_core.pubmed import iter_worksheet_export_rows, normalize_pmid_list
 from pubxel_core.settings import SettingsDict
@@ -31,7 +32,7 @@ def write_worksheet_tsv(
         raise ValueError("No worksheet columns selected in preferences.")
 
     header_row, data_rows = iter_worksheet_export_rows(
-        normalized_pmids, metadata, column_names
+        normalized_pmids, metadata, column_names, citation_template_from_settings(settings)
     )
 
     resolved_path = os.path.abspath(path)
@@ -0,0 +1,108 @@
+"""Load-test the PubMed fetch engine offline against the local fake NCBI server.
+
+Standalone utility script. Generates synthetic MEDLINE records (or serves
+the given files), points Pub-Xel at a FakeNcbiServer and a throwaway SQLite
+database, and reports throughput plus retry/failure behaviour.
+
+    python scripts/bench_fetch.py --records 5000 --failure-rate 0.1
+    python scripts/bench_fetch.py --serve --port 8765 my_records.nbib
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import pubxel_core.pubmed as pubmed  # noqa: E402
+from pubxel_core import http_session  # noqa: E402
+from pubxel_core.providers import set_provider  # noqa: E402
+from pubxel_core.pubmed_fetch import pubmed_circuit  # noqa: E402
+from scripts.fake_ncbi_server import FakeNcbiServer  # noqa: E402
+from scripts.medline_samples import synthetic_medline_record  # noqa: E402
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="*", help="MEDLINE/nbib files or directories to serve.")
+    parser.add_argument("--records", type=int, default=2000, help="Synthetic records when no files are given.")
+    parser.add_argument("--provider", choices=["ctxp", "efetch"], default="ctxp")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds before each response.")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of requests answered with 503.")
+    parser.add_argument("--max-rps", type=float, default=0.0, help="Requests/second before the server sends 429.")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="Seconds between 64 KB body chunks.")
+    parser.add_argument("--serve", action="store_true", help="Only run the fake server until Ctrl+C.")
+    parser.add_argument("--port", type=int, default=0)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = _parse_args()
+    records = None
+    if not args.files:
+        records = {
+            str(30000000 + i): synthetic_medline_record(30000000 + i).replace("\r\n", "\n")
+            for i in range(args.records)
+        }
+
+    server = FakeNcbiServer(
+        args.files,
+        records=records,
+        port=args.port,
+        latency=args.latency,
+        failure_rate=args.failure_rate,
+        max_requests_per_second=args.max_rps,
+        chunk_delay=args.chunk_delay,
+    ).start()
+    print(f"Fake NCBI server with {len(server.records)} record(s) at {server.base_url}")
+
+    if args.serve:
+        print(f"ctxp:   {server.base_url}/lit/ctxp/v1/pubmed/?format=medline&id=...")
+        print(f"efetch: {server.base_url}/efetch.fcgi?db=pubmed&rettype=medline&retmode=text&id=...")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        server.stop()
+        return 0
+
+    set_provider(server.provider(args.provider))
+    pubmed_circuit.reset()
+    http_session.reset_request_stats()
+    with tempfile.TemporaryDirectory() as tmp:
+        pubmed.metadata_path = os.path.join(tmp, "metadata_article.sqlite")
+        pmids = list(server.records)
+        partials = 0
+
+        def on_partial(_):
+            nonlocal partials
+            partials += 1
+
+        start = time.perf_counter()
+        try:
+            result = pubmed.obtain_pubmed_data(pmids, on_partial=on_partial)
+        except ValueError as e:
+            result = {}
+            print(f"Fetch failed: {e}")
+        elapsed = time.perf_counter() - start
+
+    server.stop()
+    print(f"\nFetched {len(result)}/{len(pmids)} article(s) in {elapsed:.2f}s "
+          f"({len(result) / max(elapsed, 1e-9):.0f} articles/s), {partials} progressive update(s)")
+    print(f"Server saw {server.request_count} request(s); circuit open: {pubmed_circuit.is_open}")
+    for host, stats in http_session.request_stats().items():
+        avg = stats["total_seconds"] / max(stats["requests"], 1)
+        print(f"  {host}: {stats['requests']:.0f} requests, {stats['errors']:.0f} errors, "
+              f"avg {avg * 1000:.0f} ms, max {stats['max_seconds'] * 1000:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
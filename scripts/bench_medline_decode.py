@@ -0,0 +1,78 @@
+"""Benchmark MEDLINE response decoding: direct text path vs. the old BeautifulSoup path.
+
+Standalone utility script. BeautifulSoup is optional; without it only the
+direct path is timed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from pubxel_core.pubmed import medline_text_from_response  # noqa: E402
+from scripts.medline_samples import synthetic_medline_payload  # noqa: E402
+
+
+def _bs4_path(text: str) -> str:
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(text, "html.parser").get_text()
+
+
+def _direct_path(text: str) -> str:
+    return medline_text_from_response(text, "text/plain; charset=UTF-8")
+
+
+def _measure(func, text: str, repeat: int) -> tuple[float, float]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    func(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / (1024 * 1024)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    try:
+        import bs4  # noqa: F401
+
+        have_bs4 = True
+    except ImportError:
+        have_bs4 = False
+        print("beautifulsoup4 not installed; timing the direct path only.")
+
+    print(f"{'records':>8} {'MB':>7} {'direct s':>9} {'direct MB':>10} {'bs4 s':>8} {'bs4 MB':>8} {'speedup':>8}")
+    for n in args.records:
+        payload = synthetic_medline_payload(n)
+        size_mb = len(payload.encode("utf-8")) / (1024 * 1024)
+        direct_s, direct_mb = _measure(_direct_path, payload, args.repeat)
+        if have_bs4:
+            assert _bs4_path(payload) == _direct_path(payload), "decoded text differs"
+            bs4_s, bs4_mb = _measure(_bs4_path, payload, args.repeat)
+            print(
+                f"{n:>8} {size_mb:>7.1f} {direct_s:>9.4f} {direct_mb:>10.1f} "
+                f"{bs4_s:>8.3f} {bs4_mb:>8.1f} {bs4_s / max(direct_s, 1e-9):>7.0f}x"
+            )
+        else:
+            print(f"{n:>8} {size_mb:>7.1f} {direct_s:>9.4f} {direct_mb:>10.1f} {'-':>8} {'-':>8} {'-':>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""Benchmark memory and build time of slots-backed metadata records vs nested dicts.
+
+Standalone utility script. Loads a throwaway database with a synthetic MEDLINE
+corpus, reads every article/author row once, then builds the
+``{accession: {"article": ..., "authors": [...]}}`` result both as plain dicts
+(the previous get_metadata shape) and as ArticleRecord/AuthorRecord objects,
+reporting build time and retained memory (tracemalloc) for each.
+
+    python scripts/bench_metadata_records.py --records 50000
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from pubxel_core.medline import iter_medline_records  # noqa: E402
+from pubxel_core.metadata_store import ARTICLE_COLUMNS, DERIVED_COLUMNS, MetadataStore  # noqa: E402
+from pubxel_core.records import ArticleRecord, AuthorRecord  # noqa: E402
+from scripts.medline_samples import synthetic_medline_record  # noqa: E402
+
+START_PMID = 30000000
+COLUMNS = tuple(ARTICLE_COLUMNS) + tuple(DERIVED_COLUMNS)
+
+
+def _corpus_lines(n_records: int) -> Iterator[str]:
+    for i in range(n_records):
+        yield from synthetic_medline_record(START_PMID + i).split("\r\n")
+        yield ""
+
+
+def _build_db(db_path: str, n_records: int, batch: int = 5000) -> None:
+    store = MetadataStore(db_path)
+    articles, authors = [], []
+    for article_row, author_rows in iter_medline_records(_corpus_lines(n_records)):
+        articles.append(article_row)
+        authors.extend(author_rows)
+        if len(articles) >= batch:
+            store.upsert_metadata(articles, authors)
+            articles, authors = [], []
+    store.upsert_metadata(articles, authors)
+    store.close()
+
+
+def _as_dicts(article_rows: Sequence[Tuple], author_rows: Sequence[Tuple]) -> Dict[str, Any]:
+    result = {}
+    for row in article_rows:
+        article = dict(zip(COLUMNS, row))
+        result[article["accession"]] = {"article": article, "authors": []}
+    for accession, author_order, author_type, full_name, short_name in author_rows:
+        result[accession]["authors"].append(
+            {
+                "author_order": author_order,
+                "author_type": author_type,
+                "full_name": full_name,
+                "short_name": short_name,
+            }
+        )
+    return result
+
+
+def _as_records(article_rows: Sequence[Tuple], author_rows: Sequence[Tuple]) -> Dict[str, Any]:
+    result = {}
+    make_article = ArticleRecord.factory(COLUMNS)
+    for row in article_rows:
+        article = make_article(row)
+        result[article["accession"]] = {"article": article, "authors": []}
+    for accession, author_order, author_type, full_name, short_name in author_rows:
+        result[accession]["authors"].append(
+            AuthorRecord(author_order, author_type, full_name, short_name)
+        )
+    return result
+
+
+def _measure(build: Callable[..., Dict[str, Any]], *args: Any, repeat: int = 3) -> Tuple[float, int]:
+    elapsed = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        build(*args)
+        elapsed = min(elapsed, time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    result = build(*args)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, retained
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=50000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "records.sqlite")
+        _build_db(db_path, args.records)
+        store = MetadataStore(db_path)
+        try:
+            article_rows: List[Tuple] = store.conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM articles"
+            ).fetchall()
+            author_rows: List[Tuple] = store.conn.execute(
+                "SELECT accession, author_order, author_type, full_name, short_name "
+                "FROM article_authors ORDER BY accession, author_order"
+            ).fetchall()
+            accessions = [row[0] for row in article_rows]
+            start = time.perf_counter()
+            store.get_metadata(accessions)
+            get_metadata_s = time.perf_counter() - start
+        finally:
+            store.close()
+
+    print(f"Synthetic corpus: {len(article_rows)} articles, {len(author_rows)} authors")
+    print(f"{'shape':<10}{'build ms':>10}{'retained MB':>13}{'bytes/article':>15}")
+    baseline = None
+    for label, build in (("dicts", _as_dicts), ("records", _as_records)):
+        elapsed, retained = _measure(build, article_rows, author_rows)
+        per_article = retained / max(1, len(article_rows))
+        print(f"{label:<10}{elapsed * 1000:>10.1f}{retained / 1e6:>13.1f}{per_article:>15.0f}")
+        if baseline is None:
+            baseline = retained
+        else:
+            print(f"records retain {retained / baseline:.0%} of the dict shape")
+    print(f"get_metadata (records, full rows incl. inflate): {get_metadata_s * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""Benchmark metadata_article.sqlite size and read latency with and without text compression.
+
+Standalone utility script. Builds two throwaway databases from the same
+synthetic MEDLINE corpus, one storing abstract/si/gr/cin as plain TEXT and one
+with the default zlib compression, then compares file size and
+``MetadataStore.get_metadata`` latency.
+
+    python scripts/bench_metadata_storage.py --records 200000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Iterator, List
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import pubxel_core.metadata_store as metadata_store  # noqa: E402
+from pubxel_core.medline import iter_medline_records  # noqa: E402
+from pubxel_core.metadata_store import MetadataStore  # noqa: E402
+from scripts.medline_samples import synthetic_medline_record  # noqa: E402
+
+START_PMID = 30000000
+
+
+def _corpus_lines(n_records: int) -> Iterator[str]:
+    for i in range(n_records):
+        yield from synthetic_medline_record(START_PMID + i).split("\r\n")
+        yield ""
+
+
+def _build(db_path: str, n_records: int, batch: int) -> float:
+    store = MetadataStore(db_path)
+    start = time.perf_counter()
+    articles, authors = [], []
+    for article_row, author_rows in iter_medline_records(_corpus_lines(n_records)):
+        articles.append(article_row)
+        authors.extend(author_rows)
+        if len(articles) >= batch:
+            store.upsert_metadata(articles, authors)
+            articles, authors = [], []
+    store.upsert_metadata(articles, authors)
+    elapsed = time.perf_counter() - start
+    store.conn.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+    store.close()
+    return elapsed
+
+
+def _read_latencies(db_path: str, n_records: int, lookups: int, batch: int) -> List[float]:
+    rng = random.Random(0)
+    store = MetadataStore(db_path)
+    timings = []
+    try:
+        for _ in range(lookups):
+            pmids = [str(START_PMID + rng.randrange(n_records)) for _ in range(batch)]
+            start = time.perf_counter()
+            store.get_metadata(pmids)
+            timings.append(time.perf_counter() - start)
+    finally:
+        store.close()
+    return timings
+
+
+def _db_size(db_path: str) -> int:
+    return sum(
+        os.path.getsize(path)
+        for path in (db_path, db_path + "-wal")
+        if os.path.exists(path)
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=200000)
+    parser.add_argument("--lookups", type=int, default=200, help="Random get_metadata calls per database.")
+    parser.add_argument("--lookup-batch", type=int, default=50, help="PMIDs per get_metadata call.")
+    parser.add_argument("--write-batch", type=int, default=5000, help="Records per upsert transaction.")
+    args = parser.parse_args()
+
+    default_min_bytes = metadata_store.COMPRESS_MIN_BYTES
+    print(f"Synthetic corpus: {args.records} articles")
+    print(f"{'storage':<12}{'size MB':>10}{'build s':>10}{'read p50 ms':>13}{'read p95 ms':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, min_bytes in (("plain", 1 << 62), ("compressed", default_min_bytes)):
+            metadata_store.COMPRESS_MIN_BYTES = min_bytes
+            db_path = os.path.join(tmp, f"{label}.sqlite")
+            build = _build(db_path, args.records, args.write_batch)
+            timings = sorted(_read_latencies(db_path, args.records, args.lookups, args.lookup_batch))
+            p50 = statistics.median(timings) * 1000
+            p95 = timings[int(len(timings) * 0.95) - 1] * 1000
+            print(f"{label:<12}{_db_size(db_path) / 1e6:>10.1f}{build:>10.1f}{p50:>13.2f}{p95:>13.2f}")
+    metadata_store.COMPRESS_MIN_BYTES = default_min_bytes
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""Benchmark block (2D Range.value) worksheet fills against cell-by-cell writes.
+
+Standalone utility script. Imports a synthetic MEDLINE corpus into a throwaway
+metadata database and fills a worksheet with it twice: cell by cell (one
+``ws[row, col].value`` assignment per cell, the previous fill_worksheet_rows
+behaviour) and with ``fill_worksheet_rows`` (one ``Range.value`` assignment per
+run of consecutive rows and header columns). Every row in ``--gap-every``
+has a PMID that is not in the database, so blocks are split as in real sheets.
+
+Without ``--excel`` the sheet is an in-memory stand-in that counts COM calls
+and charges ``--latency`` ms for each; the two fills are checked to produce
+identical cells. With ``--excel`` both fills run against a hidden Excel
+instance (Windows/macOS with Excel installed).
+
+    python scripts/bench_worksheet_fill.py --records 20000 --latency 0.2
+    python scripts/bench_worksheet_fill.py --records 5000 --excel
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from pubxel_core import pubmed  # noqa: E402
+from scripts.medline_samples import synthetic_medline_payload  # noqa: E402
+
+HEADERS = [
+    "Ref", "Title", "Journal", "Year", "Author", "Abstract", "Notes", "DOI",
+    "Citation", "IF2025", "Q2025",
+]
+
+
+class _FakeApp:
+    def __init__(self) -> None:
+        self.screen_updating = True
+        self.enable_events = True
+        self.calculation = "automatic"
+
+
+class _FakeBook:
+    def __init__(self) -> None:
+        self.app = _FakeApp()
+
+
+class _FakeRange:
+    def __init__(self, sheet: "_FakeSheet", first: Tuple[int, int], last: Tuple[int, int]):
+        self._sheet, self._first, self._last = sheet, first, last
+
+    @property
+    def value(self) -> Any:
+        return self._sheet.cells.get(self._first)
+
+    @value.setter
+    def value(self, values: Any) -> None:
+        self._sheet.calls += 1
+        row0, col0 = self._first
+        if not isinstance(values, list):
+            self._sheet.cells[self._first] = values
+            return
+        assert len(values) == self._last[0] - row0 + 1, "row count does not match range"
+        for r, row in enumerate(values):
+            assert len(row) == self._last[1] - col0 + 1, "column count does not match range"
+            for c, value in enumerate(row):
+                self._sheet.cells[(row0 + r, col0 + c)] = value
+
+
+class _FakeSheet:
+    """Just enough of xlwings.Sheet for fill_worksheet_rows; cells are 0-based."""
+
+    def __init__(self) -> None:
+        self.book = _FakeBook()
+        self.cells: Dict[Tuple[int, int], Any] = {}
+        self.calls = 0
+
+    def __getitem__(self, key: Tuple[int, int]) -> _FakeRange:
+        return _FakeRange(self, key, key)
+
+    def range(self, first: Tuple[int, int], last: Optional[Tuple[int, int]] = None) -> _FakeRange:
+        last = last or first
+        return _FakeRange(self, (first[0] - 1, first[1] - 1), (last[0] - 1, last[1] - 1))
+
+
+def _fill_cell_by_cell(ws: Any, metadata: Dict[str, Any], header2: Dict[str, int], rows: List[Tuple[int, str]]) -> None:
+    journal_metrics = pubmed.get_journal_metrics() if pubmed._needs_impact_factors(header2) else None
+    columns = pubmed.build_worksheet_columns([p for _, p in rows], metadata, header2, journal_metrics)
+    for i, (row_i, pmidstring) in enumerate(rows):
+        if pmidstring not in metadata:
+            if header2.get("pmid", -1) >= 0:
+                ws[row_i, header2["pmid"]].value = pmidstring
+            continue
+        for key, col_idx in header2.items():
+            ws[row_i, col_idx].value = columns[key][i]
+
+
+def _rows(pmids: List[str], gap_every: int) -> List[Tuple[int, str]]:
+    rows = []
+    for i, pmid in enumerate(pmids, start=1):
+        rows.append((i, str(10 ** 8 + i) if gap_every and i % gap_every == 0 else pmid))
+    return rows
+
+
+def _bench_fake(metadata: Dict[str, Any], header2: Dict[str, int], rows: List[Tuple[int, str]], latency_ms: float) -> None:
+    results = {}
+    for name, fill in (
+        ("cell by cell", lambda ws: _fill_cell_by_cell(ws, metadata, header2, rows)),
+        ("2D blocks", lambda ws: pubmed.fill_worksheet_rows(ws, metadata, header2, rows)),
+    ):
+        ws = _FakeSheet()
+        start = time.perf_counter()
+        fill(ws)
+        elapsed = time.perf_counter() - start
+        estimate = elapsed + ws.calls * latency_ms / 1000
+        print(f"{name:>13}: {ws.calls:>9,} writes  {elapsed * 1000:8.0f} ms Python  ~{estimate:8.2f} s at {latency_ms} ms/write")
+        results[name] = ws
+    cells_match = results["cell by cell"].cells == results["2D blocks"].cells
+    app = results["2D blocks"].book.app
+    restored = (app.screen_updating, app.enable_events, app.calculation) == (True, True, "automatic")
+    print(f"identical cells: {cells_match}  Excel state restored: {restored}")
+
+
+def _bench_excel(metadata: Dict[str, Any], header2: Dict[str, int], rows: List[Tuple[int, str]]) -> None:
+    import xlwings as xw
+
+    app = xw.App(visible=False, add_book=False)
+    try:
+        for name, fill in (
+            ("cell by cell", lambda ws: _fill_cell_by_cell(ws, metadata, header2, rows)),
+            ("2D blocks", lambda ws: pubmed.fill_worksheet_rows(ws, metadata, header2, rows)),
+        ):
+            wb = app.books.add()
+            ws = wb.sheets[0]
+            ws.range((1, 1)).value = [HEADERS]
+            start = time.perf_counter()
+            fill(ws)
+            print(f"{name:>13}: {time.perf_counter() - start:8.2f} s")
+            wb.close()
+    finally:
+        app.quit()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=20000, help="synthetic articles (default: 20000)")
+    parser.add_argument("--gap-every", type=int, default=500, help="every Nth row gets an unknown PMID (0: none)")
+    parser.add_argument("--latency", type=float, default=0.2, help="simulated ms per COM write (default: 0.2)")
+    parser.add_argument("--excel", action="store_true", help="write to a hidden Excel instance instead")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pubmed.metadata_path = os.path.join(tmp, "metadata.sqlite")
+        payload = synthetic_medline_payload(args.records).replace("\r\n", "\n").strip().split("\n\n")
+        start = time.perf_counter()
+        metadata = pubmed.import_nbib_to_metadata(payload)
+        print(f"Imported {len(metadata):,} records in {time.perf_counter() - start:.1f} s")
+
+        header2 = pubmed.build_worksheet_header_map(HEADERS)
+        rows = _rows(list(metadata), args.gap_every)
+        print(f"{len(rows):,} rows x {len(header2)} columns ({len(HEADERS)} in header)")
+        if args.excel:
+            _bench_excel(metadata, header2, rows)
+        else:
+            _bench_fake(metadata, header2, rows, args.latency)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
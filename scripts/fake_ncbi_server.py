@@ -0,0 +1,175 @@
+"""Local file-backed NCBI stand-in for the offline fetch benchmarks in this folder.
+
+FakeNcbiServer answers ctxp and efetch requests from MEDLINE records on disk
+(or given in memory), with knobs for latency, failures and rate limiting.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from pubxel_core.ids import normalize_pmid
+from pubxel_core.providers import CtxpProvider, EutilsProvider, MetadataProvider
+
+
+def _pmid_of_record(record: str) -> Optional[str]:
+    for line in record.split("\n"):
+        if line.startswith("PMID"):
+            _, _, value = line.partition("-")
+            value = value.strip()
+            return normalize_pmid(value) if value else None
+    return None
+
+
+def load_medline_records(paths: Iterable[str]) -> Dict[str, str]:
+    """Read MEDLINE/nbib files (or directories of them) into ``{pmid: record}``."""
+    records: Dict[str, str] = {}
+    files: List[str] = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith((".txt", ".nbib", ".medline")):
+                    files.append(os.path.join(path, name))
+        else:
+            files.append(path)
+    for file_path in files:
+        with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+            text = f.read().replace("\r\n", "\n")
+        for record in text.split("\n\n"):
+            record = record.strip("\n")
+            pmid = _pmid_of_record(record)
+            if pmid:
+                records[pmid] = record
+    return records
+
+
+class FakeNcbiServer:
+    """
+    Local HTTP server that answers ctxp (``/lit/ctxp/v1/pubmed/``) and efetch
+    (``/efetch.fcgi``) requests from MEDLINE records on disk.
+
+    Knobs for load and failure testing: ``latency`` seconds before each
+    response, ``failure_rate`` fraction of requests answered with HTTP 503,
+    ``max_requests_per_second`` above which requests get 429 + Retry-After,
+    and ``chunk_bytes`` / ``chunk_delay`` to trickle the body.
+
+        with FakeNcbiServer(["records.nbib"]) as server:
+            set_provider(server.provider())
+    """
+
+    def __init__(
+        self,
+        paths: Iterable[str] = (),
+        records: Optional[Dict[str, str]] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        failure_rate: float = 0.0,
+        max_requests_per_second: float = 0.0,
+        chunk_bytes: int = 64 * 1024,
+        chunk_delay: float = 0.0,
+    ):
+        self.records: Dict[str, str] = dict(records or {})
+        self.records.update(load_medline_records(paths))
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.max_requests_per_second = max_requests_per_second
+        self.chunk_bytes = chunk_bytes
+        self.chunk_delay = chunk_delay
+        self.request_count = 0
+        self._count_lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def provider(self, kind: str = "ctxp") -> MetadataProvider:
+        if kind == "efetch":
+            return EutilsProvider(base_url=self.base_url + "/efetch.fcgi", requests_per_second=0)
+        return CtxpProvider(base_url=self.base_url + "/lit/ctxp/v1/pubmed/", requests_per_second=0)
+
+    def start(self) -> "FakeNcbiServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-ncbi", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join(2.0)
+
+    def __enter__(self) -> "FakeNcbiServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def _throttled(self) -> bool:
+        with self._count_lock:
+            self.request_count += 1
+            if self.max_requests_per_second <= 0:
+                return False
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start = now
+                self._window_count = 0
+            self._window_count += 1
+            return self._window_count > self.max_requests_per_second
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                parts = urlsplit(self.path)
+                query = parse_qs(parts.query)
+                if server.latency:
+                    time.sleep(server.latency)
+                if server._throttled():
+                    self._send_status(429, {"Retry-After": "1"})
+                    return
+                if server.failure_rate and random.random() < server.failure_rate:
+                    self._send_status(503)
+                    return
+                ids = ",".join(query.get("id", [])).split(",")
+                found = [server.records[normalize_pmid(i)] for i in ids if i and normalize_pmid(i) in server.records]
+                if not found:
+                    self._send_status(400)
+                    return
+                if parts.path.endswith("efetch.fcgi"):
+                    body = ("\n" + "\n\n".join(found) + "\n").encode("utf-8")
+                else:
+                    body = ("\r\n\r\n".join(r.replace("\n", "\r\n") for r in found) + "\r\n").encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; charset=UTF-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                for i in range(0, len(body), server.chunk_bytes):
+                    if server.chunk_delay:
+                        time.sleep(server.chunk_delay)
+                    self.wfile.write(body[i:i + server.chunk_bytes])
+
+            def _send_status(self, code: int, headers: Optional[Dict[str, str]] = None) -> None:
+                self.send_response(code)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        return Handler
@@ -0,0 +1,122 @@
+"""Bulk-load MEDLINE/nbib files into the Pub-Xel metadata database.
+
+Standalone utility script. Streams the given files (or directories of
+.txt/.nbib/.medline files) through ``MetadataStore.bulk_upsert_metadata`` and
+reports rows per second. ``--synthetic N`` loads a generated corpus instead
+and, with ``--compare``, times the regular batched upsert_metadata path on a
+second throwaway database for reference. Only MEDLINE text is read: PubMed's
+XML baseline files (pubmed24n0001.xml.gz, ...) are rejected.
+
+    python scripts/import_medline_dump.py pubmed-export.txt citations.nbib
+    python scripts/import_medline_dump.py --synthetic 200000 --compare
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import Iterable, Iterator, List
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from pubxel_core.medline import iter_medline_records  # noqa: E402
+from pubxel_core.metadata_store import BULK_STAGE_BATCH, MetadataStore  # noqa: E402
+from scripts.medline_samples import synthetic_medline_record  # noqa: E402
+
+START_PMID = 30000000
+XML_SUFFIXES = (".xml", ".xml.gz")
+
+
+def _file_lines(paths: Iterable[str]) -> Iterator[str]:
+    files: List[str] = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith((".txt", ".nbib", ".medline")):
+                    files.append(os.path.join(path, name))
+        else:
+            files.append(path)
+    for file_path in files:
+        with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+            yield from f
+        yield ""
+
+
+def _synthetic_lines(n_records: int) -> Iterator[str]:
+    for i in range(n_records):
+        yield from synthetic_medline_record(START_PMID + i).split("\r\n")
+        yield ""
+
+
+def _regular_upsert(db_path: str, n_records: int, batch: int) -> float:
+    store = MetadataStore(db_path)
+    start = time.perf_counter()
+    articles, authors = [], []
+    for article_row, author_rows in iter_medline_records(_synthetic_lines(n_records)):
+        articles.append(article_row)
+        authors.extend(author_rows)
+        if len(articles) >= batch:
+            store.upsert_metadata(articles, authors)
+            articles, authors = [], []
+    store.upsert_metadata(articles, authors)
+    elapsed = time.perf_counter() - start
+    store.close()
+    return elapsed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="*", help="MEDLINE/nbib files or directories.")
+    parser.add_argument("--db", default="", help="Target database (default: the app's metadata_article.sqlite).")
+    parser.add_argument("--synthetic", type=int, default=0, help="Load N generated records instead of files.")
+    parser.add_argument("--compare", action="store_true", help="With --synthetic, also time upsert_metadata.")
+    parser.add_argument("--batch", type=int, default=BULK_STAGE_BATCH, help="Records per staging batch.")
+    rebuild = parser.add_mutually_exclusive_group()
+    rebuild.add_argument("--rebuild-indexes", dest="rebuild", action="store_true", default=None)
+    rebuild.add_argument("--keep-indexes", dest="rebuild", action="store_false")
+    args = parser.parse_args()
+
+    if not args.files and not args.synthetic:
+        parser.error("give MEDLINE files or --synthetic N")
+    xml_files = [path for path in args.files if path.lower().endswith(XML_SUFFIXES)]
+    if xml_files:
+        parser.error(
+            "PubMed XML is not supported, give MEDLINE text (.txt/.nbib/.medline) files: "
+            + ", ".join(xml_files)
+        )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.db:
+            db_path = args.db
+        elif args.synthetic:
+            db_path = os.path.join(tmp, "bulk.sqlite")
+        else:
+            from pubxel_core.paths import metadata_path
+
+            db_path = metadata_path
+        lines = _synthetic_lines(args.synthetic) if args.synthetic else _file_lines(args.files)
+
+        store = MetadataStore(db_path)
+        try:
+            stats = store.bulk_upsert_metadata(
+                iter_medline_records(lines), batch_size=args.batch, rebuild_indexes=args.rebuild
+            )
+        finally:
+            store.close()
+
+        if args.synthetic and args.compare:
+            elapsed = _regular_upsert(os.path.join(tmp, "regular.sqlite"), args.synthetic, args.batch)
+            rate = args.synthetic / elapsed if elapsed > 0 else 0.0
+            print(f"{'path':<18}{'seconds':>10}{'rows/s':>10}")
+            print(f"{'upsert_metadata':<18}{elapsed:>10.1f}{rate:>10.0f}")
+            print(f"{'bulk':<18}{stats['seconds']:>10.1f}{stats['rows_per_second']:>10.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""Synthetic MEDLINE records for the benchmark scripts in this folder."""
+
+from __future__ import annotations
+
+import random
+from typing import List
+
+_WORDS = (
+    "cell tumor patients clinical outcome cohort risk analysis expression "
+    "receptor therapy randomized trial protein mutation inflammatory response "
+    "mortality imaging genome kinase signalling placebo efficacy survival"
+).split()
+
+
+def _sentence(rng: random.Random, n_words: int) -> str:
+    words = [rng.choice(_WORDS) for _ in range(n_words)]
+    return " ".join(words).capitalize() + "."
+
+
+def _wrap(tag: str, text: str, width: int = 82) -> List[str]:
+    # MEDLINE continuation lines are indented by six spaces.
+    lines: List[str] = []
+    prefix = f"{tag:<4}- "
+    current = prefix
+    for word in text.split(" "):
+        if len(current) + len(word) + 1 > width and current.strip() != prefix.strip():
+            lines.append(current.rstrip())
+            current = "      "
+        current += word + " "
+    lines.append(current.rstrip())
+    return lines
+
+
+def synthetic_medline_record(pmid: int, seed: int | None = None) -> str:
+    """Return one MEDLINE record (CRLF line endings) that looks like a ctxp response."""
+    rng = random.Random(pmid if seed is None else seed)
+    year = rng.randint(1990, 2025)
+    journal = rng.choice(["Nature", "N Engl J Med", "Lancet", "Cell", "PLoS One", "J Clin Oncol"])
+    lines = [f"PMID- {pmid}", "OWN - NLM", "STAT- MEDLINE", f"DP  - {year} Mar"]
+    lines += _wrap("TI", " ".join(_sentence(rng, rng.randint(8, 16)) for _ in range(1)))
+    lines += [f"PG  - {rng.randint(1, 900)}-{rng.randint(901, 999)}"]
+    lines += [f"LID - 10.1000/synthetic.{pmid} [doi]"]
+    lines += _wrap("AB", " ".join(_sentence(rng, rng.randint(10, 25)) for _ in range(rng.randint(6, 14))))
+    for i in range(rng.randint(1, 12)):
+        last = rng.choice(["Smith", "Kim", "Garcia", "Müller", "Chen", "Rossi", "Okafor"])
+        first = rng.choice(["John", "Jongyeob", "Ana", "Wei", "Luca", "Ngozi"])
+        lines.append(f"FAU - {last}, {first}")
+        lines.append(f"AU  - {last} {first[0]}")
+    lines += ["LA  - eng", "PT  - Journal Article"]
+    if rng.random() < 0.3:
+        lines += _wrap("GR", f"R01 CA{rng.randint(100000, 999999)}/CA/NCI NIH HHS/United States")
+    lines += [f"TA  - {journal}", f"JT  - {journal} (full title)", "IS  - 1234-5678 (Electronic)"]
+    lines += [f"AID - 10.1000/synthetic.{pmid} [doi]"]
+    lines += [f"SO  - {journal}. {year} Mar;{rng.randint(1, 400)}({rng.randint(1, 12)}):{rng.randint(1, 900)}-{rng.randint(901, 999)}. doi: 10.1000/synthetic.{pmid}."]
+    return "\r\n".join(lines)
+
+
+def synthetic_medline_payload(n_records: int, start_pmid: int = 30000000) -> str:
+    """Return ``n_records`` records joined the way the ctxp API separates them."""
+    return "\r\n\r\n".join(
+        synthetic_medline_record(start_pmid + i) for i in range(n_records)
+    ) + "\r\n"
@@ -0,0 +1,121 @@
+"""Report how many articles get impact factors, by journal match kind.
+
+Standalone utility script. Reads journal/ISSN/full-title fields from a
+metadata database (default: the app's metadata_article.sqlite, opened
+read-only) or from MEDLINE/nbib files, matches them against the journal
+table with JournalMetricsIndex.match, and prints the hit rate per key kind
+next to the old abbreviation-only lookup.
+
+    python scripts/report_journal_matches.py
+    python scripts/report_journal_matches.py --db metadata_article.sqlite --limit 50000
+    python scripts/report_journal_matches.py records.nbib
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from collections import Counter
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from pubxel_core.journal_metrics import (  # noqa: E402
+    MATCH_ABBREVIATION,
+    MATCH_ISSN,
+    MATCH_NORMALIZED_ABBREVIATION,
+    MATCH_TITLE,
+    get_journal_metrics,
+)
+from pubxel_core.medline import iter_medline_records  # noqa: E402
+
+JournalFields = Tuple[Optional[str], Optional[str], Optional[str]]  # journal, issn, fulljournal
+
+
+def _db_fields(db_path: str, limit: int) -> List[JournalFields]:
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        return conn.execute(
+            "SELECT journal, issn, fulljournal FROM articles LIMIT ?;", (limit,)
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def _file_lines(paths: Iterable[str]) -> Iterator[str]:
+    for path in paths:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            yield from f
+        yield ""
+
+
+def _file_fields(paths: List[str], limit: int) -> List[JournalFields]:
+    fields: List[JournalFields] = []
+    for article_row, _ in iter_medline_records(_file_lines(paths)):
+        fields.append((article_row[4], article_row[16], article_row[15]))
+        if len(fields) >= limit:
+            break
+    return fields
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="*", help="MEDLINE/nbib files (instead of a database).")
+    parser.add_argument("--db", default="", help="Metadata database (default: the app's).")
+    parser.add_argument("--limit", type=int, default=100000, help="Articles to sample.")
+    parser.add_argument("--top", type=int, default=15, help="Unmatched journals to list.")
+    args = parser.parse_args()
+
+    if args.files:
+        sample = _file_fields(args.files, args.limit)
+    else:
+        if args.db:
+            db_path = args.db
+        else:
+            from pubxel_core.paths import metadata_path
+
+            db_path = metadata_path
+        if not os.path.exists(db_path):
+            parser.error(f"no metadata database at {db_path}")
+        sample = _db_fields(db_path, args.limit)
+    if not sample:
+        print("No articles to match.")
+        return 0
+
+    index = get_journal_metrics()
+    kinds: Counter = Counter()
+    unmatched: Counter = Counter()
+    legacy_hits = 0
+    start = time.perf_counter()
+    for journal, issn, fulljournal in sample:
+        metrics, kind = index.match(journal, issn, fulljournal)
+        kinds[kind] += 1
+        if metrics is None:
+            unmatched[journal or fulljournal or "(no journal)"] += 1
+        if index.get(journal) is not None:
+            legacy_hits += 1
+    per_lookup_us = (time.perf_counter() - start) / len(sample) * 1e6
+
+    total = len(sample)
+    matched = total - kinds[""]
+    print(f"{total} articles, {len(index)} journals in table, {per_lookup_us:.1f} us per lookup")
+    if index.shared_issns:
+        print(f"{len(index.shared_issns)} ISSN(s) shared by several journals are not matched on")
+    print(f"{'match':<26}{'articles':>10}{'share':>9}")
+    for kind in (MATCH_ABBREVIATION, MATCH_ISSN, MATCH_NORMALIZED_ABBREVIATION, MATCH_TITLE, ""):
+        print(f"{kind or 'no match':<26}{kinds[kind]:>10}{kinds[kind] / total:>9.1%}")
+    print(f"hit rate: {matched / total:.1%} (abbreviation only: {legacy_hits / total:.1%})")
+    if unmatched and args.top > 0:
+        print("most frequent unmatched journals:")
+        for name, count in unmatched.most_common(args.top):
+            print(f"  {count:>6}  {name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
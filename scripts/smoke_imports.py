@@ -18,13 +18,22 @@ MODULES = [
     "pubxel_core.paths",
     "pubxel_core.settings",
     "pubxel_core.ids",
+    "pubxel_core.http_session",
     "pubxel_core.clipboard",
+    "pubxel_core.citation",
+    "pubxel_core.metadata_cache",
     "pubxel_core.metadata_store",
+    "pubxel_core.records",
+    "pubxel_core.journal_metrics",
     "pubxel_core.excel_ops",
     "pubxel_core.worksheet_builder",
     "pubxel_core.worksheet_export",
+    "pubxel_core.medline",
     "pubxel_core.nbib",
+    "pubxel_core.pubmed_fetch",
+    "pubxel_core.providers",
     "pubxel_core.pubmed",
+    "pubxel_core.async_resolver",
     "pubxel_core.mainfunctions",
     "pubxel_core.runtime",
     "pubxel_core.update",
@@ -0,0 +1,35 @@
+from pubxel_core.journal_metrics import MATCH_ABBREVIATION, MATCH_ISSN, MATCH_TITLE, parse_journal_table
+
+TABLE = [
+    ["abb", "pubmed_journal", "pubmed_issn", "pubmed_eissn", "IF_2025", "q_2025"],
+    ["NEPHRON", "Nephron", "1660-8151", "2235-3186", "2.3", "Q3"],
+    ["NEPHRON CLIN PRACT", "Nephron. Clinical practice", "1660-8151", "1660-2110", "1.7", "Q4"],
+    ["N ENGL J MED", "The New England journal of medicine", "0028-4793", "1533-4406", "84.5", "Q1"],
+]
+
+
+def _index(tmp_path):
+    path = tmp_path / "journals.txt"
+    path.write_text("".join("\t".join(row) + "\n" for row in TABLE), encoding="utf8")
+    return parse_journal_table(str(path))
+
+
+def test_shared_issn_does_not_override_abbreviation(tmp_path):
+    index = _index(tmp_path)
+    metrics, kind = index.match("Nephron Clin Pract", "1660-8151 (Print)")
+    assert (metrics.abbreviation, kind) == ("NEPHRON CLIN PRACT", MATCH_ABBREVIATION)
+    assert metrics.impact_factor("2025") == "1.7"
+
+
+def test_shared_issn_is_not_a_match_key(tmp_path):
+    index = _index(tmp_path)
+    assert "1660-8151" in index.shared_issns
+    assert index.match("Unknown J", "1660-8151 (Print)") == (None, "")
+    metrics, kind = index.match("Unknown J", "1660-8151 (Print)|1660-2110 (Electronic)")
+    assert (metrics.abbreviation, kind) == ("NEPHRON CLIN PRACT", MATCH_ISSN)
+
+
+def test_title_match(tmp_path):
+    index = _index(tmp_path)
+    metrics, kind = index.match("", "", "New England Journal of Medicine")
+    assert (metrics.abbreviation, kind) == ("N ENGL J MED", MATCH_TITLE)
@@ -0,0 +1,40 @@
+from pubxel_core.medline import iter_medline_records
+from pubxel_core.metadata_store import DERIVED_COLUMNS, MetadataStore, enrich_metadata
+
+RECORD = """\
+PMID- 33301246
+DP  - 2020 Dec 31
+TI  - Safety and Efficacy of the BNT162b2 mRNA Covid-19 Vaccine.
+FAU - Polack, Fernando P
+AU  - Polack FP
+FAU - Thomas, Stephen J
+AU  - Thomas SJ
+TA  - N Engl J Med
+JT  - The New England journal of medicine
+SO  - N Engl J Med. 2020 Dec 31;383(27):2603-2615.
+"""
+
+
+def _store(tmp_path):
+    store = MetadataStore(str(tmp_path / "metadata.sqlite"))
+    (article_row, author_rows), = iter_medline_records(RECORD.splitlines())
+    store.upsert_metadata([article_row], author_rows)
+    return store
+
+
+def test_reduced_field_sets_do_not_invent_citation_fields(tmp_path):
+    store = _store(tmp_path)
+    try:
+        full = enrich_metadata(store.get_metadata(["33301246"]))["33301246"]["article"]
+        assert full["firstauthorlastnameetal"]
+        for fields in (["cite"], ["title"], ["year"], ["title", "source"], ["authors"]):
+            article = enrich_metadata(store.get_metadata(["33301246"], fields), fields)["33301246"]["article"]
+            for col in DERIVED_COLUMNS:
+                if col in article:
+                    assert article[col] == full[col], (fields, col)
+        cite_only = enrich_metadata(store.get_metadata(["33301246"], ["cite"]), ["cite"])["33301246"]["article"]
+        assert cite_only["cite"] == full["cite"]
+        assert "firstauthor" not in cite_only
+        assert "firstauthorlastnameetal" not in cite_only
+    finally:
+        store.close()
@@ -0,0 +1,50 @@
+import io
+import threading
+
+import requests
+
+from pubxel_core import pubmed_fetch
+from pubxel_core.pubmed_fetch import CircuitBreaker, get_with_retry
+
+
+class _CountingLimiter:
+    def __init__(self):
+        self.waits = 0
+
+    def wait(self):
+        self.waits += 1
+
+
+def _response(status):
+    response = requests.Response()
+    response.status_code = status
+    response.raw = io.BytesIO(b"")
+    return response
+
+
+def test_half_open_circuit_lets_one_trial_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.05)
+    breaker.record_failure()
+    assert not breaker.allow()
+    threading.Event().wait(0.06)
+    assert not breaker.is_open
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(breaker.allow())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results.count(True) == 1
+    breaker.record_success()
+    assert breaker.allow() and breaker.allow()
+
+
+def test_every_retry_waits_for_the_rate_limiter(monkeypatch):
+    statuses = iter([503, 429, 200])
+    monkeypatch.setattr(pubmed_fetch.http_session, "get", lambda url, **kwargs: _response(next(statuses)))
+    monkeypatch.setattr(pubmed_fetch, "_backoff_delay", lambda attempt: 0.0)
+    monkeypatch.setattr(pubmed_fetch, "_retry_after_seconds", lambda response: 0.0)
+    limiter = _CountingLimiter()
+    response = get_with_retry("http://example.invalid/", breaker=CircuitBreaker(), limiter=limiter)
+    assert response.status_code == 200
+    assert limiter.waits == 3
@@ -0,0 +1,53 @@
+import threading
+import time
+
+from pubxel_core import pubmed
+from pubxel_core.medline import iter_medline_records
+
+RECORD = """\
+PMID- {pmid}
+DP  - 2020 Dec 31
+TI  - Article {pmid}.
+FAU - Polack, Fernando P
+AU  - Polack FP
+TA  - N Engl J Med
+SO  - N Engl J Med. 2020 Dec 31;383(27):2603-2615.
+"""
+
+
+def _slow_fetch(started):
+    def fetch(batch, sink, provider):
+        started.set()
+        accepted = 0
+        for pmid in batch:
+            if sink.cancelled:
+                break
+            time.sleep(0.01)
+            (record,) = iter_medline_records(RECORD.format(pmid=pmid).splitlines())
+            if sink.add(record):
+                accepted += 1
+        return accepted
+
+    return fetch
+
+
+def test_cancelled_owner_does_not_starve_waiting_caller(tmp_path, monkeypatch):
+    monkeypatch.setattr(pubmed, "metadata_path", str(tmp_path / "metadata.sqlite"))
+    started = threading.Event()
+    monkeypatch.setattr(pubmed, "_fetch_medline_batch", _slow_fetch(started))
+    pmids = [str(40000000 + i) for i in range(50)]
+
+    cancel = threading.Event()
+    owner = threading.Thread(target=pubmed.obtain_pubmed_data, args=(pmids,), kwargs={"cancel_event": cancel})
+    owner.start()
+    assert started.wait(5)
+
+    result = {}
+    waiter = threading.Thread(target=lambda: result.update(pubmed.obtain_pubmed_data(pmids)))
+    waiter.start()
+    time.sleep(0.05)
+    cancel.set()
+    owner.join(10)
+    waiter.join(10)
+
+    assert sorted(result) == pmids
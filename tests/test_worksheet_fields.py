@@ -0,0 +1,39 @@
+from pubxel_core.journal_metrics import get_journal_metrics
+from pubxel_core.medline import iter_medline_records
+from pubxel_core.metadata_store import MetadataStore, enrich_metadata
+from pubxel_core.pubmed import build_worksheet_columns, build_worksheet_header_map, metadata_fields_for_columns
+from pubxel_core.worksheet_builder import build_column_specs
+
+RECORD = """\
+PMID- 33301246
+DP  - 2020 Dec 31
+TI  - Safety and Efficacy of the BNT162b2 mRNA Covid-19 Vaccine.
+AB  - A two-dose regimen of BNT162b2 conferred 95% protection against Covid-19.
+FAU - Polack, Fernando P
+AU  - Polack FP
+FAU - Thomas, Stephen J
+AU  - Thomas SJ
+TA  - N Engl J Med
+JT  - The New England journal of medicine
+IS  - 1533-4406 (Electronic)
+LID - 10.1056/NEJMoa2034577 [doi]
+SI  - ClinicalTrials.gov/NCT04368728
+SO  - N Engl J Med. 2020 Dec 31;383(27):2603-2615.
+"""
+
+
+def test_column_fields_fill_every_worksheet_column(tmp_path):
+    store = MetadataStore(str(tmp_path / "metadata.sqlite"))
+    try:
+        (article_row, author_rows), = iter_medline_records(RECORD.splitlines())
+        store.upsert_metadata([article_row], author_rows)
+        pmids = ["33301246"]
+        full = enrich_metadata(store.get_metadata(pmids))
+        for column in build_column_specs({}, all_columns=True):
+            fields = metadata_fields_for_columns([column])
+            reduced = enrich_metadata(store.get_metadata(pmids, fields), fields)
+            header2 = build_worksheet_header_map([column])
+            expected = build_worksheet_columns(pmids, full, header2, get_journal_metrics())
+            assert build_worksheet_columns(pmids, reduced, header2, get_journal_metrics()) == expected, column
+    finally:
+        store.close()